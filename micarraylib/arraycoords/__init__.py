@@ -1,45 +1,144 @@
-from .core import micarray
+from .core import micarray, CapsulePairs
 from . import array_shapes_raw
+import json
+import threading
 
-ARRAYNAMES = [
-    "Ambeo",
-    "Eigenmike",
-    "OCT3D",
-    "PCMA3D",
-    "2LCube",
-    "DeccaCuboid",
-    "Hamasaki",
-]
+# array name: (raw coordinates, coordinates form, angle units)
+# the micarray objects are built the first time they are requested
+_ARRAY_SPECS = {
+    "Ambeo": (array_shapes_raw.ambeovr_raw, "polar", "degrees"),
+    "Eigenmike": (array_shapes_raw.eigenmike_raw, "polar", "degrees"),
+    "OCT3D": (array_shapes_raw.oct3d_raw, "cartesian", None),
+    "PCMA3D": (array_shapes_raw.pcma3d_raw, "cartesian", None),
+    "2LCube": (array_shapes_raw.cube2l_raw, "cartesian", None),
+    "DeccaCuboid": (array_shapes_raw.deccacuboid_raw, "cartesian", None),
+    "Hamasaki": (array_shapes_raw.hamasaki_raw, "cartesian", None),
+    "DICIT": (array_shapes_raw.dicit_cart, "cartesian", None),
+    "Signia": (array_shapes_raw.signia_cart, "cartesian", None),
+    "NAO": (array_shapes_raw.nao_cart, "cartesian", None),
+}
+_ARRAYS = {}
+_LOCK = threading.Lock()
+
+
+def __getattr__(name):
+    # ARRAYNAMES is derived from the registry, so that
+    # it includes the arrays registered later
+    if name == "ARRAYNAMES":
+        return list_micarrays()
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
 
 
 def list_micarrays():
     """
     Get a list of microphone array
-    topologies supported
+    topologies supported (including
+    registered ones)
     """
-    return ARRAYNAMES
+    with _LOCK:
+        return list(_ARRAY_SPECS.keys())
 
 
 def get_array(array_name):
     """
     Get the object associated with a
-    microphone array shape
-    """
-    if array_name not in ARRAYNAMES:
-        raise ValueError("Not a supported microphone array")
-    if array_name == "Ambeo":
-        return micarray(array_shapes_raw.ambeovr_raw, "polar", "degrees", "Ambeo")
-    elif array_name == "Eigenmike":
-        return micarray(array_shapes_raw.eigenmike_raw, "polar", "degrees", "Eigenmike")
-    elif array_name == "OCT3D":
-        return micarray(array_shapes_raw.oct3d_raw, "cartesian", None, "OCT3D")
-    elif array_name == "PCMA3D":
-        return micarray(array_shapes_raw.pcma3d_raw, "cartesian", None, "PCMA3D")
-    elif array_name == "2LCube":
-        return micarray(array_shapes_raw.cube2l_raw, "cartesian", None, "2LCube")
-    elif array_name == "DeccaCuboid":
+    microphone array shape. The object is
+    built once and shared by all callers
+    (micarray objects are immutable)
+    """
+    with _LOCK:
+        if array_name not in _ARRAY_SPECS:
+            raise ValueError("Not a supported microphone array")
+        array = _ARRAYS.get(array_name)
+        if array is None:
+            coords_dict, coords_form, angle_units = _ARRAY_SPECS[array_name]
+            array = micarray(coords_dict, coords_form, angle_units, array_name)
+            _ARRAYS[array_name] = array
+        return array
+
+
+def register_array(array, overwrite=False):
+    """
+    Register a user-defined microphone array
+    so that it can be obtained with get_array
+
+    Args:
+        array (micarray): the microphone array. Its name
+            is the name of the array in the registry
+        overwrite (bool): whether to replace an array
+            already registered with the same name
+    """
+    if not isinstance(array, micarray):
+        raise ValueError("array must be a micarray object")
+    if array.name == None:
+        raise ValueError("the array must have a name to be registered")
+    with _LOCK:
+        if array.name in _ARRAY_SPECS and not overwrite:
+            raise ValueError(
+                "an array named {} is already registered".format(array.name)
+            )
+        _ARRAY_SPECS[array.name] = (
+            array.coords_dict,
+            array.coords_form,
+            array.angle_units,
+        )
+        _ARRAYS[array.name] = array
+
+
+def unregister_array(array_name):
+    """
+    Remove a microphone array from the registry
+
+    Args:
+        array_name (str): the name of the array
+    """
+    with _LOCK:
+        if array_name not in _ARRAY_SPECS:
+            raise ValueError("Not a supported microphone array")
+        del _ARRAY_SPECS[array_name]
+        _ARRAYS.pop(array_name, None)
+
+
+def array_to_json(array):
+    """
+    Serialize a microphone array to JSON
+
+    Args:
+        array (micarray or str): the array or the
+            name of a registered array
+
+    Returns:
+        the JSON string with the name, the form, the angle
+        units and the raw coordinates of the array
+    """
+    if not isinstance(array, micarray):
+        array = get_array(array)
+    return json.dumps(
+        {
+            "name": array.name,
+            "coords_form": array.coords_form,
+            "angle_units": array.angle_units,
+            "coords": array.coords_dict,
+        }
+    )
+
+
+def array_from_json(array_json):
+    """
+    Build a microphone array from JSON
+    written by array_to_json
+
+    Args:
+        array_json (str): the JSON string
+
+    Returns:
+        the micarray object (use register_array
+        to make it available through get_array)
+    """
+    try:
+        spec = json.loads(array_json)
         return micarray(
-            array_shapes_raw.deccacuboid_raw, "cartesian", None, "DeccaCuboid"
+            spec["coords"], spec["coords_form"], spec.get("angle_units"), spec["name"]
         )
-    elif array_name == "Hamasaki":
-        return micarray(array_shapes_raw.hamasaki_raw, "cartesian", None, "Hamasaki")
+    except (KeyError, TypeError) as e:
+        raise ValueError("not a valid microphone array JSON: {}".format(e))
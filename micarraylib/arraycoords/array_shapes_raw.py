@@ -117,44 +117,48 @@ hamasaki_raw = {
     "RRh_1": [-2.0, -1.0, 2.6],
 }
 
-"""
 dicit_cart = {
-    '1':  [0.000,   0.960,   0.000],
-    '2':  [0.000,   0.640,   0.000],
-    '3':  [0.000,   0.320,   0.000],
-    '4':  [0.000,   0.160,   0.000],
-    '5':  [0.000,   0.080,   0.000],
-    '6':  [0.000,   0.040,   0.000],
-    '7':  [0.000,   0.000,   0.000],
-    '8':  [0.000,   0.960,   0.320],
-    '9':  [0.000,  -0.040,   0.000],
-    '10': [0.000,  -0.080,   0.000],
-    '11': [0.000,  -0.160,   0.000],
-    '12': [0.000,  -0.320,   0.000],
-    '13': [0.000,  -0.640,   0.000],
-    '14': [0.000,  -0.960,   0.000],
-    '15': [0.000,  -0.960,   0.320],
+    # x, y, z
+    # (meters)
+    "1": [0.000, 0.960, 0.000],
+    "2": [0.000, 0.640, 0.000],
+    "3": [0.000, 0.320, 0.000],
+    "4": [0.000, 0.160, 0.000],
+    "5": [0.000, 0.080, 0.000],
+    "6": [0.000, 0.040, 0.000],
+    "7": [0.000, 0.000, 0.000],
+    "8": [0.000, 0.960, 0.320],
+    "9": [0.000, -0.040, 0.000],
+    "10": [0.000, -0.080, 0.000],
+    "11": [0.000, -0.160, 0.000],
+    "12": [0.000, -0.320, 0.000],
+    "13": [0.000, -0.640, 0.000],
+    "14": [0.000, -0.960, 0.000],
+    "15": [0.000, -0.960, 0.320],
 }
 
 signia_cart = {
-    '1':  [-0.079,  0.000, 0.000],
-    '2':  [-0.079, -0.009, 0.000],
-    '3':  [0.079,   0.000, 0.000],
-    '4':  [0.079,  -0.009, 0.000],
+    # x, y, z
+    # (meters)
+    "1": [-0.079, 0.000, 0.000],
+    "2": [-0.079, -0.009, 0.000],
+    "3": [0.079, 0.000, 0.000],
+    "4": [0.079, -0.009, 0.000],
 }
 
 nao_cart = {
-    '1' :[-0.028, 0.030, -0.040],
-    '2' :[0.006,  0.057,  0.000],
-    '3' :[0.022,  0.022, -0.046],
-    '4' :[-0.055,-0.024, -0.025],
-    '5' :[-0.031, 0.023,  0.042],
-    '6' :[-0.032, 0.011,  0.046],
-    '7' :[-0.025,-0.003,  0.051],
-    '8' :[-0.036,-0.027,  0.038],
-    '9' :[-0.035,-0.043,  0.025],
-    '10':[0.029, -0.048, -0.012],
-    '11':[0.034, -0.030,  0.037],
-    '12':[0.035,  0.025,  0.039],
+    # x, y, z
+    # (meters)
+    "1": [-0.028, 0.030, -0.040],
+    "2": [0.006, 0.057, 0.000],
+    "3": [0.022, 0.022, -0.046],
+    "4": [-0.055, -0.024, -0.025],
+    "5": [-0.031, 0.023, 0.042],
+    "6": [-0.032, 0.011, 0.046],
+    "7": [-0.025, -0.003, 0.051],
+    "8": [-0.036, -0.027, 0.038],
+    "9": [-0.035, -0.043, 0.025],
+    "10": [0.029, -0.048, -0.012],
+    "11": [0.034, -0.030, 0.037],
+    "12": [0.035, 0.025, 0.039],
 }
-"""
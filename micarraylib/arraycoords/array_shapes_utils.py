@@ -1,7 +1,80 @@
-import math
 import numpy as np
 
 
+def _deg2rad_array(coords):
+    """
+    Take an array with 3D polar coordinates
+    shaped (..., n, 3) and convert them from
+    degrees to radians
+
+    colatitude, azimuth, and radius (radius
+    is left intact)
+    """
+    coords = np.array(coords, dtype=float)
+    coords[..., :2] = np.radians(coords[..., :2])
+    return coords
+
+
+def _polar2cart_array(coords, units=None):
+    """
+    Take an array with polar coordinates
+    shaped (..., n, 3) and convert to cartesian
+
+    Parameters:
+        units: (str) indicating 'degrees' or 'radians'
+    """
+    if units == None or units != "degrees" and units != "radians":
+        raise ValueError("you must specify units of 'degrees' or 'radians'")
+    elif units == "degrees":
+        coords = _deg2rad_array(coords)
+    coords = np.asarray(coords, dtype=float)
+    colat, azi, r = coords[..., 0], coords[..., 1], coords[..., 2]
+    sin_colat = np.sin(colat)
+    return np.stack(
+        [r * sin_colat * np.cos(azi), r * sin_colat * np.sin(azi), r * np.cos(colat)],
+        axis=-1,
+    )
+
+
+def _centercoords_array(coords):
+    """
+    Take an array with cartesian coordinates
+    shaped (..., n, 3), find the center of each
+    array of n capsules and subtract it to center
+    all the coordinates around zero.
+    """
+    coords = np.asarray(coords, dtype=float)
+    return coords - np.mean(coords, axis=-2, keepdims=True)
+
+
+def _cart2polar_array(coords):
+    """
+    Take an array with cartesian coordinates
+    shaped (..., n, 3) and convert to polar:
+    colatitude (radians), azimuth (radians), radius
+
+    the azimuth is in [-pi/2, 3pi/2), like the
+    azimuth of the dictionary-based conversion
+    """
+    coords = np.asarray(coords, dtype=float)
+    x, y, z = coords[..., 0], coords[..., 1], coords[..., 2]
+    r = np.sqrt(x**2 + y**2 + z**2)
+    azi = np.arctan2(y, x)
+    azi = np.where(azi < -np.pi / 2, azi + 2 * np.pi, azi)
+    return np.stack([np.arccos(z / r), azi, r], axis=-1)
+
+
+def _distance_matrix_array(coords):
+    """
+    Take an array with cartesian coordinates
+    shaped (..., n, 3) and compute the distances
+    between all the capsules, shaped (..., n, n)
+    """
+    coords = np.asarray(coords, dtype=float)
+    diff = coords[..., :, np.newaxis, :] - coords[..., np.newaxis, :, :]
+    return np.sqrt(np.sum(diff**2, axis=-1))
+
+
 def _deg2rad(coords_dict):
     """
     Take a dictionary with microphone array
@@ -11,10 +84,8 @@ def _deg2rad(coords_dict):
     colatitude, azimuth, and radius (radius
     is left intact)
     """
-    return {
-        m: [math.radians(c[0]), math.radians(c[1]), c[2]]
-        for m, c in coords_dict.items()
-    }
+    coords = _deg2rad_array(list(coords_dict.values()))
+    return dict(zip(coords_dict.keys(), coords.tolist()))
 
 
 def _polar2cart(coords_dict, units=None):
@@ -26,18 +97,8 @@ def _polar2cart(coords_dict, units=None):
     Parameters:
         units: (str) indicating 'degrees' or 'radians'
     """
-    if units == None or units != "degrees" and units != "radians":
-        raise ValueError("you must specify units of 'degrees' or 'radians'")
-    elif units == "degrees":
-        coords_dict = _deg2rad(coords_dict)
-    return {
-        m: [
-            c[2] * math.sin(c[0]) * math.cos(c[1]),
-            c[2] * math.sin(c[0]) * math.sin(c[1]),
-            c[2] * math.cos(c[0]),
-        ]
-        for m, c in coords_dict.items()
-    }
+    coords = _polar2cart_array(list(coords_dict.values()), units)
+    return dict(zip(coords_dict.keys(), coords.tolist()))
 
 
 def _centercoords(coords_dict):
@@ -47,9 +108,8 @@ def _centercoords(coords_dict):
     of such coordinates and subtract it to center all
     the coordinates around zero.
     """
-    C = np.array([c for c in coords_dict.values()])
-    c_mean = np.mean(C, axis=0)
-    return {m: c - c_mean for m, c in coords_dict.items()}
+    coords = _centercoords_array(list(coords_dict.values()))
+    return dict(zip(coords_dict.keys(), coords))
 
 
 def _cart2polar(coords_dict):
@@ -58,11 +118,5 @@ def _cart2polar(coords_dict):
     capsules and cartesian coordinates, and convert
     to polar: colatitude (radians), azimuth (radians), radius
     """
-    return {
-        m: [
-            math.acos(c[2] / math.sqrt(c[0] ** 2 + c[1] ** 2 + c[2] ** 2)),
-            math.atan(c[1] / c[0]) if c[0] >= 0 else math.atan(c[1] / c[0]) + math.pi,
-            math.sqrt(c[0] ** 2 + c[1] ** 2 + c[2] ** 2),
-        ]
-        for m, c in coords_dict.items()
-    }
+    coords = _cart2polar_array(list(coords_dict.values()))
+    return dict(zip(coords_dict.keys(), coords.tolist()))
@@ -1,12 +1,28 @@
-from .array_shapes_utils import _deg2rad, _polar2cart, _cart2polar, _centercoords
-import math
+from .array_shapes_utils import (
+    _polar2cart_array,
+    _cart2polar_array,
+    _centercoords_array,
+    _distance_matrix_array,
+)
+import threading
 import numpy as np
 
+COORDS_FORMS = ["cartesian", "polar"]
+ANGLE_UNITS = ["degrees", "radians"]
+# meters per second
+SPEED_OF_SOUND = 343.0
+
 
 class micarray:
     """
     General micarray class
 
+    The raw coordinates are stored once as a read-only
+    (n, 3) array. The standard (centered) coordinates
+    are computed lazily, memoized, and returned as
+    read-only arrays, so a micarray never changes after
+    it is created and can be shared between threads.
+
     Args:
         coords_dict (dict): a dictionary with capsule names
             and coordinates.
@@ -14,6 +30,14 @@ class micarray:
             The units of cartesian are assumed to be in meters.
         angle_units (str): if polar, whether angles are in
             'degrees' or 'radians'.
+
+    Attributes:
+        name (str): the name of the array
+        capsule_names (list): the names of the capsules
+        coords (np.array): the read-only (n, 3) array
+            with the raw coordinates
+        coords_form (str): the form of the raw coordinates
+        angle_units (str): the angle units of the raw coordinates
     """
 
     def __init__(self, coords_dict, coords_form=None, angle_units=None, name=None):
@@ -23,30 +47,36 @@ class micarray:
             )
         if coords_form == "cartesian" and angle_units != None:
             raise ValueError("cartesian coordinates do not need angle_units")
+        if coords_form not in COORDS_FORMS:
+            raise ValueError("coords_form must be one of {}".format(COORDS_FORMS))
+        if coords_form == "polar" and angle_units not in ANGLE_UNITS:
+            raise ValueError("angle_units must be one of {}".format(ANGLE_UNITS))
         self.name = name
         self.capsule_names = list(coords_dict.keys())
-        self.coords_dict = coords_dict
+        self.coords = np.array(list(coords_dict.values()), dtype=float).reshape(-1, 3)
+        self.coords.flags.writeable = False
         self.coords_form = coords_form
         self.angle_units = angle_units
+        self._views = {}
+
+    @property
+    def coords_dict(self):
+        """
+        the raw coordinates as a dictionary
+        with capsule names and coordinates
+        """
+        return dict(zip(self.capsule_names, self.coords.tolist()))
 
     def center_coords(self):
         """
-        Ensures that the array's physical center is at
-        the origin of the coordinate system
-        Operates in place and returns the coords_dict
-        in cartesian form
-        """
-        if self.coords_form == "cartesian":
-            self.coords_dict = _centercoords(self.coords_dict)
-            return self.coords_dict
-        elif self.angle_units == "degrees":
-            self.coords_dict = _deg2rad(self.coords_dict)
-            self.angle_units = "radians"
-        self.coords_dict = _polar2cart(self.coords_dict, "radians")
-        self.coords_form = "cartesian"
-        self.angle_units = None
-        self.coords_dict = _centercoords(self.coords_dict)
-        return self.coords_dict
+        Get the coordinates with the array's physical
+        center at the origin of the coordinate system
+
+        Returns:
+            dictionary with capsule names and read-only
+            cartesian coordinates (meters)
+        """
+        return dict(zip(self.capsule_names, self.standard_coords_array("cartesian")))
 
     def standard_coords(self, form=None):
         """
@@ -57,14 +87,196 @@ class micarray:
             form (str): either 'polar' or 'cartesian'
                 polar returns coordinates in radians
                 cartesian returns coordinates in meters
+
+        Returns:
+            dictionary with capsule names and read-only
+            coordinates
+        """
+        return dict(zip(self.capsule_names, self.standard_coords_array(form)))
+
+    def standard_coords_array(self, form=None, angle_units=None):
+        """
+        get the array's standard (centered) coordinates
+        in the desired form as a read-only (n, 3) array,
+        ordered like capsule_names
+
+        Args:
+            form (str): either 'polar' or 'cartesian'
+            angle_units (str): if polar, whether angles are in
+                'degrees' or 'radians' (default radians)
+
+        Returns:
+            the read-only (n, 3) array. For polar, the columns are
+            colatitude, azimuth and radius (meters). For cartesian,
+            x, y and z (meters).
         """
         if form == None:
             raise ValueError("you must specify a form")
+        if form not in COORDS_FORMS:
+            raise ValueError("form must be one of {}".format(COORDS_FORMS))
+        if form == "cartesian" and angle_units != None:
+            raise ValueError("cartesian coordinates do not need angle_units")
+        if form == "polar" and angle_units == None:
+            angle_units = "radians"
+        if angle_units != None and angle_units not in ANGLE_UNITS:
+            raise ValueError("angle_units must be one of {}".format(ANGLE_UNITS))
+
+        return self._memoize(
+            (form, angle_units), lambda: self._compute_coords(form, angle_units)
+        )
+
+    def capsule_pairs(self):
+        """
+        get the table of capsule pairs of the array
+        (pairwise distances, maximum lags, aperture and
+        spatial aliasing frequency)
+
+        Returns:
+            the (memoized) CapsulePairs object
+        """
+        return self._memoize(
+            "capsule_pairs",
+            lambda: CapsulePairs(
+                self.standard_coords_array("cartesian"), self.capsule_names
+            ),
+        )
+
+    def _memoize(self, key, compute):
+        """
+        get a derived value of the array, computing
+        it the first time it is requested
+
+        Args:
+            key: the key of the value
+            compute (function): function that computes the value
+                (arrays are made read-only)
+
+        Returns:
+            the value
+        """
+        value = self._views.get(key)
+        if value is None:
+            value = compute()
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            # concurrent callers may compute the same value,
+            # but they all get identical read-only values
+            value = self._views.setdefault(key, value)
+        return value
+
+    def _compute_coords(self, form, angle_units):
+        """
+        compute the standard coordinates in the desired form
+
+        Args:
+            form (str): either 'polar' or 'cartesian'
+            angle_units (str): if polar, 'degrees' or 'radians'
+
+        Returns:
+            the (n, 3) array
+        """
         if form == "cartesian":
-            return self.center_coords()
-        elif form == "polar":
-            self.center_coords()
-            self.coords_dict = _cart2polar(self.coords_dict)
-            self.coords_form = "polar"
-            self.angle_units = "radians"
-            return self.coords_dict
+            if self.coords_form == "cartesian":
+                return _centercoords_array(self.coords)
+            return _centercoords_array(_polar2cart_array(self.coords, self.angle_units))
+        if angle_units == "radians":
+            return _cart2polar_array(self.standard_coords_array("cartesian"))
+        coords = np.array(self.standard_coords_array("polar", "radians"))
+        coords[:, :2] = np.degrees(coords[:, :2])
+        return coords
+
+
+class CapsulePairs:
+    """
+    Table of the pairs of capsules of a microphone
+    array, for time difference of arrival (TDOA)
+    and direction of arrival work. All the arrays
+    are read-only.
+
+    Args:
+        coords (np.array): (n, 3) cartesian coordinates
+            of the capsules (meters)
+        capsule_names (list): the names of the capsules
+        c (float): the speed of sound (meters per second)
+
+    Attributes:
+        capsule_names (list): the names of the capsules
+        c (float): the speed of sound (meters per second)
+        distances (np.array): (n, n) matrix of the distances
+            between capsules (meters)
+        pairs (np.array): (p, 2) indexes of the capsules of each
+            pair, i < j, with p = n * (n - 1) / 2
+        pair_names (list): tuples with the capsule names of each pair
+        pair_distances (np.array): (p,) distance between the
+            capsules of each pair (meters)
+        max_tdoa (np.array): (p,) maximum time difference of
+            arrival of each pair (seconds)
+        pair_aliasing_frequencies (np.array): (p,) frequency above
+            which the capsules of each pair are more than half a
+            wavelength apart (inf for coincident capsules)
+        aperture (float): the largest distance between two
+            capsules (meters)
+        aliasing_frequency (float): the spatial aliasing frequency
+            of the array, computed from the largest distance between
+            a capsule and its nearest (non coincident) neighbour
+    """
+
+    def __init__(self, coords, capsule_names, c=SPEED_OF_SOUND):
+        self.capsule_names = list(capsule_names)
+        self.c = c
+        self.distances = _read_only(_distance_matrix_array(coords))
+        self.pairs = _read_only(
+            np.stack(np.triu_indices(len(self.capsule_names), 1), -1)
+        )
+        self.pair_names = [
+            (self.capsule_names[i], self.capsule_names[j]) for i, j in self.pairs
+        ]
+        self.pair_distances = _read_only(
+            self.distances[self.pairs[:, 0], self.pairs[:, 1]]
+        )
+        self.max_tdoa = _read_only(self.pair_distances / c)
+        with np.errstate(divide="ignore"):
+            self.pair_aliasing_frequencies = _read_only(c / (2 * self.pair_distances))
+        self.aperture = float(np.max(self.distances, initial=0))
+        # distances to the nearest non coincident neighbour
+        neighbours = np.where(self.distances > 0, self.distances, np.inf)
+        spacing = np.min(neighbours, axis=1, initial=np.inf)
+        spacing = spacing[np.isfinite(spacing)]
+        self.aliasing_frequency = (
+            c / (2 * float(np.max(spacing))) if len(spacing) > 0 else np.inf
+        )
+        self._max_lags = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def max_lag(self, fs):
+        """
+        get the maximum lag of each pair in samples,
+        e.g. to size the lag windows of cross-correlations
+
+        Args:
+            fs (int): the sampling rate
+
+        Returns:
+            (p,) read-only array with the maximum lag of
+            each pair (samples, rounded up)
+        """
+        with self._lock:
+            max_lag = self._max_lags.get(fs)
+            if max_lag is None:
+                max_lag = _read_only(np.ceil(self.max_tdoa * fs - 1e-9).astype(int))
+                self._max_lags[fs] = max_lag
+            return max_lag
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
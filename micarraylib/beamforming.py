@@ -0,0 +1,259 @@
+import numpy as np
+from micarraylib.arraycoords.core import SPEED_OF_SOUND
+from micarraylib.steering import steering_vectors, direction_grid, _array_coords
+from micarraylib.features import _stft_frames
+
+BEAMFORMING_METHODS = ["das", "mvdr"]
+
+
+class Beamformer:
+    """
+    Frequency-domain beamformer of A-format audio. The audio
+    is analysed with a short-time Fourier transform (STFT)
+    with a square root Hann window, the weights of all the
+    frequencies and look directions are applied with one
+    batched matrix product per block of frames, and the
+    output is synthesized with weighted overlap-add. Blocks
+    of frames are processed one at a time, so long recordings
+    (or memory-mapped ones) are beamformed without holding
+    their whole STFT in memory.
+
+    Args:
+        array (micarray, str or np.array): the array, the name
+            of a registered array or the (capsules, 3) cartesian
+            coordinates of its capsules (meters, centered)
+        directions (tuple or np.array): the look directions, as a
+            (kind, n) grid spec (see steering.direction_grid) or a
+            (directions, 2) array with colatitude and azimuth (radians)
+        fs (int): the sampling rate of the audio
+        n_fft (int): the size of the FFT
+        hop (int): the hop between frames (n_fft // 2 by default).
+            It must divide n_fft // 2.
+        method (str): 'das' for delay-and-sum, 'mvdr' for minimum
+            variance distortionless response
+        diagonal_loading (float): the regularization added to the
+            diagonal of the spatial covariance (relative to its
+            mean power) before inverting it in mvdr
+        steering_cache (micarraylib.steering.SteeringCache): cache
+            of the steering vectors (None to compute them)
+        c (float): the speed of sound (meters per second). It must
+            be the speed of sound of steering_cache, if one is given
+
+    Attributes:
+        directions (np.array): (directions, 2) look directions
+        fs (int): the sampling rate of the audio
+        n_fft (int): the size of the FFT
+        hop (int): the hop between frames
+        method (str): the beamforming method
+        diagonal_loading (float): the regularization of mvdr
+        steering (np.array): (directions, capsules, n_fft // 2 + 1)
+            steering vectors of the look directions
+        window (np.array): the analysis and synthesis window
+    """
+
+    def __init__(
+        self,
+        array,
+        directions,
+        fs,
+        n_fft=512,
+        hop=None,
+        method="das",
+        diagonal_loading=1e-2,
+        steering_cache=None,
+        c=SPEED_OF_SOUND,
+    ):
+        if method not in BEAMFORMING_METHODS:
+            raise ValueError(
+                "method is {}, but it should be one of {}".format(
+                    method, ", ".join(BEAMFORMING_METHODS)
+                )
+            )
+        if hop == None:
+            hop = n_fft // 2
+        if n_fft % 2 != 0 or hop < 1 or (n_fft // 2) % hop != 0:
+            raise ValueError(
+                "n_fft is {} and hop is {}, but n_fft must be even and hop must divide n_fft // 2".format(
+                    n_fft, hop
+                )
+            )
+        self.fs = fs
+        self.n_fft = n_fft
+        self.hop = hop
+        self.method = method
+        self.diagonal_loading = diagonal_loading
+        if steering_cache != None and steering_cache.c != c:
+            raise ValueError(
+                "c is {}, but the speed of sound of steering_cache is {}".format(
+                    c, steering_cache.c
+                )
+            )
+        if steering_cache != None:
+            self.directions = steering_cache.directions(directions)
+            self.steering = steering_cache.steering_vectors(
+                array, directions, fs, n_fft
+            )
+        else:
+            if isinstance(directions, tuple):
+                directions = direction_grid(*directions)
+            self.directions = np.asarray(directions, dtype=float).reshape(-1, 2)
+            self.steering = steering_vectors(
+                _array_coords(array), self.directions, fs, n_fft, c
+            )
+        # the periodic square root Hann window, so that the
+        # analysis and synthesis windows add up to a constant
+        self.window = np.sqrt(
+            0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)
+        ).astype(np.float32)
+        self._ola_gain = float(np.sum(self.window**2) / hop)
+        self._das_weights = None
+
+    def weights(self, cov=None):
+        """
+        computes the beamforming weights of all the
+        frequencies and look directions
+
+        Args:
+            cov (np.array): (n_fft // 2 + 1, capsules, capsules)
+                spatial covariance of the noise and interference
+                (required by mvdr, see covariance)
+
+        Returns:
+            (n_fft // 2 + 1, capsules, directions) complex array
+            with the weights w, so that the output is w^H x
+        """
+        A = np.transpose(self.steering, (2, 1, 0))
+        if self.method == "das":
+            if self._das_weights is None:
+                self._das_weights = A / A.shape[1]
+            return self._das_weights
+        if cov is None:
+            raise ValueError("mvdr needs the spatial covariance (cov)")
+        cov = np.asarray(cov)
+        if cov.shape != (A.shape[0], A.shape[1], A.shape[1]):
+            raise ValueError(
+                "cov has shape {}, but it should have shape {}".format(
+                    cov.shape, (A.shape[0], A.shape[1], A.shape[1])
+                )
+            )
+        power = np.real(np.trace(cov, axis1=1, axis2=2)) / A.shape[1]
+        loading = self.diagonal_loading * np.maximum(power, np.finfo(float).tiny)
+        cov = cov + loading[:, np.newaxis, np.newaxis] * np.eye(A.shape[1])
+        # R^-1 a / (a^H R^-1 a) for every frequency and direction
+        Z = np.linalg.solve(cov, A.astype(np.complex128))
+        gain = np.sum(np.conj(A) * Z, axis=1, keepdims=True)
+        return (Z / gain).astype(np.complex64)
+
+    def covariance(self, audio, block_frames=256):
+        """
+        estimates the spatial covariance matrix of each
+        frequency, averaged over all the frames of the audio
+
+        Args:
+            audio (np.array or micarraylib.utils.MappedAudio):
+                (capsules, samples) A-format audio
+            block_frames (int): number of frames per block
+
+        Returns:
+            (n_fft // 2 + 1, capsules, capsules) complex array
+        """
+        audio = self._check_audio(audio)
+        cov = np.zeros(
+            (self.steering.shape[2], audio.shape[0], audio.shape[0]),
+            dtype=np.complex128,
+        )
+        frames = 0
+        for _, X in self._stft_blocks(audio, block_frames):
+            Xf = np.ascontiguousarray(np.transpose(X, (2, 0, 1)))
+            cov += Xf @ np.conj(np.transpose(Xf, (0, 2, 1)))
+            frames += X.shape[1]
+        return cov / max(frames, 1)
+
+    def beamform(self, audio, cov=None, block_frames=256):
+        """
+        beamforms the audio towards every look direction
+
+        Args:
+            audio (np.array or micarraylib.utils.MappedAudio):
+                (capsules, samples) A-format audio, with capsules
+                ordered like the array's coordinates
+            cov (np.array): spatial covariance for mvdr (estimated
+                from the audio if None, in a first pass)
+            block_frames (int): number of STFT frames per block
+
+        Returns:
+            (directions, samples) float32 array with the output
+            of each look direction
+        """
+        audio = self._check_audio(audio)
+        if self.method == "mvdr" and cov is None:
+            cov = self.covariance(audio, block_frames)
+        W = np.ascontiguousarray(np.conj(self.weights(cov)), dtype=np.complex64)
+        from scipy import fft
+
+        n_samples = audio.shape[1]
+        pad = self.n_fft - self.hop
+        ratio = self.n_fft // self.hop
+        out = np.zeros((W.shape[2], n_samples + pad + self.n_fft), dtype=np.float32)
+        for first, X in self._stft_blocks(audio, block_frames):
+            n_frames = X.shape[1]
+            # (frequencies, frames, capsules) @ (frequencies, capsules, directions)
+            Y = np.ascontiguousarray(np.transpose(X, (2, 1, 0))) @ W
+            y = fft.irfft(np.transpose(Y, (2, 1, 0)), self.n_fft, axis=-1)
+            y *= self.window
+            # overlap-add: each frame is split in chunks of hop samples
+            start = first * self.hop
+            for r in range(ratio):
+                chunk = y[:, :, r * self.hop : (r + 1) * self.hop]
+                out[
+                    :, start + r * self.hop : start + (r + n_frames) * self.hop
+                ] += chunk.reshape(len(chunk), -1)
+        out /= self._ola_gain
+        return out[:, pad : pad + n_samples]
+
+    def _check_audio(self, audio):
+        """
+        checks that the audio has one channel per capsule
+
+        Args:
+            audio (np.array or micarraylib.utils.MappedAudio):
+                (capsules, samples) audio
+
+        Returns:
+            the audio
+        """
+        if len(audio.shape) != 2 or audio.shape[0] != self.steering.shape[1]:
+            raise ValueError(
+                "audio has shape {}, but it should have shape ({}, samples)".format(
+                    audio.shape, self.steering.shape[1]
+                )
+            )
+        return audio
+
+    def _stft_blocks(self, audio, block_frames):
+        """
+        computes the STFT of the audio in blocks of frames.
+        The audio is padded with n_fft - hop zeros at the start
+        (and with zeros at the end), so that every sample is
+        covered by n_fft // hop frames.
+
+        Args:
+            audio (np.array or MappedAudio): (capsules, samples) audio
+            block_frames (int): number of frames per block
+
+        Yields:
+            tuples with the index of the first frame of the block
+            and the (capsules, frames, n_fft // 2 + 1) complex64 STFT
+        """
+        pad = self.n_fft - self.hop
+        n_frames = -(-(audio.shape[1] + pad) // self.hop)
+        for first in range(0, n_frames, block_frames):
+            yield first, _stft_frames(
+                audio,
+                first,
+                min(block_frames, n_frames - first),
+                self.n_fft,
+                self.hop,
+                pad,
+                self.window,
+            )
@@ -0,0 +1,354 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import numpy as np
+from collections import OrderedDict
+
+
+class DiskCache:
+    """
+    Content-addressed cache of numpy arrays stored
+    as .npy files in a directory, with a size budget.
+    When the budget is exceeded the least recently
+    used arrays are removed. Arrays are written to a
+    temporary file that is atomically renamed, so many
+    processes can share the same cache directory.
+
+    Args:
+        path (str): the directory where the arrays
+            are stored
+        max_bytes (int): the size budget of the cache in
+            bytes (None for no budget)
+
+    Attributes:
+        path (str): the directory where the arrays
+            are stored
+        max_bytes (int): the size budget of the cache in bytes
+    """
+
+    def __init__(self, path, max_bytes=None):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def key(self, **fields):
+        """
+        compute the key of an array from the fields
+        that determine its content
+
+        Args:
+            fields: JSON serializable values
+
+        Returns:
+            the key (a sha256 hex digest)
+        """
+        return cache_key(**fields)
+
+    def get(self, key, mmap=False):
+        """
+        get an array from the cache
+
+        Args:
+            key (str): the key of the array
+            mmap (bool): whether to memory-map the array
+                (read-only) instead of reading it, so that
+                processes share one copy of it
+
+        Returns:
+            the array (None if it is not in the cache)
+        """
+        path = self._path(key)
+        try:
+            array = np.load(path, mmap_mode="r" if mmap else None)
+            os.utime(path)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        return array
+
+    def put(self, key, array):
+        """
+        store an array in the cache, evicting the least
+        recently used arrays if the budget is exceeded
+
+        Args:
+            key (str): the key of the array
+            array (np.array): the array
+        """
+        _atomic_write(self._path(key), lambda f: np.save(f, np.asarray(array)))
+        if self.max_bytes != None:
+            self._evict()
+
+    def clear(self):
+        """
+        remove all the arrays in the cache
+        """
+        for path, _, _ in self._entries():
+            _remove(path)
+
+    def size(self):
+        """
+        get the number of bytes used by the cache
+
+        Returns:
+            the size of the cache in bytes
+        """
+        return sum([size for _, _, size in self._entries()])
+
+    def _path(self, key):
+        return os.path.join(self.path, key[:2], "".join([key, ".npy"]))
+
+    def _entries(self):
+        """
+        list the arrays in the cache
+
+        Returns:
+            list of tuples with the path, the last time
+            of use and the size of each array
+        """
+        entries = []
+        if not os.path.isdir(self.path):
+            return entries
+        for subdir in os.scandir(self.path):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if not entry.name.endswith(".npy"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict(self):
+        """
+        remove the least recently used arrays until
+        the cache fits in its budget
+        """
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum([size for _, _, size in entries])
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+
+class MemoryCache:
+    """
+    Thread-safe in-memory LRU cache of numpy arrays,
+    bounded by the number of bytes of the arrays. The
+    cached arrays are read-only, so they can be shared
+    without copying them.
+
+    Args:
+        max_bytes (int): the size budget of the cache in bytes
+
+    Attributes:
+        max_bytes (int): the size budget of the cache in bytes
+        nbytes (int): the number of bytes of the cached arrays
+        hits (int): number of get calls that found the array
+        misses (int): number of get calls that did not
+        evictions (int): number of arrays removed to
+            keep the cache within its budget
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._arrays = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def __getstate__(self):
+        # copies (e.g. in worker processes) start empty
+        state = self.__dict__.copy()
+        state["_arrays"] = OrderedDict()
+        state["nbytes"] = 0
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        get an array from the cache
+
+        Args:
+            key (str): the key of the array
+
+        Returns:
+            the read-only array (None if it is not in the cache)
+        """
+        with self._lock:
+            array = self._arrays.get(key)
+            if array is None:
+                self.misses += 1
+                return None
+            self._arrays.move_to_end(key)
+            self.hits += 1
+            return array
+
+    def put(self, key, array):
+        """
+        store an array in the cache (and make it read-only),
+        evicting the least recently used arrays if the
+        budget is exceeded. Arrays larger than the budget
+        are not cached.
+
+        Args:
+            key (str): the key of the array
+            array (np.array): the array
+        """
+        if array.nbytes > self.max_bytes:
+            return
+        array.flags.writeable = False
+        with self._lock:
+            previous = self._arrays.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+            self._arrays[key] = array
+            self.nbytes += array.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._arrays.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        """
+        remove all the arrays in the cache
+        """
+        with self._lock:
+            self._arrays.clear()
+            self.nbytes = 0
+
+
+def cache_key(**fields):
+    """
+    compute the key of a cached array from
+    the fields that determine its content
+
+    Args:
+        fields: JSON serializable values
+
+    Returns:
+        the key (a sha256 hex digest)
+    """
+    content = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def cache_home():
+    """
+    get the directory where micarraylib keeps its
+    cached indexes ($XDG_CACHE_HOME/micarraylib)
+
+    Returns:
+        the path to the directory
+    """
+    xdg_cache_home = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(xdg_cache_home, "micarraylib")
+
+
+def file_checksum(path):
+    """
+    compute the md5 checksum of a file
+
+    Args:
+        path (str): the path to the file
+
+    Returns:
+        the checksum (a hex digest)
+    """
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def read_sidecar(path, checksum):
+    """
+    read the content of a JSON sidecar file
+
+    Args:
+        path (str): the path to the sidecar file
+        checksum (str): the checksum of the data that the
+            content was computed from
+
+    Returns:
+        the content (None if the file does not exist or
+        it was computed from different data)
+    """
+    try:
+        with open(path) as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(sidecar, dict) or sidecar.get("checksum") != checksum:
+        return None
+    return sidecar.get("content")
+
+
+def write_sidecar(path, checksum, content):
+    """
+    atomically write a JSON sidecar file (failures,
+    e.g. in read-only file systems, are ignored)
+
+    Args:
+        path (str): the path to the sidecar file
+        checksum (str): the checksum of the data that the
+            content was computed from
+        content: the JSON serializable content
+    """
+    data = json.dumps({"checksum": checksum, "content": content}).encode("utf-8")
+    try:
+        _atomic_write(path, lambda f: f.write(data))
+    except OSError:
+        pass
+
+
+def _atomic_write(path, write):
+    """
+    write a file through a temporary file that is
+    renamed, so readers never see a partial file
+
+    Args:
+        path (str): the path to the file
+        write (function): function that writes the
+            content to a binary file object
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _remove(path):
+    """
+    remove a file that other processes
+    may have removed already
+
+    Args:
+        path (str): the path to the file
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
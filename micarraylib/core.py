@@ -1,7 +1,34 @@
-import soundata
+import os
+import inspect
+import threading
 import numpy as np
-import matplotlib.pyplot as plt
-from micarraylib.arraycoords.array_shapes_utils import _polar2cart
+from micarraylib import __version__
+from micarraylib.cache import (
+    DiskCache,
+    MemoryCache,
+    cache_key,
+    cache_home,
+    file_checksum,
+    read_sidecar,
+    write_sidecar,
+)
+from micarraylib.arraycoords.array_shapes_utils import _polar2cart, _polar2cart_array
+from micarraylib.arraycoords.core import CapsulePairs
+from micarraylib.steering import SteeringCache
+from micarraylib.utils import (
+    ClipIndex,
+    _get_audio_numpy,
+    _check_out,
+    _iter_audio_blocks,
+    _get_a2b_encoder,
+    _check_formats,
+    _check_order,
+    _conversion_order,
+    _clips_layout,
+    resample,
+    RESAMPLE_FILTERS,
+    CONVERSION_ORDERS,
+)
 
 
 class Aggregate:
@@ -13,13 +40,18 @@ class Aggregate:
             micarray.Dataset objects to aggregate
         fs (float): the sampling rate to use across
             datasets in the aggregate
+        resample_quality (str): the quality of the resampling
+            to fs to use across datasets (None keeps each
+            dataset's resample_quality)
     """
 
-    def __init__(self, micarray_dataset_list, fs):
+    def __init__(self, micarray_dataset_list, fs, resample_quality=None):
         self.fs = fs
         self.datasets = {dataset.name: dataset for dataset in micarray_dataset_list}
         for dataset in self.datasets.values():
             dataset.fs = fs
+            if resample_quality != None:
+                dataset.resample_quality = resample_quality
 
 
 class Dataset:
@@ -43,11 +75,39 @@ class Dataset:
         data_home (str): path to directory where the
             data is (directories must follow
             the soundata index struct)
+        workers (int): number of threads used to decode
+            the clips of a recording concurrently (None
+            or 1 decodes them one after another)
+        resample_quality (str): the quality of the resampling
+            to fs ("kaiser_best", "fast", "medium" or "high",
+            see micarraylib.utils.resample)
+        conversion_order (str): whether audio converted to
+            B format is resampled before ("resample_first") or
+            after ("encode_first") the conversion (None picks
+            the cheaper order)
+        disk_cache (bool): whether the audio returned by
+            get_audio_numpy is cached on disk, in a
+            micarraylib_cache directory inside data_home
+        disk_cache_size (int): the size budget of the
+            disk cache in bytes (None for no budget)
+        memory_cache_size (int): the size budget in bytes of
+            an in-memory LRU cache of the audio returned by
+            get_audio_numpy (None disables it)
+        lazy (bool): if True, the soundata dataset and the
+            clip_id indexes are built the first time they
+            are used instead of when the dataset is created
+        cache_dir (str): the directory where the sorted
+            clip_id indexes are cached between runs (None
+            for micarraylib.cache.cache_home(), False to
+            not cache them)
 
     Attributes:
         name (str): the dataset name (must be one of
             soundata dataset names)
         dataset (soundata.Dataset)
+        clip_index (micarraylib.utils.ClipIndex): lazily built
+            index of the dataset's soundata Clip objects,
+            shared by every audio and annotation request
         fs (int): the dataset's global sampling rate
             (indicated in the soundata loader)
         array_format (dict): a dictionary specifying
@@ -63,8 +123,42 @@ class Dataset:
         data_home (str): path to directory where the
             data is (directories inside data_home must
             follow the soundata index struct)
+        workers (int): number of threads used to decode
+            the clips of a recording concurrently
+        a2b_encoders (dict): cache of the A2BEncoder objects
+            used to convert the arrays' audio to B format
+        capsule_pairs (dict): cache of the CapsulePairs
+            tables of the arrays (see get_capsule_pairs)
+        steering_cache (micarraylib.steering.SteeringCache): cache
+            of the steering vectors and time differences of arrival
+            of the arrays' capsules
+        resample_quality (str): the quality of the resampling
+            to fs
+        conversion_order (str): whether audio converted to
+            B format is resampled before or after the conversion
+        conversion_stats (dict): the number of A to B conversions
+            with resampling done in each order ("resample_first"
+            and "encode_first"), e.g. for profiling
+        disk_cache (micarraylib.cache.DiskCache): the disk
+            cache of the audio (None if it is disabled)
+        memory_cache (micarraylib.cache.MemoryCache): the
+            in-memory cache of the audio (None if it is disabled)
+        lazy (bool): whether the soundata dataset and the
+            clip_id indexes are built when they are first used
+        cache_dir (str): the directory where the clip_id indexes
+            are cached (None for cache_home(), False if they are not)
+        clips_set (frozenset): the clip_ids (or sound
+            sources) in the dataset
+        clip_lookup (dict): the soundata clip_ids with the
+            audio of each clip_id, by micarray and format
+            (see lookup)
+        event_lookup (dict): the soundata clip_id with the
+            annotated events of each clip_id
     """
 
+    # names of the clip_id indexes that each dataset builds with _sort_clip_ids
+    _clip_ids_attributes = ()
+
     def __init__(
         self,
         name,
@@ -76,16 +170,51 @@ class Dataset:
         partial_download=None,
         force_overwrite=False,
         cleanup=False,
+        workers=None,
+        resample_quality="kaiser_best",
+        conversion_order=None,
+        disk_cache=False,
+        disk_cache_size=None,
+        memory_cache_size=None,
+        lazy=False,
+        cache_dir=None,
     ):
 
         if download == False and data_home == None:
             raise ValueError(
                 "You must specify the directory with the data in data_home if you do not want to download it."
             )
+        if (
+            resample_quality != "kaiser_best"
+            and resample_quality not in RESAMPLE_FILTERS
+        ):
+            raise ValueError(
+                "resample_quality is {}, but it should be one of kaiser_best, {}".format(
+                    resample_quality, ", ".join(RESAMPLE_FILTERS)
+                )
+            )
+        if conversion_order != None and conversion_order not in CONVERSION_ORDERS:
+            raise ValueError(
+                "conversion_order is {}, but it should be one of {}".format(
+                    conversion_order, ", ".join(CONVERSION_ORDERS)
+                )
+            )
         self.name = name
-        self.dataset = _initialize(
-            name, data_home, download, partial_download, force_overwrite, cleanup
+        self._initialize_args = (
+            name,
+            data_home,
+            download,
+            partial_download,
+            force_overwrite,
+            cleanup,
         )
+        self._lock = threading.RLock()
+        self._dataset = None
+        self._clip_index = None
+        self.lazy = lazy
+        self.cache_dir = cache_dir
+        if not lazy:
+            self._dataset = _initialize(*self._initialize_args)
         self.fs = fs
         self.array_names = list(capsule_coords.keys())
         self.array_format = array_format
@@ -94,6 +223,159 @@ class Dataset:
         }
         self.capsule_coords = capsule_coords
         self.data_home = data_home
+        self.workers = workers
+        self.a2b_encoders = {}
+        self.capsule_pairs = {}
+        self.steering_cache = SteeringCache()
+        self.resample_quality = resample_quality
+        self.conversion_order = conversion_order
+        self.conversion_stats = {order: 0 for order in CONVERSION_ORDERS}
+        self.disk_cache = None
+        if disk_cache:
+            self.disk_cache = DiskCache(
+                os.path.join(self._data_home(), "micarraylib_cache"),
+                disk_cache_size,
+            )
+        self.memory_cache = None
+        if memory_cache_size != None:
+            self.memory_cache = MemoryCache(memory_cache_size)
+        if not lazy:
+            self._build_clip_ids()
+
+    @property
+    def dataset(self):
+        """
+        the soundata.Dataset (initialized the first
+        time it is used if the dataset is lazy)
+        """
+        if self._dataset is None:
+            with self._lock:
+                if self._dataset is None:
+                    self._dataset = _initialize(*self._initialize_args)
+        return self._dataset
+
+    @property
+    def clip_index(self):
+        """
+        the micarraylib.utils.ClipIndex of the dataset
+        """
+        if self._clip_index is None:
+            with self._lock:
+                if self._clip_index is None:
+                    self._clip_index = ClipIndex(self.dataset)
+        return self._clip_index
+
+    def __getstate__(self):
+        # the soundata dataset, the clip index and the lock are not
+        # pickled: a copy of the dataset (e.g. in a worker process)
+        # initializes them again from the data that is already there
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_dataset"] = None
+        state["_clip_index"] = None
+        name, _, _, partial_download, _, cleanup = self._initialize_args
+        state["_initialize_args"] = (
+            name,
+            self._data_home(),
+            False,
+            partial_download,
+            False,
+            cleanup,
+        )
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _data_home(self):
+        """
+        the directory with the data, resolved without
+        initializing the soundata dataset (which lazy
+        datasets only do when it is first used)
+        """
+        name, data_home = self._initialize_args[:2]
+        if data_home != None:
+            return data_home
+        if self._dataset is not None:
+            return self._dataset.data_home
+        return _default_data_home(name)
+
+    def __getattr__(self, name):
+        # the clip_id indexes of lazy datasets are
+        # built the first time one of them is used
+        if name in type(self)._clip_ids_attributes or name == "clips_set":
+            self._build_clip_ids()
+        elif name in ["clip_lookup", "event_lookup"]:
+            self._build_lookup()
+        if name in self.__dict__:
+            return self.__dict__[name]
+        raise AttributeError(
+            "'{}' object has no attribute '{}'".format(type(self).__name__, name)
+        )
+
+    def _build_clip_ids(self):
+        """
+        build the clip_id indexes of the dataset
+        (see _sort_clip_ids), if they are not built yet.
+        They are stored in a sidecar file in cache_dir,
+        keyed by the checksum of the soundata index (and
+        the code that sorts it), so later runs load them
+        instead of sorting the clip_ids again
+        """
+        if len(self._clip_ids_attributes) == 0:
+            return
+        with self._lock:
+            if self._clip_ids_attributes[0] in self.__dict__:
+                return
+            cache_dir = cache_home() if self.cache_dir == None else self.cache_dir
+            checksum = None
+            if cache_dir != False:
+                path = os.path.join(cache_dir, "".join([self.name, "_clip_ids.json"]))
+                try:
+                    checksum = cache_key(
+                        index=file_checksum(self.dataset.index_path),
+                        sort_clip_ids=inspect.getsource(type(self)._sort_clip_ids),
+                        version=__version__,
+                    )
+                except (OSError, TypeError):
+                    pass
+            clip_ids = None if checksum is None else read_sidecar(path, checksum)
+            if clip_ids is None:
+                clip_ids = self._sort_clip_ids()
+                if checksum is not None:
+                    write_sidecar(path, checksum, clip_ids)
+            for name, value in zip(self._clip_ids_attributes, clip_ids):
+                setattr(self, name, value)
+            self.clips_set = frozenset(self.clips_list)
+
+    def _build_lookup(self):
+        """
+        build the clip_lookup and event_lookup
+        indexes, if they are not built yet
+        """
+        with self._lock:
+            if "clip_lookup" in self.__dict__:
+                return
+            clip_lookup = {}
+            event_lookup = {}
+            for clip_id in self.clips_list:
+                clip_lookup[clip_id] = {}
+                for micarray in self.array_names:
+                    clip_lookup[clip_id][micarray] = {}
+                    for fmt in ["A", "B"]:
+                        try:
+                            clip_names, fmt_in = self._get_clip_names(
+                                clip_id, micarray, fmt
+                            )
+                        except ValueError:
+                            continue
+                        clip_lookup[clip_id][micarray][fmt_in] = clip_names
+                event_clip_id = self._get_event_clip_id(clip_id)
+                if event_clip_id != None:
+                    event_lookup[clip_id] = event_clip_id
+            self.event_lookup = event_lookup
+            self.clip_lookup = clip_lookup
 
     def get_capsule_coords_numpy(self, micarray):
         """
@@ -121,6 +403,628 @@ class Dataset:
         capsule_names = [c for c in self.capsule_coords[micarray].keys()]
         return capsule_coords, capsule_names
 
+    def get_capsule_pairs(self, micarray):
+        """
+        returns the table of capsule pairs of a
+        microphone array (pairwise distances, maximum
+        lags per sampling rate, aperture and spatial
+        aliasing frequency), computed once per array
+
+        Args:
+            micarray (str): the name of the
+                microphone array
+
+        Returns:
+            a micarraylib.arraycoords.CapsulePairs
+        """
+
+        capsule_pairs = self.capsule_pairs.get(micarray)
+        if capsule_pairs is None:
+            capsule_coords, capsule_names = self.get_capsule_coords_numpy(micarray)
+            capsule_pairs = self.capsule_pairs.setdefault(
+                micarray,
+                CapsulePairs(
+                    _polar2cart_array(capsule_coords, "radians"), capsule_names
+                ),
+            )
+        return capsule_pairs
+
+    def _get_clip_names(self, clip_id, micarray, fmt):
+        """
+        get the soundata clip_ids with the audio of a
+        clip_id recorded by a micarray, in the format
+        closest to fmt (implemented by each dataset)
+
+        Args:
+            clip_id (str): the clip_id of the recorded audio
+            micarray (str): the name of the micarray
+            fmt (str): the desired format of the audio
+                (A or B in the ambisonics sense)
+
+        Returns:
+            tuple with
+                1) list with the soundata clip_ids
+                2) the format (A or B) of their audio
+        """
+        raise NotImplementedError
+
+    def _get_audio_numpy(
+        self,
+        clip_id,
+        micarray,
+        fmt,
+        N=None,
+        fs=None,
+        out=None,
+        mmap=False,
+        start=None,
+        stop=None,
+    ):
+        """
+        get the audio recorded by a microphone array (the
+        implementation of each dataset's get_audio_numpy),
+        going through the memory and disk caches if
+        they are enabled
+
+        Args:
+            clip_id (str): the clip_id (or sound source)
+                of the recorded audio
+            micarray (str): the name of the micarray
+            fmt (str): the desired format of the audio
+                (A or B in the ambisonics sense)
+            N (int): the order of B format
+            fs (int): the sampling rate we want the audio in
+                (the dataset's fs by default)
+            out (np.array): optional array where the audio
+                is written
+            mmap (bool): whether to return a memory-mapped
+                view of the audio files
+            start (float): time in seconds where the audio
+                starts (None for the beginning)
+            stop (float): time in seconds where the audio
+                ends (None for the end)
+
+        Returns:
+            a numpy array with the audio (read-only if the
+            memory cache is enabled)
+        """
+
+        if fs == None and not mmap:
+            fs = self.fs
+        clip_names, fmt_in = self._get_clip_names(clip_id, micarray, fmt)
+        key = None
+        caches = [c for c in [self.memory_cache, self.disk_cache] if c is not None]
+        if len(caches) > 0 and not mmap:
+            key = cache_key(
+                dataset=self.name,
+                clip_id=clip_id,
+                micarray=micarray,
+                fmt=fmt,
+                N=N,
+                fs=fs,
+                start=start,
+                stop=stop,
+                resample_quality=self.resample_quality,
+                capsule_coords=[
+                    [c, [float(x) for x in v]]
+                    for c, v in self.capsule_coords[micarray].items()
+                ],
+                version=__version__,
+            )
+            audio = None
+            for cache in caches:
+                audio = cache.get(key)
+                if audio is not None:
+                    break
+            if audio is not None and cache is not caches[0]:
+                self.memory_cache.put(key, audio)
+            if audio is not None and out is not None:
+                _check_out(out, audio.shape)[...] = audio
+                return out
+            if audio is not None:
+                return audio
+        audio = _get_audio_numpy(
+            clip_names,
+            self.clip_index,
+            fmt_in,
+            fmt,
+            self.capsule_coords[micarray],
+            N,
+            fs,
+            workers=self.workers,
+            out=out,
+            mmap=mmap,
+            start=start,
+            stop=stop,
+            encoders=self.a2b_encoders,
+            quality=self.resample_quality,
+            order=self.conversion_order,
+            stats=self.conversion_stats,
+        )
+        if key is not None and self.disk_cache is not None:
+            self.disk_cache.put(key, audio)
+        if key is not None and self.memory_cache is not None:
+            self.memory_cache.put(key, audio.copy() if out is not None else audio)
+        return audio
+
+    def clear_cache(self):
+        """
+        remove the cached audio of the dataset
+        """
+
+        if self.memory_cache is not None:
+            self.memory_cache.clear()
+        if self.disk_cache is not None:
+            self.disk_cache.clear()
+
+    def _get_event_clip_id(self, clip_id):
+        """
+        get the soundata clip_id with the annotated events
+        of a clip_id (implemented by the datasets that
+        have them)
+
+        Args:
+            clip_id (str): the clip_id of the recorded audio
+
+        Returns:
+            the soundata clip_id (None if there are no events)
+        """
+        return None
+
+    def has_clip(self, clip_id):
+        """
+        check whether a clip_id (or sound source) is
+        in the dataset, in constant time
+
+        Args:
+            clip_id (str): the clip_id
+
+        Returns:
+            True if the clip_id is in the dataset
+        """
+
+        return clip_id in self.clips_set
+
+    def lookup(self, clip_id, micarray=None, fmt=None):
+        """
+        look up the soundata clip_ids with the audio of a
+        clip_id (or sound source) in the dataset's index
+
+        Args:
+            clip_id (str): the clip_id
+            micarray (str): the name of a micarray (None
+                for all the micarrays)
+            fmt (str): the format (A or B) of the audio files
+                (None for all the formats)
+
+        Returns:
+            the soundata clip_ids. A dictionary
+            {micarray: {fmt: list}} if micarray is None,
+            {fmt: list} if only fmt is None, or a list
+        """
+
+        if clip_id not in self.clips_set:
+            raise ValueError(
+                "clip_id {} is not in the {} dataset".format(clip_id, self.name)
+            )
+        entry = self.clip_lookup[clip_id]
+        if micarray == None:
+            return entry
+        if micarray not in entry:
+            raise ValueError(
+                "micarray is {}, but it should be one of {}".format(
+                    micarray, ", ".join(self.array_names)
+                )
+            )
+        if fmt == None:
+            return entry[micarray]
+        if fmt not in entry[micarray]:
+            raise ValueError(
+                "the audio of {} recorded by {} is not stored in {} format".format(
+                    clip_id, micarray, fmt
+                )
+            )
+        return entry[micarray][fmt]
+
+    def iter_audio_blocks(
+        self,
+        clip_id,
+        micarray,
+        fmt="A",
+        block_size=65536,
+        hop=None,
+        N=None,
+        fs=None,
+        quality=None,
+    ):
+        """
+        stream the audio recorded by a microphone array in
+        fixed-size blocks, in A or B format. Only a few blocks
+        of audio are held in memory at a time, however long
+        the recording is.
+
+        Args:
+            clip_id (str): the clip_id (or sound source)
+                of the recorded audio
+            micarray (str): the name of the micarray to
+                get audio for
+            fmt (str): the desired format that we
+                want the audio in ('A' or 'B' in the
+                ambisonics sense)
+            block_size (int): number of frames in each block
+            hop (int): number of frames between the starts of
+                consecutive blocks (block_size by default)
+            N (int): the order of B format
+            fs (int): the sampling rate we want the audio in
+                (the dataset's fs by default)
+            quality (str): the quality of the resampling to fs
+                ("fast", "medium" or "high", the dataset's
+                resample_quality by default). kaiser_best cannot
+                be streamed, so it is replaced by "high" with a
+                warning and the blocks differ slightly from the
+                audio returned by get_audio_numpy
+
+        Returns:
+            a generator of numpy arrays of shape
+            (channels, block_size). The last blocks are
+            padded with zeros
+        """
+        clip_names, fmt_in = self._get_clip_names(clip_id, micarray, fmt)
+        return _iter_audio_blocks(
+            clip_names,
+            self.clip_index,
+            fmt_in,
+            fmt,
+            self.capsule_coords[micarray],
+            N,
+            self.fs if fs == None else fs,
+            block_size,
+            hop,
+            encoders=self.a2b_encoders,
+            quality=self.resample_quality if quality == None else quality,
+            order=self.conversion_order,
+            stats=self.conversion_stats,
+        )
+
+    def get_audio_numpy_batch(
+        self, clip_ids, micarray, fmt="A", N=None, fs=None, start=None, stop=None
+    ):
+        """
+        get the audio recorded by a microphone array for
+        several clip_ids at once. A to B format conversion
+        is done for the whole batch with a single matmul.
+
+        Args:
+            clip_ids (list): the clip_ids (or sound sources)
+                of the recorded audio
+            micarray (str): the name of the micarray to
+                get audio for
+            fmt (str): the desired format that we
+                want the audio in ('A' or 'B' in the
+                ambisonics sense)
+            N (int): the order of B format
+            fs (int): the sampling rate we want the audio in
+                (the dataset's fs by default)
+            start (float): time in seconds where the audio
+                starts (None for the beginning)
+            stop (float): time in seconds where the audio
+                ends (None for the end)
+
+        Returns:
+            a numpy array of shape (batch, channels, frames),
+            or a list of arrays of shape (channels, frames) if
+            the recordings have different lengths
+        """
+
+        if len(clip_ids) == 0:
+            raise ValueError("clip_ids should have at least one clip_id")
+        clips = [self._get_clip_names(c, micarray, fmt) for c in clip_ids]
+        fmt_in = clips[0][1]
+        _check_formats(fmt_in, fmt, self.capsule_coords[micarray])
+        fs = self.fs if fs == None else fs
+        layouts = [
+            _clips_layout(
+                [self.clip_index[c] for c in clip_names],
+                self.clip_index.sr,
+                start,
+                stop,
+            )
+            for clip_names, _ in clips
+        ]
+        _check_order(N, fmt_in, fmt, layouts[0][0][-1])
+        encode_first = False
+        if fmt_in != fmt:
+            if N == None:
+                N = int(np.sqrt(len(clips[0][0])) - 1)
+            if any([layout[2] != fs for layout in layouts]):
+                order = _conversion_order(
+                    self.conversion_order,
+                    layouts[0][0][-1],
+                    (N + 1) ** 2,
+                    self.conversion_stats,
+                )
+                encode_first = order == "encode_first"
+        audio = [
+            _get_audio_numpy(
+                clip_names,
+                self.clip_index,
+                fmt_in,
+                fmt_in,
+                fs=None if encode_first else fs,
+                workers=self.workers,
+                start=start,
+                stop=stop,
+                quality=self.resample_quality,
+            )
+            for clip_names, _ in clips
+        ]
+        if all([a.shape == audio[0].shape for a in audio]):
+            audio = np.stack(audio)
+        if fmt_in != fmt:
+            encoder = _get_a2b_encoder(
+                self.a2b_encoders, N, self.capsule_coords[micarray]
+            )
+            audio = encoder.encode_batch(audio)
+        if encode_first:
+            audio = [
+                resample(a, layout[2], fs, self.resample_quality)
+                for a, layout in zip(audio, layouts)
+            ]
+            if all([a.shape == audio[0].shape for a in audio]):
+                audio = np.stack(audio)
+        return audio
+
+    def get_a2b_encoder(self, micarray, N=None):
+        """
+        returns the (cached) encoder that converts
+        the audio recorded by a micarray to B format
+
+        Args:
+            micarray (str): the name of the
+                microphone array
+            N (int): the order of B format (the highest
+                order the capsules allow by default)
+
+        Returns:
+            a micarraylib.utils.A2BEncoder
+        """
+
+        if micarray not in self.array_names:
+            raise ValueError(
+                "micarray is {}, but it should be one of {}".format(
+                    micarray, ", ".join(self.array_names)
+                )
+            )
+        if N == None:
+            N = int(np.sqrt(len(self.array_capsules[micarray])) - 1)
+        return _get_a2b_encoder(self.a2b_encoders, N, self.capsule_coords[micarray])
+
+    def get_beamformer(
+        self,
+        micarray,
+        directions,
+        fs=None,
+        n_fft=512,
+        hop=None,
+        method="das",
+        diagonal_loading=1e-2,
+    ):
+        """
+        returns a beamformer of the A-format audio of a
+        microphone array (see micarraylib.beamforming.Beamformer),
+        with the steering vectors of the array's capsules cached
+        in steering_cache
+
+        Args:
+            micarray (str): the name of the
+                microphone array
+            directions (tuple or np.array): the look directions, as a
+                (kind, n) grid spec or a (directions, 2) array with
+                colatitude and azimuth (radians)
+            fs (int): the sampling rate of the audio (the
+                dataset's sampling rate by default)
+            n_fft (int): the size of the FFT
+            hop (int): the hop between frames (n_fft // 2 by default)
+            method (str): 'das' (delay-and-sum) or 'mvdr'
+            diagonal_loading (float): the regularization of mvdr
+
+        Returns:
+            a micarraylib.beamforming.Beamformer
+        """
+
+        from micarraylib.beamforming import Beamformer
+
+        capsule_coords, _ = self.get_capsule_coords_numpy(micarray)
+        return Beamformer(
+            _polar2cart_array(capsule_coords, "radians"),
+            directions,
+            fs if fs != None else self.fs,
+            n_fft=n_fft,
+            hop=hop,
+            method=method,
+            diagonal_loading=diagonal_loading,
+            steering_cache=self.steering_cache,
+        )
+
+    def get_gcc_phat(
+        self,
+        clip_id,
+        micarray,
+        fs=None,
+        n_fft=None,
+        hop=None,
+        interp=1,
+        start=None,
+        stop=None,
+    ):
+        """
+        get frame-wise GCC-PHAT features of all the pairs of
+        capsules of a microphone array, from the STFT of the
+        A-format audio (computed once and shared by the pairs).
+        The lags are truncated to the largest time difference
+        of arrival that the capsule coordinates allow.
+
+        Args:
+            clip_id (str): the clip_id (or sound source)
+                of the recorded audio
+            micarray (str): the name of the micarray
+            fs (int): the sampling rate of the audio (the
+                dataset's sampling rate by default)
+            n_fft (int): the size of the FFT (by default, the
+                smallest power of two, and at least 1024, that
+                holds the lags of the array's capsule pairs)
+            hop (int): the hop between frames (n_fft // 2 by default)
+            interp (int): the upsampling factor of the lags
+            start (float): the start time in seconds (the
+                beginning of the audio by default)
+            stop (float): the stop time in seconds (the
+                end of the audio by default)
+
+        Returns:
+            (pairs, frames, 2 * max_lag + 1) float32 array, with the
+            pairs ordered like get_capsule_pairs(micarray).pairs and
+            the frames of micarraylib.features.stft
+        """
+
+        from micarraylib.features import stft, gcc_phat
+
+        if fs == None:
+            fs = self.fs
+        # n_fft is checked before the audio is decoded
+        n_fft, max_lag = self._gcc_fft_size(micarray, fs, interp, n_fft)
+        audio = self._get_audio_numpy(
+            clip_id, micarray, "A", fs=fs, start=start, stop=stop
+        )
+        pairs = self.get_capsule_pairs(micarray).pairs
+        return gcc_phat(stft(audio, n_fft, hop), pairs, max_lag, interp)
+
+    def get_seld_features(
+        self,
+        clip_id,
+        micarray,
+        fs=None,
+        n_fft=1024,
+        hop=None,
+        n_mels=64,
+        include_salsa=False,
+        start=None,
+        stop=None,
+    ):
+        """
+        get the features used in sound event localization and
+        detection (log-mel spectrograms, intensity vectors and,
+        optionally, SALSA-style features) of the first order
+        B-format audio of a microphone array, all computed from
+        one STFT (see micarraylib.features.seld_features)
+
+        Args:
+            clip_id (str): the clip_id (or sound source)
+                of the recorded audio
+            micarray (str): the name of the micarray
+            fs (int): the sampling rate of the audio (the
+                dataset's sampling rate by default)
+            n_fft (int): the size of the FFT
+            hop (int): the hop between frames (n_fft // 2 by default)
+            n_mels (int): the number of mel bands
+            include_salsa (bool): whether to compute SALSA-style features
+            start (float): the start time in seconds (the
+                beginning of the audio by default)
+            stop (float): the stop time in seconds (the
+                end of the audio by default)
+
+        Returns:
+            dictionary with the float32 arrays 'logmel', 'intensity'
+            and, optionally, 'salsa'
+        """
+
+        from micarraylib.features import seld_features
+
+        if fs == None:
+            fs = self.fs
+        # audio stored in B format is used as it is
+        _, fmt_in = self._get_clip_names(clip_id, micarray, "B")
+        N = 1 if fmt_in == "A" else None
+        audio = self._get_audio_numpy(
+            clip_id, micarray, "B", N=N, fs=fs, start=start, stop=stop
+        )
+        return seld_features(audio, fs, n_fft, hop, n_mels, include_salsa)
+
+    def get_srp_phat(
+        self, micarray, directions, fs=None, n_fft=None, hop=None, interp=1
+    ):
+        """
+        returns an SRP-PHAT acoustic map engine of the A-format
+        audio of a microphone array (see micarraylib.srp.SRPPHAT),
+        with the time differences of arrival of the array's
+        capsules cached in steering_cache
+
+        Args:
+            micarray (str): the name of the
+                microphone array
+            directions (tuple or np.array): the directions of the map,
+                as a (kind, n) grid spec or a (directions, 2) array
+                with colatitude and azimuth (radians)
+            fs (int): the sampling rate of the audio (the
+                dataset's sampling rate by default)
+            n_fft (int): the size of the FFT (by default, the
+                smallest power of two, and at least 1024, that
+                holds the GCC-PHAT lags of the array's capsules)
+            hop (int): the hop between frames (n_fft // 2 by default)
+            interp (int): the upsampling factor of the GCC-PHAT lags
+
+        Returns:
+            a micarraylib.srp.SRPPHAT
+        """
+
+        from micarraylib.srp import SRPPHAT
+
+        if fs == None:
+            fs = self.fs
+        if n_fft == None:
+            n_fft, _ = self._gcc_fft_size(micarray, fs, interp)
+        capsule_coords, _ = self.get_capsule_coords_numpy(micarray)
+        return SRPPHAT(
+            _polar2cart_array(capsule_coords, "radians"),
+            directions,
+            fs,
+            n_fft=n_fft,
+            hop=hop,
+            interp=interp,
+            steering_cache=self.steering_cache,
+        )
+
+    def _gcc_fft_size(self, micarray, fs, interp=1, n_fft=None):
+        """
+        get the size of the FFT of the GCC-PHAT of the capsule
+        pairs of a micarray, which must hold all their lags
+
+        Args:
+            micarray (str): the name of the micarray
+            fs (int): the sampling rate of the audio
+            interp (int): the upsampling factor of the lags
+            n_fft (int): the size of the FFT to check (None for
+                the smallest power of two, and at least 1024,
+                that holds the lags)
+
+        Returns:
+            tuple with
+                1) the size of the FFT
+                2) the largest lag of the pairs (samples / interp)
+        """
+        capsule_pairs = self.get_capsule_pairs(micarray)
+        max_lag = int(np.max(capsule_pairs.max_lag(fs * interp), initial=0))
+        # the inverse FFT of the cross-spectra has n_fft * interp lags
+        min_fft = -(-(2 * max_lag + 1) // interp)
+        if n_fft == None:
+            n_fft = max(1024, 1 << (min_fft - 1).bit_length())
+        elif n_fft < min_fft:
+            raise ValueError(
+                "n_fft is {}, but the GCC-PHAT lags of {} need n_fft >= {}".format(
+                    n_fft, micarray, min_fft
+                )
+            )
+        return n_fft, max_lag
+
     def plot_micarray(self, micarray, show=True):
         """
         returns the capsule coordinates in
@@ -143,6 +1047,8 @@ class Dataset:
         capsule_coords_dict = _polar2cart(
             {c: capsule_coords[i] for i, c in enumerate(capsule_names)}, "radians"
         )
+        import matplotlib.pyplot as plt
+
         fig = plt.figure()
         ax = plt.axes(projection="3d")
         for n, m in capsule_coords_dict.items():
@@ -156,6 +1062,20 @@ class Dataset:
             plt.show()
 
 
+def _default_data_home(name):
+    """
+    the directory where soundata stores a dataset
+    if data_home is None (see soundata.core.Dataset)
+
+    Args:
+        name (str): the soundata dataset name
+
+    Returns:
+        the path to the directory
+    """
+    return os.path.join(os.getenv("HOME", "/tmp"), "sound_datasets", name)
+
+
 def _initialize(
     name,
     data_home=None,
@@ -174,6 +1094,8 @@ def _initialize(
         download (bool): True by default. soundata
             will skip this step if the files already exist
     """
+    import soundata
+
     dataset = soundata.initialize(name, data_home)
     if download:
         dataset.download(partial_download, force_overwrite, cleanup)
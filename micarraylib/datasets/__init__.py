@@ -1,9 +1,23 @@
-from micarraylib.datasets import starss2022_loader
-from micarraylib.datasets import tau2021sse_nigens_loader
-from micarraylib.datasets import tau2020sse_nigens_loader
-from micarraylib.datasets import tau2019sse_loader
-from micarraylib.datasets import eigenscape_loader
-from micarraylib.datasets import marco_loader
+import importlib
+
+LOADERS = [
+    "starss2022_loader",
+    "tau2021sse_nigens_loader",
+    "tau2020sse_nigens_loader",
+    "tau2019sse_loader",
+    "eigenscape_loader",
+    "marco_loader",
+]
+
+
+def __getattr__(name):
+    """
+    import the loader modules the first time they
+    are used, so importing micarraylib.datasets is fast
+    """
+    if name in LOADERS:
+        return importlib.import_module("".join(["micarraylib.datasets.", name]))
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
 
 
 def starss2022(
@@ -12,17 +26,35 @@ def starss2022(
     partial_download=None,
     force_overwrite=False,
     cleanup=False,
+    workers=None,
+    resample_quality="kaiser_best",
+    conversion_order=None,
+    disk_cache=False,
+    disk_cache_size=None,
+    memory_cache_size=None,
+    lazy=False,
+    cache_dir=None,
 ):
     """
     helper to load the starss2022 Dataset class
     """
 
+    from micarraylib.datasets import starss2022_loader
+
     return starss2022_loader.starss2022(
         download=download,
         data_home=data_home,
         partial_download=partial_download,
         force_overwrite=force_overwrite,
         cleanup=cleanup,
+        workers=workers,
+        resample_quality=resample_quality,
+        conversion_order=conversion_order,
+        disk_cache=disk_cache,
+        disk_cache_size=disk_cache_size,
+        memory_cache_size=memory_cache_size,
+        lazy=lazy,
+        cache_dir=cache_dir,
     )
 
 
@@ -32,17 +64,35 @@ def tau2021sse_nigens(
     partial_download=None,
     force_overwrite=False,
     cleanup=False,
+    workers=None,
+    resample_quality="kaiser_best",
+    conversion_order=None,
+    disk_cache=False,
+    disk_cache_size=None,
+    memory_cache_size=None,
+    lazy=False,
+    cache_dir=None,
 ):
     """
     helper to load the tau2021sse_nigens Dataset class
     """
 
+    from micarraylib.datasets import tau2021sse_nigens_loader
+
     return tau2021sse_nigens_loader.tau2021sse_nigens(
         download=download,
         data_home=data_home,
         partial_download=partial_download,
         force_overwrite=force_overwrite,
         cleanup=cleanup,
+        workers=workers,
+        resample_quality=resample_quality,
+        conversion_order=conversion_order,
+        disk_cache=disk_cache,
+        disk_cache_size=disk_cache_size,
+        memory_cache_size=memory_cache_size,
+        lazy=lazy,
+        cache_dir=cache_dir,
     )
 
 
@@ -52,17 +102,35 @@ def tau2020sse_nigens(
     partial_download=None,
     force_overwrite=False,
     cleanup=False,
+    workers=None,
+    resample_quality="kaiser_best",
+    conversion_order=None,
+    disk_cache=False,
+    disk_cache_size=None,
+    memory_cache_size=None,
+    lazy=False,
+    cache_dir=None,
 ):
     """
     helper to load the tau2020sse_nigens Dataset class
     """
 
+    from micarraylib.datasets import tau2020sse_nigens_loader
+
     return tau2020sse_nigens_loader.tau2020sse_nigens(
         download=download,
         data_home=data_home,
         partial_download=partial_download,
         force_overwrite=force_overwrite,
         cleanup=cleanup,
+        workers=workers,
+        resample_quality=resample_quality,
+        conversion_order=conversion_order,
+        disk_cache=disk_cache,
+        disk_cache_size=disk_cache_size,
+        memory_cache_size=memory_cache_size,
+        lazy=lazy,
+        cache_dir=cache_dir,
     )
 
 
@@ -72,17 +140,35 @@ def tau2019sse(
     partial_download=None,
     force_overwrite=False,
     cleanup=False,
+    workers=None,
+    resample_quality="kaiser_best",
+    conversion_order=None,
+    disk_cache=False,
+    disk_cache_size=None,
+    memory_cache_size=None,
+    lazy=False,
+    cache_dir=None,
 ):
     """
     helper to load the tau2019sse Dataset class
     """
 
+    from micarraylib.datasets import tau2019sse_loader
+
     return tau2019sse_loader.tau2019sse(
         download=download,
         data_home=data_home,
         partial_download=partial_download,
         force_overwrite=force_overwrite,
         cleanup=cleanup,
+        workers=workers,
+        resample_quality=resample_quality,
+        conversion_order=conversion_order,
+        disk_cache=disk_cache,
+        disk_cache_size=disk_cache_size,
+        memory_cache_size=memory_cache_size,
+        lazy=lazy,
+        cache_dir=cache_dir,
     )
 
 
@@ -92,17 +178,35 @@ def eigenscape(
     partial_download=None,
     force_overwrite=False,
     cleanup=False,
+    workers=None,
+    resample_quality="kaiser_best",
+    conversion_order=None,
+    disk_cache=False,
+    disk_cache_size=None,
+    memory_cache_size=None,
+    lazy=False,
+    cache_dir=None,
 ):
     """
     helper to load the eigenscape Dataset class
     """
 
+    from micarraylib.datasets import eigenscape_loader
+
     return eigenscape_loader.eigenscape(
         download=download,
         data_home=data_home,
         partial_download=partial_download,
         force_overwrite=force_overwrite,
         cleanup=cleanup,
+        workers=workers,
+        resample_quality=resample_quality,
+        conversion_order=conversion_order,
+        disk_cache=disk_cache,
+        disk_cache_size=disk_cache_size,
+        memory_cache_size=memory_cache_size,
+        lazy=lazy,
+        cache_dir=cache_dir,
     )
 
 
@@ -112,17 +216,35 @@ def eigenscape_raw(
     partial_download=None,
     force_overwrite=False,
     cleanup=False,
+    workers=None,
+    resample_quality="kaiser_best",
+    conversion_order=None,
+    disk_cache=False,
+    disk_cache_size=None,
+    memory_cache_size=None,
+    lazy=False,
+    cache_dir=None,
 ):
     """
     helper to load the eigenscape_raw Dataset class
     """
 
+    from micarraylib.datasets import eigenscape_loader
+
     return eigenscape_loader.eigenscape_raw(
         download=download,
         data_home=data_home,
         partial_download=partial_download,
         force_overwrite=force_overwrite,
         cleanup=cleanup,
+        workers=workers,
+        resample_quality=resample_quality,
+        conversion_order=conversion_order,
+        disk_cache=disk_cache,
+        disk_cache_size=disk_cache_size,
+        memory_cache_size=memory_cache_size,
+        lazy=lazy,
+        cache_dir=cache_dir,
     )
 
 
@@ -132,15 +254,33 @@ def marco(
     partial_download=None,
     force_overwrite=False,
     cleanup=False,
+    workers=None,
+    resample_quality="kaiser_best",
+    conversion_order=None,
+    disk_cache=False,
+    disk_cache_size=None,
+    memory_cache_size=None,
+    lazy=False,
+    cache_dir=None,
 ):
     """
     helper to load the eigenscape_raw Dataset class
     """
 
+    from micarraylib.datasets import marco_loader
+
     return marco_loader.marco(
         download=download,
         data_home=data_home,
         partial_download=partial_download,
         force_overwrite=force_overwrite,
         cleanup=cleanup,
+        workers=workers,
+        resample_quality=resample_quality,
+        conversion_order=conversion_order,
+        disk_cache=disk_cache,
+        disk_cache_size=disk_cache_size,
+        memory_cache_size=memory_cache_size,
+        lazy=lazy,
+        cache_dir=cache_dir,
     )
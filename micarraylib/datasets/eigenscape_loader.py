@@ -1,6 +1,5 @@
 from micarraylib import arraycoords
 from micarraylib.core import Dataset
-from micarraylib.utils import _get_audio_numpy
 import numpy as np
 
 EIGENSCAPE_ARRAYS = ["Eigenmike"]
@@ -12,7 +11,9 @@ eigenscape_capsule_coords = {
 
 class eigenscape_raw(Dataset):
     """
-    The eigenscape_raw Dataset class
+    The eigenscape_raw Dataset class. The arguments and
+    attributes shared by all datasets are
+    documented in micarraylib.core.Dataset
 
     Args:
         name (str): the dataset name (must be one of
@@ -59,6 +60,8 @@ class eigenscape_raw(Dataset):
             of the microphone arrays.
     """
 
+    _clip_ids_attributes = ("micarray_clip_ids", "clips_list")
+
     def __init__(
         self,
         name="eigenscape_raw",
@@ -70,6 +73,14 @@ class eigenscape_raw(Dataset):
         partial_download=None,
         force_overwrite=False,
         cleanup=False,
+        workers=None,
+        resample_quality="kaiser_best",
+        conversion_order=None,
+        disk_cache=False,
+        disk_cache_size=None,
+        memory_cache_size=None,
+        lazy=False,
+        cache_dir=None,
     ):
         super().__init__(
             name,
@@ -81,10 +92,16 @@ class eigenscape_raw(Dataset):
             partial_download,
             force_overwrite,
             cleanup,
+            workers,
+            resample_quality,
+            conversion_order,
+            disk_cache,
+            disk_cache_size,
+            memory_cache_size,
+            lazy,
+            cache_dir,
         )
 
-        self.micarray_clip_ids, self.clips_list = self._sort_clip_ids()
-
     def _sort_clip_ids(self):
         """
         Sort clip_ids as belonging
@@ -100,7 +117,53 @@ class eigenscape_raw(Dataset):
         clip_ids_sorted = {k: {c: [c] for c in clip_ids} for k in EIGENSCAPE_ARRAYS}
         return clip_ids_sorted, clip_ids
 
-    def get_audio_numpy(self, clip_id, micarray="Eigenmike", fmt="A", N=None, fs=None):
+    def _get_clip_names(self, clip_id, micarray, fmt):
+        """
+        get the soundata clip_ids with the audio of a clip_id
+        recorded by a micarray, in the format closest to fmt
+
+        Args:
+            clip_id (str): the clip_id of the
+                recorded audio
+            micarray (str): the name of the micarray
+            fmt (str): the desired format of the audio
+                (A or B in the ambisonics sense)
+
+        Returns:
+            tuple with
+                1) list with the soundata clip_ids
+                2) the format (A or B) of their audio
+        """
+        if fmt == "B":
+            raise ValueError(
+                "Conversion between formats not necessary for eigenscape dataset. Each format already has its dataset in micarraylib (and soundata): eigenscape (B-format) and eigenscape_raw (A-format)"
+            )
+        if micarray not in self.array_names:
+            raise ValueError(
+                "micarray is {}, but it should be one of {}".format(
+                    micarray, ", ".join(self.array_names)
+                )
+            )
+        if clip_id not in self.clips_set:
+            raise ValueError(
+                "clip_id is {}, but it should be one of {}".format(
+                    clip_id, ", ".join(self.clips_list)
+                )
+            )
+        return self.micarray_clip_ids[micarray][clip_id], self.array_format[micarray]
+
+    def get_audio_numpy(
+        self,
+        clip_id,
+        micarray="Eigenmike",
+        fmt="A",
+        N=None,
+        fs=None,
+        out=None,
+        mmap=False,
+        start=None,
+        stop=None,
+    ):
         """
         combine single-capsule mono clips to
         form an numpy array with all the audio recorded by
@@ -118,38 +181,34 @@ class eigenscape_raw(Dataset):
             N (int): the order of B-format
             fs (int): the sampling rate we want
                 the audio in (resampling as needed).
+            out (np.array): optional array where the audio
+                is written, to reuse buffers across calls
+            mmap (bool): if True, return a memory-mapped view
+                (micarraylib.utils.MappedAudio) of the samples
+                in the audio files instead of decoding them.
+                Only possible for uncompressed WAV files, in
+                their native sampling rate and format
+            start (float): time in seconds where the audio
+                starts (None for the beginning). Only the
+                requested frames are decoded and converted
+            stop (float): time in seconds where the audio
+                ends (None for the end)
 
         Returns:
             a numpy array with the audio
 
         Note: this operation may take some time.
         """
-        if fs == None:
-            fs = self.fs
-        if fmt == "B":
-            raise ValueError(
-                "Conversion between formats not necessary for eigenscape dataset. Each format already has its dataset in micarraylib (and soundata): eigenscape (B-format) and eigenscape_raw (A-format)"
-            )
-        if micarray not in self.array_names:
-            raise ValueError(
-                "micarray is {}, but it should be one of {}".format(
-                    micarray, ", ".join(self.array_names)
-                )
-            )
-        if not any([clip_id == s for s in self.clips_list]):
-            raise ValueError(
-                "clip_id is {}, but it should be one of {}".format(
-                    clip_id, ", ".join(self.clips_list)
-                )
-            )
-        return _get_audio_numpy(
-            self.micarray_clip_ids[micarray][clip_id],
-            self.dataset,
-            self.array_format[micarray],
+        return self._get_audio_numpy(
+            clip_id,
+            micarray,
             fmt,
-            self.capsule_coords[micarray],
-            N,
-            fs,
+            N=N,
+            fs=fs,
+            out=out,
+            mmap=mmap,
+            start=start,
+            stop=stop,
         )
 
 
@@ -158,7 +217,9 @@ eigenscape_array_format = {m: "B" for m in EIGENSCAPE_ARRAYS}
 
 class eigenscape(Dataset):
     """
-    The eigenscape Dataset class
+    The eigenscape Dataset class. The arguments and
+    attributes shared by all datasets are
+    documented in micarraylib.core.Dataset
 
     Args:
         name (str): the dataset name (must be one of
@@ -205,6 +266,8 @@ class eigenscape(Dataset):
             of the microphone arrays.
     """
 
+    _clip_ids_attributes = ("micarray_clip_ids", "clips_list")
+
     def __init__(
         self,
         name="eigenscape",
@@ -216,6 +279,14 @@ class eigenscape(Dataset):
         partial_download=None,
         force_overwrite=False,
         cleanup=False,
+        workers=None,
+        resample_quality="kaiser_best",
+        conversion_order=None,
+        disk_cache=False,
+        disk_cache_size=None,
+        memory_cache_size=None,
+        lazy=False,
+        cache_dir=None,
     ):
         super().__init__(
             name,
@@ -227,10 +298,16 @@ class eigenscape(Dataset):
             partial_download,
             force_overwrite,
             cleanup,
+            workers,
+            resample_quality,
+            conversion_order,
+            disk_cache,
+            disk_cache_size,
+            memory_cache_size,
+            lazy,
+            cache_dir,
         )
 
-        self.micarray_clip_ids, self.clips_list = self._sort_clip_ids()
-
     def _sort_clip_ids(self):
         """
         Sort clip_ids as belonging
@@ -246,7 +323,53 @@ class eigenscape(Dataset):
         clip_ids_sorted = {k: {c: [c] for c in clip_ids} for k in EIGENSCAPE_ARRAYS}
         return clip_ids_sorted, clip_ids
 
-    def get_audio_numpy(self, clip_id, micarray="Eigenmike", fmt="B", N=None, fs=None):
+    def _get_clip_names(self, clip_id, micarray, fmt):
+        """
+        get the soundata clip_ids with the audio of a clip_id
+        recorded by a micarray, in the format closest to fmt
+
+        Args:
+            clip_id (str): the clip_id of the
+                recorded audio
+            micarray (str): the name of the micarray
+            fmt (str): the desired format of the audio
+                (A or B in the ambisonics sense)
+
+        Returns:
+            tuple with
+                1) list with the soundata clip_ids
+                2) the format (A or B) of their audio
+        """
+        if fmt == "A":
+            raise ValueError(
+                "Conversion between formats not necessary for eigenscape dataset. Each format already has its dataset: eigenscape (B-format) and eigenscape_raw (A-format)"
+            )
+        if micarray not in self.array_names:
+            raise ValueError(
+                "micarray is {}, but it should be one of {}".format(
+                    micarray, ", ".join(self.array_names)
+                )
+            )
+        if clip_id not in self.clips_set:
+            raise ValueError(
+                "clip_id is {}, but it should be one of {}".format(
+                    clip_id, ", ".join(self.clips_list)
+                )
+            )
+        return self.micarray_clip_ids[micarray][clip_id], self.array_format[micarray]
+
+    def get_audio_numpy(
+        self,
+        clip_id,
+        micarray="Eigenmike",
+        fmt="B",
+        N=None,
+        fs=None,
+        out=None,
+        mmap=False,
+        start=None,
+        stop=None,
+    ):
         """
         combine single-capsule mono clips to
         form an numpy array with all the audio recorded by
@@ -264,36 +387,32 @@ class eigenscape(Dataset):
             N (int): the order of B-format
             fs (int): the sampling rate we want
                 the audio in (resampling as needed).
+            out (np.array): optional array where the audio
+                is written, to reuse buffers across calls
+            mmap (bool): if True, return a memory-mapped view
+                (micarraylib.utils.MappedAudio) of the samples
+                in the audio files instead of decoding them.
+                Only possible for uncompressed WAV files, in
+                their native sampling rate and format
+            start (float): time in seconds where the audio
+                starts (None for the beginning). Only the
+                requested frames are decoded and converted
+            stop (float): time in seconds where the audio
+                ends (None for the end)
 
         Returns:
             a numpy array with the audio
 
         Note: this operation may take some time.
         """
-        if fs == None:
-            fs = self.fs
-        if fmt == "A":
-            raise ValueError(
-                "Conversion between formats not necessary for eigenscape dataset. Each format already has its dataset: eigenscape (B-format) and eigenscape_raw (A-format)"
-            )
-        if micarray not in self.array_names:
-            raise ValueError(
-                "micarray is {}, but it should be one of {}".format(
-                    micarray, ", ".join(self.array_names)
-                )
-            )
-        if not any([clip_id == s for s in self.clips_list]):
-            raise ValueError(
-                "clip_id is {}, but it should be one of {}".format(
-                    clip_id, ", ".join(self.clips_list)
-                )
-            )
-        return _get_audio_numpy(
-            self.micarray_clip_ids[micarray][clip_id],
-            self.dataset,
-            self.array_format[micarray],
+        return self._get_audio_numpy(
+            clip_id,
+            micarray,
             fmt,
-            self.capsule_coords[micarray],
-            N,
-            fs,
+            N=N,
+            fs=fs,
+            out=out,
+            mmap=mmap,
+            start=start,
+            stop=stop,
         )
@@ -1,6 +1,5 @@
 from micarraylib import arraycoords
 from micarraylib.core import Dataset
-from micarraylib.utils import _get_audio_numpy
 import numpy as np
 import re
 
@@ -21,7 +20,9 @@ marco_capsule_coords = {
 
 class marco(Dataset):
     """
-    The marco Dataset class
+    The marco Dataset class. The arguments and
+    attributes shared by all datasets are
+    documented in micarraylib.core.Dataset
 
     Args:
         name (str): the dataset name (must be one of
@@ -67,6 +68,8 @@ class marco(Dataset):
             clips in the dataset.
     """
 
+    _clip_ids_attributes = ("micarray_capsule_clip_ids", "clips_list")
+
     def __init__(
         self,
         name="marco",
@@ -78,6 +81,14 @@ class marco(Dataset):
         partial_download=None,
         force_overwrite=False,
         cleanup=False,
+        workers=None,
+        resample_quality="kaiser_best",
+        conversion_order=None,
+        disk_cache=False,
+        disk_cache_size=None,
+        memory_cache_size=None,
+        lazy=False,
+        cache_dir=None,
     ):
         super().__init__(
             name,
@@ -89,10 +100,16 @@ class marco(Dataset):
             partial_download,
             force_overwrite,
             cleanup,
+            workers,
+            resample_quality,
+            conversion_order,
+            disk_cache,
+            disk_cache_size,
+            memory_cache_size,
+            lazy,
+            cache_dir,
         )
 
-        self.micarray_capsule_clip_ids, self.clips_list = self._sort_clip_ids()
-
     def _sort_clip_ids(self):
         """
         Sort clip_ids as belonging
@@ -104,29 +121,75 @@ class marco(Dataset):
                 and sound source that they belong to.
             clips_list (list)
         """
-        clip_ids = self.dataset.clip_ids
-        clip_ids_split = [c.split("/") for c in clip_ids]
-        clips_list_in_clips = list(
-            set(["".join([c[0], "/", c[1][:4]]) for c in clip_ids_split])
-        )
-        clips_list = [
-            re.sub(
-                "([A-Z][a-z]+)",
-                r" \1",
-                re.sub("([A-Z]+)", r" \1", "".join(s.split("/"))),
-            ).split()[0]
-            for s in clips_list_in_clips
-        ]
         clip_ids_sorted = {k: {} for k in MARCO_ARRAYS}
+        sources = {}
+        for clip_id in self.dataset.clip_ids:
+            c = clip_id.split("/")
+            source_clip = "".join([c[0], "/", c[1][:4]])
+            if source_clip not in sources:
+                sources[source_clip] = re.sub(
+                    "([A-Z][a-z]+)",
+                    r" \1",
+                    re.sub("([A-Z]+)", r" \1", "".join(source_clip.split("/"))),
+                ).split()[0]
+                for micarray in MARCO_ARRAYS:
+                    clip_ids_sorted[micarray][sources[source_clip]] = []
+            for micarray in MARCO_ARRAYS:
+                if micarray in clip_id:
+                    clip_ids_sorted[micarray][sources[source_clip]].append(clip_id)
         for micarray in MARCO_ARRAYS:
-            for source, source_clip in zip(clips_list, clips_list_in_clips):
-                clip_ids_sorted[micarray][source] = sorted(
-                    [c for c in clip_ids if source_clip in c and micarray in c]
-                )
+            for source in clip_ids_sorted[micarray].values():
+                source.sort()
+        clips_list = list(sources.values())
 
         return clip_ids_sorted, clips_list
 
-    def get_audio_numpy(self, source, micarray, fmt="A", N=None, fs=None):
+    def _get_clip_names(self, source, micarray, fmt):
+        """
+        get the soundata clip_ids with the audio of a sound source
+        recorded by a micarray, in the format closest to fmt
+
+        Args:
+            source (str): the sound source that was
+                recorded in the audio
+            micarray (str): the name of the micarray
+            fmt (str): the desired format of the audio
+                (A or B in the ambisonics sense)
+
+        Returns:
+            tuple with
+                1) list with the soundata clip_ids
+                2) the format (A or B) of their audio
+        """
+        if micarray not in self.array_names:
+            raise ValueError(
+                "micarray is {}, but it should be one of {}".format(
+                    micarray, ", ".join(self.array_names)
+                )
+            )
+        if source not in self.clips_set:
+            raise ValueError(
+                "source is {}, but it should be one of {}".format(
+                    source, ", ".join(self.clips_list)
+                )
+            )
+        return (
+            self.micarray_capsule_clip_ids[micarray][source],
+            self.array_format[micarray],
+        )
+
+    def get_audio_numpy(
+        self,
+        source,
+        micarray,
+        fmt="A",
+        N=None,
+        fs=None,
+        out=None,
+        mmap=False,
+        start=None,
+        stop=None,
+    ):
         """
         combine single-capsule mono clips to
         form an numpy array with all the audio recorded by
@@ -144,32 +207,32 @@ class marco(Dataset):
             N (int): the order of B-format
             fs (int): the sampling rate we want
                 the audio in (resampling as needed).
+            out (np.array): optional array where the audio
+                is written, to reuse buffers across calls
+            mmap (bool): if True, return a memory-mapped view
+                (micarraylib.utils.MappedAudio) of the samples
+                in the audio files instead of decoding them.
+                Only possible for uncompressed WAV files, in
+                their native sampling rate and format
+            start (float): time in seconds where the audio
+                starts (None for the beginning). Only the
+                requested frames are decoded and converted
+            stop (float): time in seconds where the audio
+                ends (None for the end)
 
         Returns:
             a numpy array with the audio
 
         Note: this operation may take some time.
         """
-        if fs == None:
-            fs = self.fs
-        if micarray not in self.array_names:
-            raise ValueError(
-                "micarray is {}, but it should be one of {}".format(
-                    micarray, ", ".join(self.array_names)
-                )
-            )
-        if not any([source == s for s in self.clips_list]):
-            raise ValueError(
-                "source is {}, but it should be one of {}".format(
-                    source, ", ".join(self.clips_list)
-                )
-            )
-        return _get_audio_numpy(
-            self.micarray_capsule_clip_ids[micarray][source],
-            self.dataset,
-            self.array_format[micarray],
+        return self._get_audio_numpy(
+            source,
+            micarray,
             fmt,
-            self.capsule_coords[micarray],
-            N,
-            fs,
+            N=N,
+            fs=fs,
+            out=out,
+            mmap=mmap,
+            start=start,
+            stop=stop,
         )
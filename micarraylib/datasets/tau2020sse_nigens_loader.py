@@ -1,6 +1,5 @@
 from micarraylib import arraycoords
 from micarraylib.core import Dataset
-from micarraylib.utils import _get_audio_numpy
 import numpy as np
 
 TAUSSE_ARRAYS = ["Eigenmike"]
@@ -15,7 +14,9 @@ tausse_capsule_coords["Eigenmike"] = {
 
 class tau2020sse_nigens(Dataset):
     """
-    The tau2020sse Dataset class
+    The tau2020sse Dataset class. The arguments and
+    attributes shared by all datasets are
+    documented in micarraylib.core.Dataset
 
     Args:
         name (str): the dataset name (must be one of
@@ -62,6 +63,8 @@ class tau2020sse_nigens(Dataset):
             with each of the microphone arrays.
     """
 
+    _clip_ids_attributes = ("micarray_clip_ids", "clips_list")
+
     def __init__(
         self,
         name="tau2020sse_nigens",
@@ -73,6 +76,14 @@ class tau2020sse_nigens(Dataset):
         partial_download=None,
         force_overwrite=False,
         cleanup=False,
+        workers=None,
+        resample_quality="kaiser_best",
+        conversion_order=None,
+        disk_cache=False,
+        disk_cache_size=None,
+        memory_cache_size=None,
+        lazy=False,
+        cache_dir=None,
     ):
         super().__init__(
             name,
@@ -84,10 +95,16 @@ class tau2020sse_nigens(Dataset):
             partial_download,
             force_overwrite,
             cleanup,
+            workers,
+            resample_quality,
+            conversion_order,
+            disk_cache,
+            disk_cache_size,
+            memory_cache_size,
+            lazy,
+            cache_dir,
         )
 
-        self.micarray_clip_ids, self.clips_list = self._sort_clip_ids()
-
     def _sort_clip_ids(self):
         """
         Sort clip_ids as belonging
@@ -104,7 +121,54 @@ class tau2020sse_nigens(Dataset):
         clip_ids_sorted = {k: {c: [c] for c in clip_ids} for k in TAUSSE_ARRAYS}
         return clip_ids_sorted, clip_ids
 
-    def get_audio_numpy(self, clip_id, micarray="Eigenmike", fmt="A", fs=None):
+    def _get_clip_names(self, clip_id, micarray, fmt):
+        """
+        get the soundata clip_ids with the audio of a clip_id
+        recorded by a micarray, in the format closest to fmt
+
+        Args:
+            clip_id (str): the clip_id of the
+                recorded audio
+            micarray (str): the name of the micarray
+            fmt (str): the desired format of the audio
+                (A or B in the ambisonics sense)
+
+        Returns:
+            tuple with
+                1) list with the soundata clip_ids
+                2) the format (A or B) of their audio
+        """
+        if micarray not in self.array_names:
+            raise ValueError(
+                "micarray is {}, but it should be one of {}".format(
+                    micarray, ", ".join(self.array_names)
+                )
+            )
+        if clip_id not in self.clips_set:
+            raise ValueError(
+                "clip_id is {}, but it should be one of {}".format(
+                    clip_id, ", ".join(self.clips_list)
+                )
+            )
+        if fmt == "B":
+            return [
+                "".join(["foa_", self.micarray_clip_ids[micarray][clip_id][0]])
+            ], "B"
+        return [
+            "".join(["mic_", self.micarray_clip_ids[micarray][clip_id][0]])
+        ], self.array_format[micarray]
+
+    def get_audio_numpy(
+        self,
+        clip_id,
+        micarray="Eigenmike",
+        fmt="A",
+        fs=None,
+        out=None,
+        mmap=False,
+        start=None,
+        stop=None,
+    ):
         """
         combine single-capsule mono clips to
         form an numpy array with all the audio recorded by
@@ -120,44 +184,47 @@ class tau2020sse_nigens(Dataset):
                 ambisonics sense)
             fs (int): the sampling rate we want
                 the audio in (resampling as needed).
+            out (np.array): optional array where the audio
+                is written, to reuse buffers across calls
+            mmap (bool): if True, return a memory-mapped view
+                (micarraylib.utils.MappedAudio) of the samples
+                in the audio files instead of decoding them.
+                Only possible for uncompressed WAV files, in
+                their native sampling rate and format
+            start (float): time in seconds where the audio
+                starts (None for the beginning). Only the
+                requested frames are decoded and converted
+            stop (float): time in seconds where the audio
+                ends (None for the end)
 
         Returns:
             a numpy array with the audio
 
         Note: this operation may take some time.
         """
-        if fs == None:
-            fs = self.fs
-        if micarray not in self.array_names:
-            raise ValueError(
-                "micarray is {}, but it should be one of {}".format(
-                    micarray, ", ".join(self.array_names)
-                )
-            )
-        if not any([clip_id == s for s in self.clips_list]):
-            raise ValueError(
-                "clip_id is {}, but it should be one of {}".format(
-                    clip_id, ", ".join(self.clips_list)
-                )
-            )
-        if fmt == "A":
-            return _get_audio_numpy(
-                ["".join(["mic_", self.micarray_clip_ids[micarray][clip_id][0]])],
-                self.dataset,
-                self.array_format[micarray],
-                fmt,
-                self.capsule_coords[micarray],
-                fs=fs,
-            )
-        if fmt == "B":
-            return _get_audio_numpy(
-                ["".join(["foa_", self.micarray_clip_ids[micarray][clip_id][0]])],
-                self.dataset,
-                "B",
-                fmt,
-                self.capsule_coords[micarray],
-                fs=fs,
-            )
+        return self._get_audio_numpy(
+            clip_id,
+            micarray,
+            fmt,
+            fs=fs,
+            out=out,
+            mmap=mmap,
+            start=start,
+            stop=stop,
+        )
+
+    def _get_event_clip_id(self, clip_id):
+        """
+        get the soundata clip_id with the
+        spatial events of a clip_id
+
+        Args:
+            clip_id (str): the clip_id of the recorded audio
+
+        Returns:
+            the soundata clip_id
+        """
+        return "".join(["foa_", clip_id])
 
     def get_audio_events(self, clip_id):
         """
@@ -170,11 +237,10 @@ class tau2020sse_nigens(Dataset):
         Returns:
             a soundata.SpatialEvents object
         """
-        if not any([clip_id == s for s in self.clips_list]):
+        if clip_id not in self.clips_set:
             raise ValueError(
                 "clip_id is {}, but it should be one of {}".format(
                     clip_id, ", ".join(self.clips_list)
                 )
             )
-        all_dataset_clip_names = self.dataset.load_clips()
-        return all_dataset_clip_names["".join(["foa_", clip_id])].spatial_events
+        return self.clip_index[self._get_event_clip_id(clip_id)].spatial_events
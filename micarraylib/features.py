@@ -0,0 +1,413 @@
+import functools
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+# the Dataset methods that extract_features can run
+FEATURES = {"seld": "get_seld_features", "gcc_phat": "get_gcc_phat"}
+
+
+def stft(audio, n_fft=1024, hop=None):
+    """
+    computes the short-time Fourier transform of all the
+    channels of the audio in one batched FFT, with a periodic
+    Hann window and frames centered at multiples of hop (the
+    audio is padded with n_fft // 2 zeros at both ends)
+
+    Args:
+        audio (np.array): (channels, samples) audio
+        n_fft (int): the size of the FFT
+        hop (int): the hop between frames (n_fft // 2 by default)
+
+    Returns:
+        (channels, 1 + samples // hop, n_fft // 2 + 1)
+        complex64 array
+    """
+    if hop == None:
+        hop = n_fft // 2
+    audio = np.asarray(audio, dtype=np.float32)
+    _check_channels(audio)
+    return _stft_frames(audio, 0, 1 + audio.shape[1] // hop, n_fft, hop)
+
+
+def stft_blocks(audio, n_fft=1024, hop=None, block_frames=256):
+    """
+    computes the STFT of the audio (see stft) in blocks of
+    frames, reading only the samples of each block, so long
+    (or memory-mapped) recordings are transformed without
+    holding their whole STFT in memory
+
+    Args:
+        audio (np.array or micarraylib.utils.MappedAudio):
+            (channels, samples) audio
+        n_fft (int): the size of the FFT
+        hop (int): the hop between frames (n_fft // 2 by default)
+        block_frames (int): number of frames per block
+
+    Yields:
+        tuples with the index of the first frame of the block
+        and the (channels, frames, n_fft // 2 + 1) complex64 STFT
+    """
+    if hop == None:
+        hop = n_fft // 2
+    _check_channels(audio)
+    n_frames = 1 + audio.shape[1] // hop
+    for first in range(0, n_frames, block_frames):
+        yield first, _stft_frames(
+            audio, first, min(block_frames, n_frames - first), n_fft, hop
+        )
+
+
+def gcc_phat(spectrum, pairs, max_lag, interp=1):
+    """
+    computes the generalized cross-correlation with phase
+    transform (GCC-PHAT) of pairs of channels from their
+    STFT, with the cross-spectra of all the pairs and frames
+    transformed in one batched inverse FFT
+
+    Args:
+        spectrum (np.array): (channels, frames, n_fft // 2 + 1)
+            STFT of the audio (see stft)
+        pairs (np.array): (pairs, 2) indexes of the channels of
+            each pair
+        max_lag (int): the largest lag kept, in samples / interp
+        interp (int): the upsampling factor of the lags (the
+            cross-spectra are zero-padded interp times)
+
+    Returns:
+        (pairs, frames, 2 * max_lag + 1) float32 array with the
+        GCC-PHAT at lags -max_lag to max_lag. The peak is at
+        positive lags when the first channel of the pair lags
+        behind the second one.
+    """
+    from scipy import fft
+
+    n_fft = 2 * (spectrum.shape[-1] - 1)
+    n = n_fft * interp
+    if 2 * max_lag + 1 > n:
+        raise ValueError(
+            "max_lag is {}, but it should be smaller than {}".format(max_lag, n // 2)
+        )
+    pairs = np.asarray(pairs)
+    # |X_i X_j*| = |X_i| |X_j|, so the phase transform normalizes
+    # each channel once instead of every cross-spectrum
+    magnitude = np.abs(spectrum)
+    np.maximum(magnitude, np.finfo(np.float32).tiny, out=magnitude)
+    phase = spectrum * np.reciprocal(magnitude)
+    cross = phase[pairs[:, 0]]
+    cross *= np.conj(phase)[pairs[:, 1]]
+    cc = fft.irfft(cross, n, axis=-1)
+    if interp != 1:
+        cc *= interp
+    # negative lags are at the end of the inverse FFT
+    return np.concatenate(
+        [cc[..., n - max_lag :], cc[..., : max_lag + 1]], axis=-1
+    ).astype(np.float32, copy=False)
+
+
+@functools.lru_cache(maxsize=32)
+def mel_filterbank(fs, n_fft, n_mels):
+    """
+    computes the mel filterbank (Slaney's mel scale and
+    area normalization, like librosa.filters.mel) for the
+    bins of a real FFT. Filterbanks are cached per
+    (fs, n_fft, n_mels).
+
+    Args:
+        fs (int): the sampling rate
+        n_fft (int): the size of the FFT
+        n_mels (int): the number of mel bands
+
+    Returns:
+        read-only (n_mels, n_fft // 2 + 1) float32 array
+    """
+    freqs = np.fft.rfftfreq(n_fft, 1 / fs)
+    mel_f = _mel_to_hz(np.linspace(0, _hz_to_mel(fs / 2), n_mels + 2))
+    fdiff = np.diff(mel_f)[:, np.newaxis]
+    ramps = mel_f[:, np.newaxis] - freqs
+    lower = -ramps[:-2] / fdiff[:-1]
+    upper = ramps[2:] / fdiff[1:]
+    weights = np.maximum(0, np.minimum(lower, upper))
+    weights *= (2 / (mel_f[2:] - mel_f[:-2]))[:, np.newaxis]
+    weights = weights.astype(np.float32)
+    weights.flags.writeable = False
+    return weights
+
+
+def logmel(spectrum, fs, n_mels=64):
+    """
+    computes the log-mel spectrogram of each channel
+
+    Args:
+        spectrum (np.array): (channels, frames, n_fft // 2 + 1)
+            STFT of the audio (see stft)
+        fs (int): the sampling rate
+        n_mels (int): the number of mel bands
+
+    Returns:
+        (channels, frames, n_mels) float32 array in dB
+    """
+    return _logmel(_power(spectrum), _spectrum_filterbank(spectrum, fs, n_mels))
+
+
+def intensity_vectors(spectrum, fs, n_mels=64):
+    """
+    computes the acoustic intensity vectors of B-format audio
+    (first order, ACN channel order W, Y, Z, X), normalized by
+    the energy of each bin and summed in mel bands
+
+    Args:
+        spectrum (np.array): (channels, frames, n_fft // 2 + 1)
+            STFT of the B-format audio (see stft)
+        fs (int): the sampling rate
+        n_mels (int): the number of mel bands
+
+    Returns:
+        (3, frames, n_mels) float32 array with the x, y
+        and z components
+    """
+    return _intensity_vectors(
+        spectrum, _power(spectrum), _spectrum_filterbank(spectrum, fs, n_mels)
+    )
+
+
+def salsa(spectrum, fs, fmax=9000):
+    """
+    computes SALSA-style features of B-format audio (first order,
+    ACN channel order): the log-linear spectrograms of the four
+    channels stacked with the normalized intensity vectors of
+    the same linear frequency bins (as spatial cue instead of
+    the principal eigenvector of SALSA), up to fmax
+
+    Args:
+        spectrum (np.array): (channels, frames, n_fft // 2 + 1)
+            STFT of the B-format audio (see stft)
+        fs (int): the sampling rate
+        fmax (float): the highest frequency of the features
+
+    Returns:
+        (7, frames, bins) float32 array with the bins up to fmax
+    """
+    return _salsa(spectrum, _power(spectrum), fs, fmax)
+
+
+def seld_features(audio, fs, n_fft=1024, hop=None, n_mels=64, include_salsa=False):
+    """
+    computes the features used in sound event localization
+    and detection (SELD) from one batched STFT of B-format
+    audio (first order, ACN channel order W, Y, Z, X)
+
+    Args:
+        audio (np.array): (channels, samples) B-format audio
+        fs (int): the sampling rate
+        n_fft (int): the size of the FFT
+        hop (int): the hop between frames (n_fft // 2 by default)
+        n_mels (int): the number of mel bands
+        include_salsa (bool): whether to compute SALSA-style features
+
+    Returns:
+        dictionary with the float32 arrays 'logmel'
+        (channels, frames, n_mels), 'intensity' (3, frames,
+        n_mels) and, optionally, 'salsa' (7, frames, bins)
+    """
+    spectrum = stft(audio, n_fft, hop)
+    _check_foa(spectrum)
+    power = _power(spectrum)
+    filterbank = mel_filterbank(fs, n_fft, n_mels)
+    features = {
+        "logmel": _logmel(power, filterbank),
+        "intensity": _intensity_vectors(spectrum, power, filterbank),
+    }
+    if include_salsa:
+        features["salsa"] = _salsa(spectrum, power, fs)
+    return features
+
+
+def extract_features(
+    dataset, micarray, clip_ids=None, feature="seld", processes=None, **kwargs
+):
+    """
+    extracts features of many clips of a dataset with a pool
+    of processes. Each process gets its own copy of the dataset
+    (see Dataset.__getstate__) and is started by a fork server
+    (or spawned where there is none), because forking a process
+    that has started threads (e.g. the threading layer of numba,
+    used when the audio is resampled) is not safe.
+
+    Args:
+        dataset (micarraylib.core.Dataset): the dataset
+        micarray (str): the name of the micarray
+        clip_ids (list): the clip_ids (all the clip_ids with
+            audio of the micarray by default)
+        feature (str): 'seld' (Dataset.get_seld_features) or
+            'gcc_phat' (Dataset.get_gcc_phat)
+        processes (int): number of processes (the number of CPUs
+            by default, 1 to extract them in this process)
+        kwargs: the arguments of the Dataset method
+
+    Yields:
+        tuples with each clip_id and its features, in the
+        order of clip_ids
+    """
+    if feature not in FEATURES:
+        raise ValueError(
+            "feature is {}, but it should be one of {}".format(
+                feature, ", ".join(FEATURES)
+            )
+        )
+    if clip_ids == None:
+        clip_ids = [
+            c for c, arrays in dataset.clip_lookup.items() if micarray in arrays
+        ]
+    method = FEATURES[feature]
+    if processes == 1:
+        for clip_id in clip_ids:
+            yield clip_id, getattr(dataset, method)(clip_id, micarray, **kwargs)
+        return
+    start_method = "forkserver"
+    if start_method not in multiprocessing.get_all_start_methods():
+        start_method = "spawn"
+    with ProcessPoolExecutor(
+        processes,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=_init_worker,
+        initargs=(dataset,),
+    ) as pool:
+        tasks = [(clip_id, micarray, method, kwargs) for clip_id in clip_ids]
+        for clip_id, features in zip(clip_ids, pool.map(_worker_features, tasks)):
+            yield clip_id, features
+
+
+# the dataset of each process of extract_features
+_worker_dataset = None
+
+
+def _init_worker(dataset):
+    global _worker_dataset
+    _worker_dataset = dataset
+
+
+def _worker_features(task):
+    """
+    extract the features of a clip in a worker process
+
+    Args:
+        task (tuple): the clip_id, the micarray, the name of the
+            Dataset method and its keyword arguments
+
+    Returns:
+        the features
+    """
+    clip_id, micarray, method, kwargs = task
+    return getattr(_worker_dataset, method)(clip_id, micarray, **kwargs)
+
+
+def _check_foa(spectrum):
+    if spectrum.shape[0] < 4:
+        raise ValueError(
+            "the audio has {} channels, but B-format features need at least 4".format(
+                spectrum.shape[0]
+            )
+        )
+
+
+def _power(spectrum):
+    return np.square(spectrum.real) + np.square(spectrum.imag)
+
+
+def _spectrum_filterbank(spectrum, fs, n_mels):
+    return mel_filterbank(fs, 2 * (spectrum.shape[-1] - 1), n_mels)
+
+
+def _logmel(power, filterbank):
+    mel = power @ filterbank.T
+    return 10 * np.log10(np.maximum(mel, 1e-10, out=mel))
+
+
+def _normalized_intensity(spectrum, power):
+    """
+    the intensity vector of each bin, normalized by its energy
+
+    Returns:
+        (3, frames, bins) array
+    """
+    _check_foa(spectrum)
+    # ACN order: W, Y, Z, X
+    intensity = np.real(np.conj(spectrum[0]) * spectrum[[3, 1, 2]])
+    energy = power[0] + np.sum(power[1:4], axis=0) / 3
+    return intensity / (energy + np.finfo(np.float32).eps)
+
+
+def _intensity_vectors(spectrum, power, filterbank):
+    return (_normalized_intensity(spectrum, power) @ filterbank.T).astype(
+        np.float32, copy=False
+    )
+
+
+def _salsa(spectrum, power, fs, fmax=9000):
+    n_fft = 2 * (spectrum.shape[-1] - 1)
+    bins = min(spectrum.shape[-1], int(np.floor(fmax * n_fft / fs)) + 1)
+    log_power = 10 * np.log10(np.maximum(power[:4, :, :bins], 1e-10))
+    intensity = _normalized_intensity(spectrum[:, :, :bins], power[:, :, :bins])
+    return np.concatenate([log_power, intensity]).astype(np.float32, copy=False)
+
+
+def _hz_to_mel(f):
+    """
+    Slaney's mel scale: linear below 1 kHz, logarithmic above
+    """
+    f = np.asarray(f, dtype=float)
+    linear = f * 3 / 200
+    logarithmic = 15 + np.log(np.maximum(f, 1e-10) / 1000) * 27 / np.log(6.4)
+    return np.where(f >= 1000, logarithmic, linear)
+
+
+def _mel_to_hz(m):
+    m = np.asarray(m, dtype=float)
+    linear = m * 200 / 3
+    logarithmic = 1000 * np.exp(np.log(6.4) / 27 * (m - 15))
+    return np.where(m >= 15, logarithmic, linear)
+
+
+def _check_channels(audio):
+    if len(audio.shape) != 2:
+        raise ValueError(
+            "audio has shape {}, but it should have shape (channels, samples)".format(
+                audio.shape
+            )
+        )
+
+
+def _stft_frames(audio, first, frames, n_fft, hop, pad=None, window=None):
+    """
+    computes the STFT frames first to first + frames, reading
+    the samples they cover and padding them with zeros
+    outside of the audio. The first frame starts pad samples
+    before the audio (n_fft // 2 by default, which centers the
+    frames) and the frames are multiplied by the window (the
+    periodic Hann window by default)
+    """
+    from scipy import fft
+
+    if pad == None:
+        pad = n_fft // 2
+    if window is None:
+        window = _hann(n_fft)
+    n_samples = audio.shape[1]
+    start = first * hop - pad
+    stop = start + (frames - 1) * hop + n_fft
+    segment = np.zeros((audio.shape[0], stop - start), dtype=np.float32)
+    segment[:, max(-start, 0) : min(stop, n_samples) - start] = audio[
+        :, max(start, 0) : min(stop, n_samples)
+    ]
+    windows = np.lib.stride_tricks.sliding_window_view(segment, n_fft, axis=-1)[
+        :, ::hop
+    ]
+    return fft.rfft(windows * window, axis=-1)
+
+
+def _hann(n):
+    """
+    the periodic Hann window of length n
+    """
+    return (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n) / n)).astype(np.float32)
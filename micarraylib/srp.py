@@ -0,0 +1,158 @@
+import numpy as np
+from micarraylib.arraycoords.core import SPEED_OF_SOUND
+from micarraylib.steering import tdoas, direction_grid, _array_coords
+from micarraylib.features import stft_blocks, gcc_phat
+
+
+class SRPPHAT:
+    """
+    Steered response power with phase transform (SRP-PHAT)
+    acoustic maps of A-format audio. The time differences of
+    arrival (TDOA) of every direction of the grid at every pair
+    of capsules are converted once to a table of indexes into
+    the lags of the GCC-PHAT (and to a sparse matrix that gathers
+    them), so the map of each frame, the mean over pairs of the
+    GCC-PHAT at the lags of each direction, is one matrix product.
+    The STFT of all the capsules and the cross-spectra of all
+    the pairs are computed with batched FFTs, in blocks of
+    frames to bound the memory of large arrays.
+
+    Args:
+        array (micarray, str or np.array): the array, the name
+            of a registered array or the (capsules, 3) cartesian
+            coordinates of its capsules (meters, centered)
+        directions (tuple or np.array): the directions of the map,
+            as a (kind, n) grid spec (see steering.direction_grid) or
+            a (directions, 2) array with colatitude and azimuth (radians)
+        fs (int): the sampling rate of the audio
+        n_fft (int): the size of the FFT. The GCC-PHAT needs
+            n_fft * interp >= 2 * max_lag + 1 to hold all the lags
+        hop (int): the hop between frames (n_fft // 2 by default)
+        interp (int): the upsampling factor of the GCC-PHAT lags
+        steering_cache (micarraylib.steering.SteeringCache): cache
+            of the TDOAs (None to compute them)
+        c (float): the speed of sound (meters per second). It must
+            be the speed of sound of steering_cache, if one is given
+
+    Attributes:
+        directions (np.array): (directions, 2) directions of the map
+        fs (int): the sampling rate of the audio
+        n_fft (int): the size of the FFT
+        hop (int): the hop between frames
+        interp (int): the upsampling factor of the GCC-PHAT lags
+        pairs (np.array): (pairs, 2) indexes of the capsules of each pair
+        max_lag (int): the largest GCC-PHAT lag used (samples / interp)
+        lag_index (np.array): (directions, pairs) index of the
+            GCC-PHAT lag of each direction and pair
+    """
+
+    def __init__(
+        self,
+        array,
+        directions,
+        fs,
+        n_fft=1024,
+        hop=None,
+        interp=1,
+        steering_cache=None,
+        c=SPEED_OF_SOUND,
+    ):
+        coords = _array_coords(array)
+        if len(coords) < 2:
+            raise ValueError("SRP-PHAT needs at least two capsules")
+        if steering_cache != None and steering_cache.c != c:
+            raise ValueError(
+                "c is {}, but the speed of sound of steering_cache is {}".format(
+                    c, steering_cache.c
+                )
+            )
+        if steering_cache != None:
+            self.directions = steering_cache.directions(directions)
+            table = steering_cache.tdoas(coords, directions)
+        else:
+            if isinstance(directions, tuple):
+                directions = direction_grid(*directions)
+            self.directions = np.asarray(directions, dtype=float).reshape(-1, 2)
+            table = tdoas(coords, self.directions, c)
+        self.fs = fs
+        self.n_fft = n_fft
+        self.hop = hop if hop != None else n_fft // 2
+        self.interp = interp
+        self.pairs = np.stack(np.triu_indices(len(coords), 1), -1)
+        lags = np.rint(table * fs * interp).astype(int)
+        self.max_lag = int(np.max(np.abs(lags)))
+        if 2 * self.max_lag + 1 > n_fft * interp:
+            raise ValueError(
+                "n_fft is {}, but the GCC-PHAT lags of the array need n_fft >= {}".format(
+                    n_fft, -(-(2 * self.max_lag + 1) // interp)
+                )
+            )
+        self.lag_index = lags + self.max_lag
+        self.lag_index.flags.writeable = False
+        # the map is the product of the GCC-PHAT of all pairs and lags
+        # with a sparse matrix that selects and averages, for each
+        # direction, the lag of each pair in lag_index
+        from scipy import sparse
+
+        n_directions, n_pairs = self.lag_index.shape
+        n_lags = 2 * self.max_lag + 1
+        self._selection = sparse.csr_matrix(
+            (
+                np.full(self.lag_index.size, 1 / n_pairs, dtype=np.float32),
+                (
+                    np.repeat(np.arange(n_directions), n_pairs),
+                    (np.arange(n_pairs) * n_lags + self.lag_index).ravel(),
+                ),
+            ),
+            shape=(n_directions, n_pairs * n_lags),
+        )
+
+    def maps(self, audio, block_size=1 << 22):
+        """
+        computes the SRP-PHAT map of each frame of the audio
+
+        Args:
+            audio (np.array or micarraylib.utils.MappedAudio):
+                (capsules, samples) A-format audio, with capsules
+                ordered like the array's coordinates
+            block_size (int): the number of cross-spectrum bins
+                (pairs * frames * frequencies) computed at once.
+                The STFT is computed in the same blocks of frames.
+
+        Returns:
+            (frames, directions) float32 array with the map of each
+            frame (the frames are those of features.stft)
+        """
+        if len(audio.shape) != 2 or audio.shape[0] != self.pairs.max() + 1:
+            raise ValueError(
+                "audio has shape {}, but it should have shape ({}, samples)".format(
+                    audio.shape, self.pairs.max() + 1
+                )
+            )
+        n_bins = self.n_fft // 2 + 1
+        block_frames = max(1, block_size // (len(self.pairs) * n_bins))
+        out = np.empty(
+            (1 + audio.shape[1] // self.hop, len(self.directions)), dtype=np.float32
+        )
+        for first, spectrum in stft_blocks(audio, self.n_fft, self.hop, block_frames):
+            cc = gcc_phat(spectrum, self.pairs, self.max_lag, self.interp)
+            # (frames, pairs * lags) rows of the GCC-PHAT of each frame
+            cc = np.ascontiguousarray(np.transpose(cc, (1, 0, 2)))
+            power = self._selection @ cc.reshape(len(cc), -1).T
+            out[first : first + len(cc)] = power.T
+        return out
+
+    def doa(self, audio, block_size=1 << 22):
+        """
+        estimates the direction of arrival of each frame
+        of the audio as the peak of its SRP-PHAT map
+
+        Args:
+            audio (np.array): (capsules, samples) A-format audio
+            block_size (int): see maps
+
+        Returns:
+            (frames, 2) array with the colatitude and azimuth
+            (radians) of the peak of each frame
+        """
+        return self.directions[np.argmax(self.maps(audio, block_size), axis=1)]
@@ -0,0 +1,337 @@
+import hashlib
+import numpy as np
+from micarraylib.arraycoords.core import micarray, SPEED_OF_SOUND
+from micarraylib.arraycoords.array_shapes_utils import _polar2cart_array
+from micarraylib.cache import DiskCache, MemoryCache, cache_key
+
+GRID_KINDS = ["fibonacci", "equiangular"]
+
+
+def direction_grid(kind, n):
+    """
+    computes a grid of directions on the sphere
+
+    Args:
+        kind (str): the kind of grid. 'fibonacci' for n nearly
+            uniformly spaced directions (a Fibonacci lattice),
+            'equiangular' for n colatitudes times 2n azimuths
+        n (int): the size of the grid
+
+    Returns:
+        a numpy array of shape (directions, 2) with the
+        colatitude and azimuth of each direction (radians)
+    """
+    if kind not in GRID_KINDS:
+        raise ValueError(
+            "kind is {}, but it should be one of {}".format(kind, ", ".join(GRID_KINDS))
+        )
+    if int(n) != n or n < 1:
+        raise ValueError("n is {}, but it should be a positive integer".format(n))
+    if kind == "fibonacci":
+        i = np.arange(n) + 0.5
+        colatitude = np.arccos(1 - 2 * i / n)
+        azimuth = np.mod(np.pi * (1 + np.sqrt(5)) * i, 2 * np.pi)
+        return np.column_stack([colatitude, azimuth])
+    colatitude = (np.arange(n) + 0.5) * np.pi / n
+    azimuth = np.arange(2 * n) * np.pi / n
+    colatitude, azimuth = np.meshgrid(colatitude, azimuth, indexing="ij")
+    return np.column_stack([colatitude.ravel(), azimuth.ravel()])
+
+
+def steering_vectors(coords, directions, fs, n_fft, c=SPEED_OF_SOUND):
+    """
+    computes the far-field (plane wave) steering vectors of
+    the capsules of an array at the frequencies of the bins
+    of a real FFT
+
+    Args:
+        coords (np.array): (capsules, 3) cartesian coordinates of
+            the capsules (meters) with the array's center at the origin
+        directions (np.array): (directions, 2) colatitude and
+            azimuth (radians) of the directions of arrival
+        fs (int): the sampling rate
+        n_fft (int): the size of the FFT
+        c (float): the speed of sound (meters per second)
+
+    Returns:
+        a complex64 numpy array of shape (directions, capsules,
+        n_fft // 2 + 1) with the phase of a plane wave arriving
+        from each direction at each capsule and frequency, relative
+        to the center of the array
+    """
+    coords = np.asarray(coords, dtype=float)
+    directions = np.asarray(directions, dtype=float).reshape(-1, 2)
+    units = _polar2cart_array(
+        np.column_stack([directions, np.ones(len(directions))]), "radians"
+    )
+    # capsules closer to the source receive the wave earlier
+    advance = units @ coords.T / c
+    omega = 2 * np.pi * np.fft.rfftfreq(n_fft, 1 / fs)
+    out = np.empty((len(directions), len(coords), len(omega)), dtype=np.complex64)
+    # blocks of directions keep the complex128 temporaries small
+    for d in range(0, len(directions), 64):
+        out[d : d + 64] = np.exp(1j * advance[d : d + 64, :, np.newaxis] * omega)
+    return out
+
+
+def tdoas(coords, directions, c=SPEED_OF_SOUND):
+    """
+    computes the time differences of arrival of plane
+    waves at every pair of capsules of an array
+
+    Args:
+        coords (np.array): (capsules, 3) cartesian coordinates
+            of the capsules (meters)
+        directions (np.array): (directions, 2) colatitude and
+            azimuth (radians) of the directions of arrival
+        c (float): the speed of sound (meters per second)
+
+    Returns:
+        a numpy array of shape (directions, pairs) with the time
+        (seconds) that the first capsule of each pair lags behind
+        the second one. The pairs (i, j), i < j, are ordered like
+        the pairs of arraycoords.CapsulePairs.
+    """
+    coords = np.asarray(coords, dtype=float)
+    directions = np.asarray(directions, dtype=float).reshape(-1, 2)
+    units = _polar2cart_array(
+        np.column_stack([directions, np.ones(len(directions))]), "radians"
+    )
+    i, j = np.triu_indices(len(coords), 1)
+    return units @ (coords[j] - coords[i]).T / c
+
+
+def sh_matrix(directions, N):
+    """
+    computes the real spherical harmonics matrix of
+    order N (the matrix that utils.a2b inverts) on
+    a set of directions
+
+    Args:
+        directions (np.array): (directions, 2) colatitude
+            and azimuth (radians)
+        N (int): the spherical harmonics order
+
+    Returns:
+        a numpy array of shape (directions, (N+1)^2)
+    """
+    from spaudiopy import sph
+
+    directions = np.asarray(directions, dtype=float).reshape(-1, 2)
+    return sph.sh_matrix(N, directions[:, 1], directions[:, 0], "real")
+
+
+class SteeringCache:
+    """
+    Cache of the geometry-level matrices used for beamforming,
+    steered response power maps and plane-wave decomposition:
+    direction grids, steering vectors, time differences of
+    arrival and spherical harmonics matrices. The matrices are
+    computed once per array, grid, sampling rate, FFT size and
+    order, and kept in memory as read-only arrays. If a path
+    is given they are also stored there as .npy files that are
+    memory-mapped, so many worker processes share one copy
+    of them.
+
+    Args:
+        path (str): directory where the matrices are stored
+            (None to keep them only in memory)
+        memory_size (int): the size budget of the matrices kept
+            in memory, in bytes (None for no budget)
+        c (float): the speed of sound (meters per second)
+
+    Attributes:
+        c (float): the speed of sound (meters per second)
+        memory_cache (micarraylib.cache.MemoryCache): the
+            matrices kept in memory
+        disk_cache (micarraylib.cache.DiskCache): the matrices
+            stored in path (None if there is no path)
+    """
+
+    def __init__(self, path=None, memory_size=None, c=SPEED_OF_SOUND):
+        self.c = c
+        self.memory_cache = MemoryCache(
+            memory_size if memory_size != None else float("inf")
+        )
+        self.disk_cache = DiskCache(path) if path != None else None
+
+    def directions(self, grid):
+        """
+        get the directions of a grid
+
+        Args:
+            grid (tuple or np.array): a (kind, n) grid spec
+                (see direction_grid) or a (directions, 2) array
+                with colatitude and azimuth (radians)
+
+        Returns:
+            read-only (directions, 2) array
+        """
+        if not isinstance(grid, tuple):
+            directions = np.array(grid, dtype=float).reshape(-1, 2)
+            directions.flags.writeable = False
+            return directions
+        return self._get(
+            dict(matrix="grid", grid=list(grid)), lambda: direction_grid(*grid)
+        )
+
+    def steering_vectors(self, array, grid, fs, n_fft):
+        """
+        get the steering vectors of an array on a grid
+        of directions (see steering.steering_vectors)
+
+        Args:
+            array (micarray, str or np.array): the array, the name
+                of a registered array or the (capsules, 3) cartesian
+                coordinates of its capsules (meters, centered)
+            grid (tuple or np.array): a (kind, n) grid spec or a
+                (directions, 2) array of directions
+            fs (int): the sampling rate
+            n_fft (int): the size of the FFT
+
+        Returns:
+            read-only complex64 array of shape
+            (directions, capsules, n_fft // 2 + 1)
+        """
+        coords = _array_coords(array)
+        directions = self.directions(grid)
+        return self._get(
+            dict(
+                matrix="steering_vectors",
+                coords=_digest(coords),
+                grid=_grid_key(grid, directions),
+                fs=fs,
+                n_fft=n_fft,
+                c=self.c,
+            ),
+            lambda: steering_vectors(coords, directions, fs, n_fft, self.c),
+        )
+
+    def tdoas(self, array, grid):
+        """
+        get the time differences of arrival at the pairs
+        of capsules of an array on a grid of directions
+        (see steering.tdoas)
+
+        Args:
+            array (micarray, str or np.array): the array, the name
+                of a registered array or the (capsules, 3) cartesian
+                coordinates of its capsules (meters, centered)
+            grid (tuple or np.array): a (kind, n) grid spec or a
+                (directions, 2) array of directions
+
+        Returns:
+            read-only array of shape (directions, pairs)
+        """
+        coords = _array_coords(array)
+        directions = self.directions(grid)
+        return self._get(
+            dict(
+                matrix="tdoas",
+                coords=_digest(coords),
+                grid=_grid_key(grid, directions),
+                c=self.c,
+            ),
+            lambda: tdoas(coords, directions, self.c),
+        )
+
+    def sh_matrix(self, grid, N):
+        """
+        get the real spherical harmonics matrix of
+        order N on a grid of directions
+
+        Args:
+            grid (tuple or np.array): a (kind, n) grid spec or a
+                (directions, 2) array of directions
+            N (int): the spherical harmonics order
+
+        Returns:
+            read-only array of shape (directions, (N+1)^2)
+        """
+        directions = self.directions(grid)
+        return self._get(
+            dict(matrix="sh_matrix", grid=_grid_key(grid, directions), N=N),
+            lambda: sh_matrix(directions, N),
+        )
+
+    def clear(self):
+        """
+        remove all the matrices in the cache
+        (including the ones stored in path)
+        """
+        self.memory_cache.clear()
+        if self.disk_cache != None:
+            self.disk_cache.clear()
+
+    def _get(self, fields, compute):
+        """
+        get a matrix from memory, from the disk (memory-mapped)
+        or computing it, and keep it in memory
+
+        Args:
+            fields (dict): the fields that determine the matrix
+            compute (function): function that computes the matrix
+
+        Returns:
+            the read-only matrix
+        """
+        key = cache_key(**fields)
+        matrix = self.memory_cache.get(key)
+        if matrix is not None:
+            return matrix
+        if self.disk_cache != None:
+            matrix = self.disk_cache.get(key, mmap=True)
+            if matrix is None:
+                self.disk_cache.put(key, compute())
+                matrix = self.disk_cache.get(key, mmap=True)
+        if matrix is None:
+            matrix = compute()
+        self.memory_cache.put(key, matrix)
+        return matrix
+
+
+def _array_coords(array):
+    """
+    get the cartesian coordinates of the capsules of an array
+
+    Args:
+        array (micarray, str or np.array): the array, the name
+            of a registered array or the (capsules, 3) cartesian
+            coordinates of its capsules
+
+    Returns:
+        (capsules, 3) array
+    """
+    if isinstance(array, str):
+        from micarraylib.arraycoords import get_array
+
+        array = get_array(array)
+    if isinstance(array, micarray):
+        return array.standard_coords_array("cartesian")
+    coords = np.asarray(array, dtype=float)
+    if coords.ndim != 2 or coords.shape[1] != 3:
+        raise ValueError(
+            "the coordinates have shape {}, but they should have shape (capsules, 3)".format(
+                coords.shape
+            )
+        )
+    return coords
+
+
+def _grid_key(grid, directions):
+    """
+    the part of the cache key that identifies a grid
+    """
+    if isinstance(grid, tuple):
+        return list(grid)
+    return _digest(directions)
+
+
+def _digest(array):
+    """
+    the sha256 hex digest of the content of an array
+    """
+    array = np.ascontiguousarray(array, dtype=float)
+    digest = hashlib.sha256(str(array.shape).encode("utf-8"))
+    digest.update(array.tobytes())
+    return digest.hexdigest()
@@ -1,11 +1,141 @@
-from spaudiopy import sph
 import numpy as np
 import warnings
-import librosa
+import soundfile as sf
+import threading
+import inspect
+import struct
+import sys
+import math
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
 
+# librosa, scipy.signal and spaudiopy are slow to import, so
+# they are imported by the functions that use them
 
-def a2b(N, audio_numpy, capsule_coords):
+logger = logging.getLogger(__name__)
+
+
+class ClipIndex:
+    """
+    A lazily built, thread-safe index of the soundata
+    Clip objects of a dataset. A Clip is only created
+    the first time its clip_id is looked up, and it is
+    reused in every later lookup.
+
+    Args:
+        dataset (soundata.Dataset): the soundata dataset
+            where the clips can be loaded from
+
+    Attributes:
+        dataset (soundata.Dataset): the soundata dataset
+            where the clips can be loaded from
+        sr (int): the sampling rate that soundata's loader
+            decodes the clips at (None if it keeps the
+            native sampling rate of each file)
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.sr = _loader_sr(dataset)
+        self._clips = {}
+        self._clip_ids = None
+        self._lock = threading.Lock()
+
+    def __getitem__(self, clip_id):
+        clip = self._clips.get(clip_id)
+        if clip is None:
+            with self._lock:
+                clip = self._clips.get(clip_id)
+                if clip is None:
+                    clip = self.dataset.clip(clip_id)
+                    self._clips[clip_id] = clip
+        return clip
+
+    def __contains__(self, clip_id):
+        if self._clip_ids is None:
+            self._clip_ids = frozenset(self.dataset.clip_ids)
+        return clip_id in self._clip_ids
+
+    def __len__(self):
+        return len(self._clips)
+
+    def load_clips(self, clip_ids=None):
+        """
+        get the Clip objects of several clip_ids
+
+        Args:
+            clip_ids (list): the clip_ids to look up. If None,
+                every clip in the dataset is built (like
+                soundata's load_clips)
+
+        Returns:
+            a dictionary with clip_ids and soundata Clip objects
+        """
+        if clip_ids is None:
+            clip_ids = self.dataset.clip_ids
+        return {c: self[c] for c in clip_ids}
+
+
+class MappedAudio:
+    """
+    Memory-mapped view of the samples of uncompressed
+    WAV files (one per clip, with their channels stacked).
+    Nothing is decoded until the view is indexed, and
+    then only the requested frames are read from disk
+    and scaled to floating point.
+
+    Args:
+        paths (list): the paths to the WAV files
+        start (float): time in seconds where the view starts
+            (None for the beginning of the files)
+        stop (float): time in seconds where the view ends
+            (None for the end of the files)
 
+    Attributes:
+        shape (tuple): the (channels, frames) shape of the audio
+        fs (int): the native sampling rate of the audio
+        dtype (np.dtype): the dtype of the scaled audio (float32)
+    """
+
+    def __init__(self, paths, start=None, stop=None):
+        layouts = [_wav_layout(p) for p in paths]
+        frames = set([l["frames"] for l in layouts])
+        fs = set([l["fs"] for l in layouts])
+        if len(frames) > 1 or len(fs) > 1:
+            raise ValueError(
+                "all clips in a recording should have the same length and sampling rate, but their lengths are {} and their sampling rates are {}".format(
+                    frames, fs
+                )
+            )
+        self.fs = fs.pop()
+        first, last = _frame_range(start, stop, self.fs, frames.pop())
+        self._maps = [
+            (_wav_memmap(p, l)[first:last], l) for p, l in zip(paths, layouts)
+        ]
+        self.shape = (sum([l["channels"] for l in layouts]), last - first)
+        self.dtype = np.dtype(np.float32)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 2:
+            raise IndexError("MappedAudio has only 2 dimensions")
+        frame_key = key[1] if len(key) == 2 else slice(None)
+        audio = np.concatenate(
+            [np.moveaxis(_wav_to_float(m[frame_key], l), -1, 0) for m, l in self._maps]
+        )
+        return audio[key[0]]
+
+    def __array__(self, dtype=None):
+        audio = self[:, :]
+        return audio if dtype is None else audio.astype(dtype)
+
+
+def a2b(N, audio_numpy, capsule_coords):
     """
     encodes recordings from microphone array
     capsules (raw A-format) to B-format
@@ -23,40 +153,605 @@ def a2b(N, audio_numpy, capsule_coords):
         a numpy array with the encoded B format
     """
 
+    return np.dot(_a2b_matrix(N, capsule_coords), audio_numpy)
+
+
+def _a2b_matrix(N, capsule_coords):
+    """
+    computes the matrix that encodes A-format
+    audio to B-format of order N (the pseudo_inverse
+    of the spherical harmonics matrix)
+
+    Args:
+        N (int): the order of B format
+        capsule_coords (dict): dictionary with channel names and
+            corresponding coordinates in polar form (colatitude
+            and azimuth in radians)
+
+    Returns:
+        a numpy array of shape ((N+1)^2, capsules)
+    """
+    from spaudiopy import sph
+
     coords_numpy = np.array([c for c in capsule_coords.values()])
     SH = sph.sh_matrix(N, coords_numpy[:, 1], coords_numpy[:, 0], "real")
-    Y = np.linalg.pinv(SH)
-    return np.dot(Y, audio_numpy)
+    return np.linalg.pinv(SH)
 
 
-def _get_audio_numpy(
-    clip_names, dataset, fmt_in, fmt_out, capsule_coords=None, N=None, fs=None
-):
+class A2BEncoder:
+    """
+    Encodes recordings from microphone array
+    capsules (raw A-format) to B-format ambisonics
+    of order N. The encoding matrix (the pseudo_inverse
+    of the spherical harmonics matrix) is computed
+    once, when the encoder is created.
 
+    Args:
+        N (int): the order of B format
+        capsule_coords (dict): dictionary with channel names and
+            corresponding coordinates in polar form (colatitude
+            and azimuth in radians)
+
+    Attributes:
+        N (int): the order of B format
+        matrix (np.array): the read-only encoding matrix,
+            of shape ((N+1)^2, capsules)
     """
-    combine clips that correspond to a multitrack recording
-    into a numpy array and return it in A or B format.
+
+    def __init__(self, N, capsule_coords):
+        self.N = N
+        self.matrix = _a2b_matrix(N, capsule_coords)
+        self.matrix.flags.writeable = False
+        self._matrix32 = self.matrix.astype(np.float32)
+        self._matrix32.flags.writeable = False
+
+    def encode(self, audio, out=None):
+        """
+        encode A-format audio to B-format. float32 audio
+        is encoded in single precision and anything else
+        in double precision.
+
+        Args:
+            audio (np.array): the A-format audio, of shape
+                (capsules, frames)
+            out (np.array): optional array of shape
+                ((N+1)^2, frames) where the B-format is written
+
+        Returns:
+            a numpy array with the encoded B format
+        """
+        if audio.dtype == np.float32:
+            matrix = self._matrix32
+        else:
+            matrix = self.matrix
+            audio = audio.astype(np.float64, copy=False)
+        return np.matmul(matrix, np.ascontiguousarray(audio), out=out)
+
+    def encode_batch(self, audio, out=None):
+        """
+        encode a batch of A-format recordings to B-format
+        with a single matmul
+
+        Args:
+            audio (np.array or list): array of shape
+                (batch, capsules, frames), or list of arrays of
+                shape (capsules, frames) that may have different
+                numbers of frames
+            out (np.array): optional array of shape
+                (batch, (N+1)^2, frames) where the B-format is
+                written (only for audio in a single array)
+
+        Returns:
+            a numpy array of shape (batch, (N+1)^2, frames), or
+            a list with the B-format of each recording if audio
+            is a list
+        """
+        if isinstance(audio, np.ndarray):
+            return self.encode(audio, out)
+        if out is not None:
+            raise ValueError(
+                "out can only be used when the audio of the batch is in a single array"
+            )
+        frames = np.cumsum([a.shape[-1] for a in audio])
+        encoded = self.encode(np.concatenate(audio, axis=-1))
+        return np.split(encoded, frames[:-1], axis=-1)
+
+
+def a2b_batch(N, audio_stack, capsule_coords):
+    """
+    encodes a batch of recordings from microphone
+    array capsules (raw A-format) to B-format
+    ambisonics, computing the encoding matrix once
 
     Args:
-        clip_names (list): list of strings with names of clips
-            to be loaded (and combined if different clips have
-            the recording by different microphone capsules).
-        dataset (soundata.Dataset): the soundata dataset where
-            the clips can be loaded from
-        fmt_in (str): whether the clips originally are in A or B
-            format
-        fmt_out (str): the target format (A or B). Currently it only
-            works A->B
+        N (int): the order of B format
+        audio_stack (np.array or list): array of shape
+            (batch, capsules, frames), or list of arrays
+            of shape (capsules, frames)
         capsule_coords (dict): dictionary with channel names and
             corresponding coordinates in polar form (colatitude
             and azimuth in radians)
+
+    Returns:
+        the encoded B format (see A2BEncoder.encode_batch)
+    """
+
+    return A2BEncoder(N, capsule_coords).encode_batch(audio_stack)
+
+
+def _get_a2b_encoder(encoders, N, capsule_coords):
+    """
+    get the A2BEncoder of order N for some capsule
+    coordinates from a cache of encoders, creating
+    it if it is not in the cache yet
+
+    Args:
+        encoders (dict): the cache of encoders (or None to
+            create an encoder without caching it)
         N (int): the order of B format
-        fs (int): the target sampling rate
+        capsule_coords (dict): dictionary with channel names and
+            corresponding coordinates in polar form (colatitude
+            and azimuth in radians)
 
     Returns:
-        audio_array (np.array): the numpy array with the audio
+        the A2BEncoder
+    """
+    if encoders is None:
+        return A2BEncoder(N, capsule_coords)
+    key = (N, tuple((c, tuple(v)) for c, v in capsule_coords.items()))
+    encoder = encoders.get(key)
+    if encoder is None:
+        encoder = encoders.setdefault(key, A2BEncoder(N, capsule_coords))
+    return encoder
+
+
+# the polyphase filters of each resampling quality: number of
+# zero crossings on each side, kaiser window beta and rolloff
+# (cutoff relative to the lower Nyquist frequency). "fast" is
+# scipy.signal.resample_poly's default filter, and "medium" and
+# "high" follow resampy's kaiser_fast and kaiser_best filters
+RESAMPLE_FILTERS = {
+    "fast": (10, 5.0, 1.0),
+    "medium": (16, 8.555, 0.85),
+    "high": (64, 14.77, 0.9475937167399596),
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _resample_filter(fs_in, fs_out, quality):
+    """
+    design (once) the polyphase filter that
+    resamples audio from fs_in to fs_out
+
+    Args:
+        fs_in (int): the sampling rate of the input
+        fs_out (int): the sampling rate of the output
+        quality (str): one of RESAMPLE_FILTERS
+
+    Returns:
+        tuple with
+            1) the upsampling factor
+            2) the downsampling factor
+            3) the read-only FIR filter
+    """
+    if quality not in RESAMPLE_FILTERS:
+        raise ValueError(
+            "quality is {}, but it should be one of kaiser_best, {}".format(
+                quality, ", ".join(RESAMPLE_FILTERS)
+            )
+        )
+    g = math.gcd(int(fs_in), int(fs_out))
+    up, down = int(fs_out) // g, int(fs_in) // g
+    zeros, beta, rolloff = RESAMPLE_FILTERS[quality]
+    max_rate = max(up, down)
+    import scipy.signal
+
+    h = scipy.signal.firwin(
+        2 * zeros * max_rate + 1, rolloff / max_rate, window=("kaiser", beta)
+    )
+    h.flags.writeable = False
+    return up, down, h
+
+
+def resample(audio, fs_in, fs_out, quality="kaiser_best"):
+    """
+    resamples audio (with any number of channels
+    along the first axes) from fs_in to fs_out
+
+    Args:
+        audio (np.array): the audio, with the time
+            in the last axis
+        fs_in (int): the sampling rate of the audio
+        fs_out (int): the target sampling rate
+        quality (str): "kaiser_best" (the default) resamples
+            with librosa.resample, as in previous versions.
+            "fast", "medium" and "high" apply a rational
+            polyphase filter (see RESAMPLE_FILTERS) that is
+            designed once per (fs_in, fs_out, quality) and
+            applied to all the channels at once
+
+    Returns:
+        a numpy array with the resampled audio
+    """
+
+    if fs_in == fs_out:
+        return audio
+    if quality == "kaiser_best":
+        import librosa
+
+        if audio.ndim > 1 and audio.size == audio.shape[-1]:
+            # librosa only takes one channel as a 1-D array
+            resampled = librosa.resample(audio.reshape(-1), fs_in, fs_out)
+            return resampled.reshape(audio.shape[:-1] + resampled.shape)
+        return librosa.resample(audio, fs_in, fs_out)
+    import scipy.signal
+
+    up, down, h = _resample_filter(fs_in, fs_out, quality)
+    resampled = scipy.signal.resample_poly(audio, up, down, axis=-1, window=h)
+    return resampled.astype(audio.dtype, copy=False)
+
+
+class _StreamResampler:
+    """
+    Resamples audio that arrives in consecutive chunks
+    with a polyphase FIR filter. The filter state (the
+    last input samples) is kept between chunks, so the
+    concatenated output is the same as resampling the
+    whole signal at once with resample
+
+    Args:
+        fs_in (int): the sampling rate of the input
+        fs_out (int): the sampling rate of the output
+        quality (str): one of RESAMPLE_FILTERS
+    """
+
+    def __init__(self, fs_in, fs_out, quality="fast"):
+        self.up, self.down, h = _resample_filter(fs_in, fs_out, quality)
+        half_len = (len(h) - 1) // 2
+        pre_pad = self.down - half_len % self.down
+        self._h = np.concatenate((np.zeros(pre_pad), h * self.up))
+        self._pre_remove = (half_len + pre_pad) // self.down
+        self._next = self._pre_remove
+        self._buffer = None
+        self._first = 0
+        self._n_in = 0
+
+    def process(self, audio, final=False):
+        """
+        resample the next chunk of audio
+
+        Args:
+            audio (np.array): the next chunk, of shape
+                (channels, frames)
+            final (bool): whether this is the last chunk (the
+                output then includes the tail of the filter)
+
+        Returns:
+            numpy array of shape (channels, frames) with the
+            resampled audio available so far
+        """
+        if self._buffer is not None:
+            audio = np.concatenate((self._buffer, audio), axis=-1)
+        self._n_in = self._first + audio.shape[-1]
+        if final:
+            stop = self._pre_remove + -(-self._n_in * self.up // self.down)
+        else:
+            stop = (self._n_in * self.up - 1) // self.down + 1
+        resampled = np.zeros(audio.shape[:-1] + (max(stop - self._next, 0),))
+        if resampled.shape[-1] > 0:
+            import scipy.signal
+
+            y = scipy.signal.upfirdn(self._h, audio, self.up, self.down, axis=-1)
+            y = y[..., self._next - self._first * self.up // self.down :]
+            y = y[..., : resampled.shape[-1]]
+            resampled[..., : y.shape[-1]] = y
+            self._next = stop
+        # keep the input samples that later outputs depend on
+        needed = -(-(self._next * self.down - len(self._h) + 1) // self.up)
+        first = min(max(needed, 0), self._n_in) // self.down * self.down
+        self._buffer = audio[..., first - self._first :]
+        self._first = first
+        return resampled.astype(audio.dtype)
+
+
+def _loader_sr(dataset):
+    """
+    get the sampling rate that the soundata loader of
+    a dataset decodes the audio files at
+
+    Args:
+        dataset (soundata.Dataset): the soundata dataset
+
+    Returns:
+        the sampling rate (None if the loader keeps the
+        native sampling rate of each file)
+    """
+    load_audio = getattr(sys.modules[type(dataset).__module__], "load_audio", None)
+    if load_audio is None:
+        return None
+    sr = inspect.signature(load_audio).parameters.get("sr")
+    return None if sr is None else sr.default
+
+
+def _frame_range(start, stop, fs, frames):
+    """
+    convert a time range to a range of frames
+
+    Args:
+        start (float): time in seconds where the range starts
+            (None for the beginning of the audio)
+        stop (float): time in seconds where the range ends
+            (None for the end of the audio)
+        fs (int): the sampling rate of the audio
+        frames (int): the number of frames in the audio
+
+    Returns:
+        tuple with the first frame in the range and
+        the frame after the last one
+    """
+    first = 0 if start is None else int(round(start * fs))
+    last = frames if stop is None else min(int(round(stop * fs)), frames)
+    if first < 0 or first >= last:
+        raise ValueError(
+            "start and stop should select audio within the {} seconds of the recording, but start is {} and stop is {}".format(
+                frames / fs, start, stop
+            )
+        )
+    return first, last
+
+
+def _audio_info(clip, sr=None, start=None, stop=None):
+    """
+    read the header of a clip's audio file to learn
+    the shape of its audio without decoding it
+
+    Args:
+        clip (soundata.Clip): the clip
+        sr (int): the sampling rate the audio is decoded
+            at (None for the file's native sampling rate)
+        start (float): time in seconds where the audio starts
+        stop (float): time in seconds where the audio ends
+
+    Returns:
+        tuple with the number of channels, the number
+        of frames and the sampling rate of the decoded audio
+    """
+    info = sf.info(clip.audio_path)
+    first, last = _frame_range(start, stop, info.samplerate, info.frames)
+    if sr is None or sr == info.samplerate:
+        return info.channels, last - first, info.samplerate
+    return info.channels, int(np.ceil((last - first) * sr / info.samplerate)), sr
+
+
+def _read_audio(clip, out, sr=None, start=None, stop=None, block_size=65536):
+    """
+    decode a clip's audio in place, the way soundata's
+    loader does (librosa.load with mono=False). Only the
+    frames between start and stop are read from the file.
+
+    Args:
+        clip (soundata.Clip): the clip
+        out (np.array): array of shape (channels, frames)
+            where the audio is written
+        sr (int): the sampling rate the audio is decoded
+            at (None for the file's native sampling rate)
+        start (float): time in seconds where the audio starts
+        stop (float): time in seconds where the audio ends
+        block_size (int): number of frames decoded at a
+            time when the audio is copied into out
+    """
+    with sf.SoundFile(clip.audio_path) as f:
+        first, last = _frame_range(start, stop, f.samplerate, f.frames)
+        f.seek(first)
+        if sr is not None and sr != f.samplerate:
+            audio = f.read(last - first, dtype="float32", always_2d=True).T
+            if f.channels == 1:
+                audio = audio[0]
+            import librosa
+
+            out[:] = librosa.resample(audio, f.samplerate, sr)
+        elif f.channels == 1 and out.dtype == np.float32 and out.flags.c_contiguous:
+            f.read(dtype="float32", out=out[0])
+        else:
+            block = np.empty((min(block_size, last - first), f.channels), np.float32)
+            for i in range(0, last - first, block_size):
+                audio = f.read(
+                    dtype="float32", out=block[: min(block_size, last - first - i)]
+                )
+                out[:, i : i + len(audio)] = audio.T
+
+
+def _clips_layout(clips, sr=None, start=None, stop=None):
+    """
+    read the audio file headers of the clips in a
+    recording to learn the shape of its audio without
+    decoding it
+
+    Args:
+        clips (list): the soundata Clip objects
+        sr (int): the sampling rate the audio is decoded
+            at (None for the native sampling rate)
+        start (float): time in seconds where the audio starts
+        stop (float): time in seconds where the audio ends
+
+    Returns:
+        tuple with
+            1) numpy array with the first row of each clip
+                in the recording (and the total number of
+                channels as its last element)
+            2) the number of frames in the recording
+            3) the sampling rate of the recording
+    """
+    channels, frames, audio_fs = zip(
+        *[_audio_info(clip, sr, start, stop) for clip in clips]
+    )
+    if len(set(frames)) > 1 or len(set(audio_fs)) > 1:
+        raise ValueError(
+            "all clips in a recording should have the same length and sampling rate, but their lengths are {} and their sampling rates are {}".format(
+                frames, audio_fs
+            )
+        )
+    return np.cumsum((0,) + channels), frames[0], audio_fs[0]
+
+
+def _decode_clips(clips, rows, out, sr=None, workers=None, start=None, stop=None):
+    """
+    decode the audio of several clips in place,
+    into their rows of a single array
+
+    Args:
+        clips (list): the soundata Clip objects to decode
+        rows (np.array): the first row of each clip in out
+            (as returned by _clips_layout)
+        out (np.array): array of shape (channels, frames)
+            to decode the audio into
+        sr (int): the sampling rate the audio is decoded
+            at (None for the native sampling rate)
+        workers (int): number of threads used to decode the
+            clips concurrently (None or 1 decodes them one
+            after another)
+        start (float): time in seconds where the audio starts
+        stop (float): time in seconds where the audio ends
+    """
+
+    def decode(i):
+        _read_audio(clips[i], out[rows[i] : rows[i + 1]], sr, start, stop)
+
+    if workers is None or workers <= 1 or len(clips) == 1:
+        for i in range(len(clips)):
+            decode(i)
+    else:
+        with ThreadPoolExecutor(min(workers, len(clips))) as pool:
+            list(pool.map(decode, range(len(clips))))
+
+
+def _check_out(out, shape):
+    """
+    check that a user-provided output array can hold
+    audio of a given shape
+
+    Args:
+        out (np.array): the output array
+        shape (tuple): the shape of the audio, with
+            or without its dimensions of length 1
+
+    Returns:
+        a view of out with the given shape
+    """
+    if out.shape != shape and out.shape != np.squeeze(np.empty(shape, bool)).shape:
+        raise ValueError(
+            "out should have shape {} but its shape is {}".format(shape, out.shape)
+        )
+    if not np.issubdtype(out.dtype, np.floating):
+        raise ValueError(
+            "out should have a floating point dtype but it is {}".format(out.dtype)
+        )
+    return out.reshape(shape) if out.shape != shape else out
+
+
+def _wav_layout(path):
+    """
+    parse the header of an uncompressed WAV file to
+    find where and how its samples are stored
+
+    Args:
+        path (str): path to the WAV file
+
+    Returns:
+        a dictionary with the number of channels and frames,
+        the sampling rate, the byte offset of the samples,
+        their width in bytes and their numpy dtype
+    """
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError("{} is not an uncompressed WAV file".format(path))
+        layout = {}
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError("{} has no audio data".format(path))
+            chunk, size = struct.unpack("<4sI", header)
+            if chunk == b"fmt ":
+                fmt = f.read(size)
+                tag, channels, fs, _, block, bits = struct.unpack("<HHIIHH", fmt[:16])
+                if tag == 0xFFFE:
+                    tag = struct.unpack("<H", fmt[24:26])[0]
+                layout.update(channels=channels, fs=fs, width=block // channels)
+                if size % 2:
+                    f.seek(1, 1)
+            elif chunk == b"data":
+                if not layout:
+                    raise ValueError("{} has no fmt chunk".format(path))
+                break
+            else:
+                f.seek(size + size % 2, 1)
+        layout.update(offset=f.tell(), frames=size // block)
+    dtypes = {1: {1: "u1", 2: "<i2", 3: "u1", 4: "<i4"}, 3: {4: "<f4", 8: "<f8"}}
+    if tag not in dtypes or layout["width"] not in dtypes[tag]:
+        raise ValueError(
+            "{} should store PCM or floating point samples to be memory-mapped".format(
+                path
+            )
+        )
+    layout.update(dtype=dtypes[tag][layout["width"]], integer=tag == 1)
+    return layout
+
+
+def _wav_memmap(path, layout):
+    """
+    memory-map the samples of an uncompressed WAV file
+
+    Args:
+        path (str): path to the WAV file
+        layout (dict): the layout of the WAV file (as
+            returned by _wav_layout)
+
+    Returns:
+        numpy.memmap of shape (frames, channels), or
+        (frames, channels, 3) for 24 bit samples
+    """
+    shape = (layout["frames"], layout["channels"])
+    if layout["integer"] and layout["width"] == 3:
+        shape += (3,)
+    return np.memmap(path, layout["dtype"], "r", layout["offset"], shape)
+
+
+def _wav_to_float(samples, layout):
+    """
+    scale samples read from a WAV file to float32
+    in the range [-1, 1), like soundfile does
+
+    Args:
+        samples (np.array): the stored samples (24 bit samples
+            have their 3 bytes in the last dimension)
+        layout (dict): the layout of the WAV file (as
+            returned by _wav_layout)
+
+    Returns:
+        numpy array with the scaled samples
+    """
+    if not layout["integer"]:
+        return samples.astype(np.float32)
+    if layout["width"] == 1:
+        return (samples.astype(np.float32) - 128) / 128
+    if layout["width"] == 3:
+        samples = samples.astype(np.int32)
+        samples = samples[..., 0] | samples[..., 1] << 8 | samples[..., 2] << 16
+        return ((samples ^ 0x800000) - 0x800000).astype(np.float32) / 2**23
+    return samples.astype(np.float32) / 2 ** (8 * layout["width"] - 1)
+
+
+def _check_formats(fmt_in, fmt_out, capsule_coords=None):
+    """
+    check that audio can be converted from fmt_in to fmt_out
+
+    Args:
+        fmt_in (str): the format of the clips (A or B)
+        fmt_out (str): the target format (A or B)
+        capsule_coords (dict): the capsule coordinates
+            (needed to convert from A to B format)
     """
-    all_dataset_clip_names = dataset.load_clips()
     if fmt_in not in ["A", "B"] or fmt_out not in ["A", "B"]:
         raise ValueError(
             "the input and output formats should be either 'A' or 'B' but fmt_in is {} and fmt_out is {}".format(
@@ -69,23 +764,355 @@ def _get_audio_numpy(
         raise ValueError(
             "To convert between A and B format you must specify capsule coordinates"
         )
-    audio_data = [all_dataset_clip_names[ac].audio for ac in clip_names]
-    audio_array, audio_fs = list(map(list, zip(*audio_data)))
-    audio_array = np.squeeze(np.array(audio_array))
-    if fmt_out == "B" and N != None and (N + 1) ** 2 > len(audio_array):
+
+
+def _check_order(N, fmt_in, fmt_out, channels):
+    """
+    check the order N of B format against the
+    number of channels being converted
+
+    Args:
+        N (int): the order of B format (or None)
+        fmt_in (str): the format of the clips (A or B)
+        fmt_out (str): the target format (A or B)
+        channels (int): the number of channels in the clips
+    """
+    if fmt_out == "B" and N != None and (N + 1) ** 2 > channels:
         raise ValueError(
             "(N+1)^2 should be less than or equal to the number of capsules being converted to B format, but (N+1)^2 is {} and the number of capsules is {}".format(
-                (N + 1) ** 2, len(audio_array)
+                (N + 1) ** 2, channels
             )
         )
-    audio_fs = audio_fs[0]
-    if fs != None and audio_fs != fs:
-        audio_array = librosa.resample(audio_array, audio_fs, fs)
-    if fmt_in == fmt_out:
-        if N != None:
-            warnings.warn(UserWarning("N parameter was specified but not used"))
-        return audio_array
+    if fmt_in == fmt_out and N != None:
+        warnings.warn(UserWarning("N parameter was specified but not used"))
+
+
+CONVERSION_ORDERS = ["resample_first", "encode_first"]
+
+
+def _conversion_order(order, channels_in, channels_out, stats=None):
+    """
+    choose whether audio that is converted from A to
+    B format is resampled before or after it is encoded.
+    Both steps are linear, so the result is the same, but
+    resampling fewer channels is cheaper.
+
+    Args:
+        order (str): one of CONVERSION_ORDERS, or None to
+            pick the cheaper order
+        channels_in (int): the number of A format channels
+        channels_out (int): the number of B format channels
+        stats (dict): optional count of the conversions done
+            in each order, updated with the chosen order
+
+    Returns:
+        "resample_first" or "encode_first"
+    """
+    if order == None:
+        order = "encode_first" if channels_out < channels_in else "resample_first"
+    elif order not in CONVERSION_ORDERS:
+        raise ValueError(
+            "order is {}, but it should be one of {}".format(
+                order, ", ".join(CONVERSION_ORDERS)
+            )
+        )
+    logger.debug(
+        "A to B conversion of %d channels to %d channels: %s",
+        channels_in,
+        channels_out,
+        order,
+    )
+    if stats is not None:
+        stats[order] = stats.get(order, 0) + 1
+    return order
+
+
+def _get_audio_numpy(
+    clip_names,
+    dataset,
+    fmt_in,
+    fmt_out,
+    capsule_coords=None,
+    N=None,
+    fs=None,
+    workers=None,
+    out=None,
+    mmap=False,
+    start=None,
+    stop=None,
+    encoders=None,
+    quality="kaiser_best",
+    order=None,
+    stats=None,
+):
+    """
+    combine clips that correspond to a multitrack recording
+    into a numpy array and return it in A or B format.
+
+    Args:
+        clip_names (list): list of strings with names of clips
+            to be loaded (and combined if different clips have
+            the recording by different microphone capsules).
+        dataset (ClipIndex or soundata.Dataset): the clip index
+            (or soundata dataset) where the clips can be loaded from
+        fmt_in (str): whether the clips originally are in A or B
+            format
+        fmt_out (str): the target format (A or B). Currently it only
+            works A->B
+        capsule_coords (dict): dictionary with channel names and
+            corresponding coordinates in polar form (colatitude
+            and azimuth in radians)
+        N (int): the order of B format
+        fs (int): the target sampling rate
+        workers (int): number of threads used to decode the
+            clips concurrently (None or 1 decodes them one
+            after another)
+        out (np.array): optional array where the audio is
+            written (with the shape of the returned audio),
+            so that buffers can be reused across calls
+        mmap (bool): if True, return a MappedAudio view of the
+            samples stored in uncompressed WAV files instead of
+            decoding them (no resampling or format conversion)
+        start (float): time in seconds where the audio starts
+            (None for the beginning of the recording). Only the
+            frames between start and stop are decoded, resampled
+            and converted
+        stop (float): time in seconds where the audio ends
+            (None for the end of the recording)
+        encoders (dict): cache of A2BEncoder objects that
+            is reused across calls (None to compute the
+            encoding matrix in every call)
+        quality (str): the quality of the resampling to fs
+            (see resample)
+        order (str): whether the audio is resampled before
+            ("resample_first") or after ("encode_first") it is
+            converted to B format. Both steps are linear, so the
+            order only changes the cost. None picks the order
+            that resamples fewer channels
+        stats (dict): optional count of the A to B conversions
+            done in each order (see _conversion_order)
+
+    Returns:
+        audio_array (np.array): the numpy array with the audio
+            (out, if it was given, or a MappedAudio if mmap is True)
+    """
+    if not isinstance(dataset, ClipIndex):
+        dataset = ClipIndex(dataset)
+    _check_formats(fmt_in, fmt_out, capsule_coords)
+    clips = [dataset[ac] for ac in clip_names]
+    if mmap:
+        audio = MappedAudio([clip.audio_path for clip in clips], start, stop)
+        if fmt_in != fmt_out or out is not None or (fs != None and fs != audio.fs):
+            raise ValueError(
+                "mmap=True returns the stored samples at their native sampling rate ({}), so it cannot resample, convert formats or write into out".format(
+                    audio.fs
+                )
+            )
+        return audio
+    rows, frames, audio_fs = _clips_layout(clips, dataset.sr, start, stop)
+    _check_order(N, fmt_in, fmt_out, rows[-1])
+    resampling = fs != None and audio_fs != fs
+    if out is not None and fmt_in == fmt_out and not resampling:
+        out_array = _check_out(out, (rows[-1], frames))
+        _decode_clips(clips, rows, out_array, dataset.sr, workers, start, stop)
+        return out
+    audio_array = np.empty((rows[-1], frames), dtype=np.float32)
+    _decode_clips(clips, rows, audio_array, dataset.sr, workers, start, stop)
+    audio_array = np.squeeze(audio_array)
+    encoder = None
     if fmt_in == "A" and fmt_out == "B":
         N = int(np.sqrt(len(clip_names)) - 1) if N == None else N
-        audio_array = a2b(N, audio_array, capsule_coords)
-        return audio_array
+        encoder = _get_a2b_encoder(encoders, N, capsule_coords)
+        if resampling:
+            order = _conversion_order(order, rows[-1], (N + 1) ** 2, stats)
+        if not resampling or order == "encode_first":
+            audio_array = encoder.encode(audio_array)
+            encoder = None
+    if resampling:
+        audio_array = resample(audio_array, audio_fs, fs, quality)
+    if encoder is not None:
+        audio_array = encoder.encode(audio_array)
+    if out is not None:
+        _check_out(out, audio_array.shape)[...] = audio_array
+        return out
+    return audio_array
+
+
+def _iter_audio_blocks(
+    clip_names,
+    dataset,
+    fmt_in,
+    fmt_out,
+    capsule_coords=None,
+    N=None,
+    fs=None,
+    block_size=65536,
+    hop=None,
+    chunk_size=65536,
+    encoders=None,
+    quality="fast",
+    order=None,
+    stats=None,
+):
+    """
+    stream the clips that correspond to a multitrack
+    recording in fixed-size blocks, in A or B format.
+    The audio files are read chunk by chunk, so memory
+    use does not depend on the length of the recording.
+
+    Args:
+        clip_names (list): list of strings with names of clips
+            to be streamed (and combined if different clips have
+            the recording by different microphone capsules).
+        dataset (ClipIndex or soundata.Dataset): the clip index
+            (or soundata dataset) where the clips can be loaded from
+        fmt_in (str): whether the clips originally are in A or B
+            format
+        fmt_out (str): the target format (A or B). Currently it only
+            works A->B
+        capsule_coords (dict): dictionary with channel names and
+            corresponding coordinates in polar form (colatitude
+            and azimuth in radians)
+        N (int): the order of B format
+        fs (int): the target sampling rate (the audio files are
+            resampled from their native sampling rate as they
+            are streamed)
+        block_size (int): number of frames in each block
+        hop (int): number of frames between the starts of
+            consecutive blocks (block_size by default)
+        chunk_size (int): number of frames read from the
+            audio files at a time
+        encoders (dict): cache of A2BEncoder objects that
+            is reused across calls
+        quality (str): the quality of the resampling to fs
+            (one of RESAMPLE_FILTERS). librosa's kaiser_best
+            cannot be streamed, so it is replaced by "high" with
+            a warning, and the blocks are not exactly the audio
+            that _get_audio_numpy resamples with kaiser_best
+        order (str): whether the audio is resampled before
+            ("resample_first") or after ("encode_first") it is
+            converted to B format. Both steps are linear, so the
+            order only changes the cost. None picks the order
+            that resamples fewer channels
+        stats (dict): optional count of the A to B conversions
+            done in each order (see _conversion_order)
+
+    Returns:
+        a generator of numpy arrays of shape (channels, block_size).
+        The last blocks are padded with zeros
+    """
+    if not isinstance(dataset, ClipIndex):
+        dataset = ClipIndex(dataset)
+    _check_formats(fmt_in, fmt_out, capsule_coords)
+    hop = block_size if hop == None else hop
+    if block_size < 1 or hop < 1 or chunk_size < 1:
+        raise ValueError(
+            "block_size, hop and chunk_size should be positive, but they are {}, {} and {}".format(
+                block_size, hop, chunk_size
+            )
+        )
+    clips = [dataset[ac] for ac in clip_names]
+    rows, frames, audio_fs = _clips_layout(clips)
+    _check_order(N, fmt_in, fmt_out, rows[-1])
+    encoder = None
+    if fmt_in == "A" and fmt_out == "B":
+        N = int(np.sqrt(len(clip_names)) - 1) if N == None else N
+        encoder = _get_a2b_encoder(encoders, N, capsule_coords)
+    resampler = None
+    total = frames
+    encode_first = encoder is not None
+    if fs != None and fs != audio_fs:
+        if quality == "kaiser_best":
+            warnings.warn(
+                UserWarning(
+                    'kaiser_best resampling cannot be streamed, "high" is used instead'
+                )
+            )
+            quality = "high"
+        resampler = _StreamResampler(audio_fs, fs, quality)
+        total = -(-frames * fs // audio_fs)
+        if encoder is not None:
+            order = _conversion_order(order, rows[-1], (N + 1) ** 2, stats)
+            encode_first = order == "encode_first"
+    return _stream_blocks(
+        clips,
+        rows,
+        frames,
+        total,
+        resampler,
+        encoder,
+        encode_first,
+        block_size,
+        hop,
+        chunk_size,
+    )
+
+
+def _stream_blocks(
+    clips,
+    rows,
+    frames,
+    total,
+    resampler,
+    encoder,
+    encode_first,
+    block_size,
+    hop,
+    chunk_size,
+):
+    """
+    generator behind _iter_audio_blocks
+
+    Args:
+        clips (list): the soundata Clip objects
+        rows (np.array): the first row of each clip in
+            the recording (see _clips_layout)
+        frames (int): the number of frames in the audio files
+        total (int): the number of frames after resampling
+        resampler (_StreamResampler): the resampler (or None)
+        encoder (A2BEncoder): the A to B format encoder (or None)
+        encode_first (bool): whether the audio is encoded
+            before it is resampled
+        block_size (int): number of frames in each block
+        hop (int): number of frames between blocks
+        chunk_size (int): number of frames read at a time
+
+    Yields:
+        numpy arrays of shape (channels, block_size)
+    """
+    files = []
+    try:
+        files = [sf.SoundFile(clip.audio_path) for clip in clips]
+        chunk = np.empty((rows[-1], min(chunk_size, frames)), np.float32)
+        pending = None
+        offset = 0
+        start = 0
+        for i in range(0, frames, chunk_size):
+            n = min(chunk_size, frames - i)
+            for f, first, last in zip(files, rows[:-1], rows[1:]):
+                chunk[first:last, :n] = f.read(n, dtype="float32", always_2d=True).T
+            audio = chunk[:, :n]
+            if encode_first:
+                audio = encoder.encode(audio)
+            if resampler is not None:
+                audio = resampler.process(audio, final=i + n >= frames)
+            if encoder is not None and not encode_first:
+                audio = encoder.encode(audio)
+            if pending is None:
+                pending = audio[:, :0]
+            pending = np.concatenate((pending, audio), axis=-1)
+            while start + block_size <= offset + pending.shape[-1]:
+                yield pending[:, start - offset : start - offset + block_size].copy()
+                start += hop
+                drop = min(start - offset, pending.shape[-1])
+                pending = pending[:, drop:]
+                offset += drop
+        while start < total:
+            block = np.zeros((pending.shape[0], block_size), np.float32)
+            tail = pending[:, start - offset :]
+            block[:, : tail.shape[-1]] = tail
+            yield block
+            start += hop
+    finally:
+        for f in files:
+            f.close()
@@ -0,0 +1,11 @@
+from micarraylib.steering import steering_vectors
+import numpy as np
+
+
+def plane_wave(coords, direction, s, fs):
+    """
+    simulates a plane wave from a direction as a
+    circular fractional delay of a periodic signal
+    """
+    A = steering_vectors(coords, [direction], fs, len(s))[0]
+    return np.fft.irfft(np.fft.rfft(s) * A, len(s)).astype(np.float32)
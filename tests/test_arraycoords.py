@@ -1,4 +1,6 @@
 from micarraylib import arraycoords
+from micarraylib.arraycoords import array_shapes_raw
+import numpy as np
 import pytest
 
 
@@ -12,6 +14,9 @@ def test_list_micarrays():
         "2LCube",
         "DeccaCuboid",
         "Hamasaki",
+        "DICIT",
+        "Signia",
+        "NAO",
     ]
 
     assert ARRAYNAMES == arraycoords.list_micarrays()
@@ -27,9 +32,71 @@ def test_get_array():
         "2LCube",
         "DeccaCuboid",
         "Hamasaki",
+        "DICIT",
+        "Signia",
+        "NAO",
     ]
 
     [arraycoords.get_array(arr) for arr in ARRAYNAMES]
 
     with pytest.raises(ValueError):
         arraycoords.get_array("foo")
+
+    # geometries are built once and shared
+    assert arraycoords.get_array("Ambeo") is arraycoords.get_array("Ambeo")
+
+
+def test_register_array():
+
+    arr = arraycoords.micarray(array_shapes_raw.cube2l_raw, "cartesian", None, "foo")
+    arraycoords.register_array(arr)
+    try:
+        assert "foo" in arraycoords.list_micarrays()
+        assert arraycoords.ARRAYNAMES == arraycoords.list_micarrays()
+        assert arraycoords.get_array("foo") is arr
+
+        # names are unique unless overwriting
+        with pytest.raises(ValueError):
+            arraycoords.register_array(arr)
+        arr2 = arraycoords.micarray(
+            array_shapes_raw.ambeovr_raw, "polar", "degrees", "foo"
+        )
+        arraycoords.register_array(arr2, overwrite=True)
+        assert arraycoords.get_array("foo") is arr2
+    finally:
+        arraycoords.unregister_array("foo")
+    assert "foo" not in arraycoords.list_micarrays()
+    assert "foo" not in arraycoords.ARRAYNAMES
+
+    with pytest.raises(ValueError):
+        arraycoords.get_array("foo")
+    with pytest.raises(ValueError):
+        arraycoords.unregister_array("foo")
+    with pytest.raises(ValueError):
+        arraycoords.register_array(array_shapes_raw.cube2l_raw)
+    with pytest.raises(ValueError):
+        arraycoords.register_array(
+            arraycoords.micarray(array_shapes_raw.cube2l_raw, "cartesian")
+        )
+
+
+def test_array_json():
+
+    for name in ["Eigenmike", "NAO"]:
+        arr = arraycoords.array_from_json(arraycoords.array_to_json(name))
+        orig = arraycoords.get_array(name)
+        assert arr.name == orig.name
+        assert arr.capsule_names == orig.capsule_names
+        assert arr.coords_form == orig.coords_form
+        assert arr.angle_units == orig.angle_units
+        assert np.array_equal(
+            arr.standard_coords_array("polar"), orig.standard_coords_array("polar")
+        )
+    assert arraycoords.array_to_json(orig) == arraycoords.array_to_json("NAO")
+
+    with pytest.raises(ValueError):
+        arraycoords.array_from_json("{}")
+    with pytest.raises(ValueError):
+        arraycoords.array_from_json(
+            '{"name": "foo", "coords_form": "bar", "coords": {"1": [0, 0, 0]}}'
+        )
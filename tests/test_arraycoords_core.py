@@ -1,4 +1,5 @@
-from micarraylib.arraycoords.core import micarray
+from micarraylib.arraycoords.core import micarray, CapsulePairs, SPEED_OF_SOUND
+from micarraylib import arraycoords
 from micarraylib.arraycoords import array_shapes_raw
 from micarraylib.arraycoords.array_shapes_utils import _polar2cart
 import pytest
@@ -25,37 +26,39 @@ def test_micarray_init():
 def test_micarray_center_coords():
 
     arr = micarray(array_shapes_raw.cube2l_raw, "cartesian")
-    arr.center_coords()
+    coords_dict = arr.center_coords()
     assert np.allclose(
-        np.mean(np.array([c for c in arr.coords_dict.values()]), axis=0), [0, 0, 0]
+        np.mean(np.array([c for c in coords_dict.values()]), axis=0), [0, 0, 0]
     )
+    # the raw coordinates are not modified
+    assert arr.coords_dict == array_shapes_raw.cube2l_raw
 
     arr = micarray(array_shapes_raw.ambeovr_raw, "polar", "degrees")
-    arr.center_coords()
+    coords_dict = arr.center_coords()
     assert np.allclose(
-        np.mean(np.array([c for c in arr.coords_dict.values()]), axis=0), [0, 0, 0]
+        np.mean(np.array([c for c in coords_dict.values()]), axis=0), [0, 0, 0]
     )
-    assert arr.coords_form == "cartesian"
-    assert arr.angle_units == None
+    assert arr.coords_form == "polar"
+    assert arr.angle_units == "degrees"
 
 
 def test_micarray_standard_coords():
 
     arr = micarray(array_shapes_raw.eigenmike_raw, "polar", "degrees")
-    arr.standard_coords("cartesian")
+    coords_dict = arr.standard_coords("cartesian")
     assert np.allclose(
-        np.mean(np.array([c for c in arr.coords_dict.values()]), axis=0), [0, 0, 0]
+        np.mean(np.array([c for c in coords_dict.values()]), axis=0), [0, 0, 0]
     )
-    arr.standard_coords("polar")
+    coords_dict = arr.standard_coords("polar")
     assert arr.coords_form == "polar"
-    assert arr.angle_units == "radians"
+    assert arr.angle_units == "degrees"
 
     # sanity check on range of angles in polar coordinates
-    assert all([c[0] > 0 and c[0] < 180 for c in arr.coords_dict.values()])
-    assert all([c[1] <= 180 and c[1] >= -180 for c in arr.coords_dict.values()])
+    assert all([c[0] > 0 and c[0] < 180 for c in coords_dict.values()])
+    assert all([c[1] <= 180 and c[1] >= -180 for c in coords_dict.values()])
 
     # returning to cartesian should result in coordinates centered around zero
-    coords_cart = _polar2cart(arr.coords_dict, "radians")
+    coords_cart = _polar2cart(coords_dict, "radians")
     assert np.allclose(
         np.mean(np.array([v for v in coords_cart.values()]), axis=0),
         [0, 0, 0],
@@ -64,3 +67,82 @@ def test_micarray_standard_coords():
     # value when form not specified
     with pytest.raises(ValueError):
         arr.standard_coords()
+
+
+def test_micarray_standard_coords_array():
+
+    arr = micarray(array_shapes_raw.eigenmike_raw, "polar", "degrees")
+    polar = arr.standard_coords_array("polar")
+    cartesian = arr.standard_coords_array("cartesian")
+    degrees = arr.standard_coords_array("polar", "degrees")
+    assert polar.shape == (32, 3)
+    assert np.allclose(np.degrees(polar[:, :2]), degrees[:, :2])
+    assert np.allclose(polar[:, 2], degrees[:, 2])
+    assert np.allclose(list(arr.standard_coords("cartesian").values()), cartesian)
+
+    # the order of the calls does not change the result
+    arr2 = micarray(array_shapes_raw.eigenmike_raw, "polar", "degrees")
+    assert np.array_equal(arr2.standard_coords_array("polar"), polar)
+    assert np.array_equal(arr2.standard_coords_array("cartesian"), cartesian)
+
+    # views are memoized and read-only
+    assert arr.standard_coords_array("polar") is polar
+    assert not polar.flags.writeable
+    assert not arr.coords.flags.writeable
+    with pytest.raises(ValueError):
+        polar[0, 0] = 0
+
+    # the coordinates do not depend on the input dictionary afterwards
+    coords_dict = {k: list(v) for k, v in array_shapes_raw.cube2l_raw.items()}
+    arr = micarray(coords_dict, "cartesian")
+    cartesian = np.array(arr.standard_coords_array("cartesian"))
+    coords_dict["FL"][0] = 10
+    assert np.array_equal(arr.standard_coords_array("cartesian"), cartesian)
+
+    with pytest.raises(ValueError):
+        arr.standard_coords_array()
+    with pytest.raises(ValueError):
+        arr.standard_coords_array("foo")
+    with pytest.raises(ValueError):
+        arr.standard_coords_array("cartesian", "degrees")
+    with pytest.raises(ValueError):
+        arr.standard_coords_array("polar", "foo")
+
+
+def test_capsule_pairs():
+
+    arr = micarray(array_shapes_raw.cube2l_raw, "cartesian")
+    P = arr.capsule_pairs()
+    assert arr.capsule_pairs() is P
+    n = len(arr.capsule_names)
+    assert P.pairs.shape == (n * (n - 1) // 2, 2)
+    assert all([i < j for i, j in P.pairs])
+    assert P.pair_names[0] == (arr.capsule_names[0], arr.capsule_names[1])
+
+    coords = np.array(list(array_shapes_raw.cube2l_raw.values()))
+    for (i, j), d in zip(P.pairs, P.pair_distances):
+        assert np.isclose(d, np.linalg.norm(coords[i] - coords[j]))
+    assert np.allclose(P.distances, P.distances.T)
+    assert np.allclose(np.diag(P.distances), 0)
+    assert np.isclose(P.aperture, np.max(P.pair_distances))
+    assert np.allclose(P.max_tdoa, P.pair_distances / SPEED_OF_SOUND)
+
+    lags = P.max_lag(48000)
+    assert P.max_lag(48000) is lags
+    assert np.all(lags >= P.pair_distances * 48000 / SPEED_OF_SOUND)
+    assert np.all(lags - 1 < P.pair_distances * 48000 / SPEED_OF_SOUND)
+    assert not lags.flags.writeable
+    assert not P.distances.flags.writeable
+
+    # two capsules 0.343 m apart
+    P = CapsulePairs(np.array([[0, 0, 0], [0.343, 0, 0]]), ["a", "b"])
+    assert np.array_equal(P.max_lag(1000), [1])
+    assert np.isclose(P.aliasing_frequency, 500)
+    assert np.isclose(P.pair_aliasing_frequencies[0], 500)
+
+    # every supported array, including coincident capsules
+    for name in arraycoords.list_micarrays():
+        P = arraycoords.get_array(name).capsule_pairs()
+        assert P.aperture > 0
+        assert np.isfinite(P.aliasing_frequency)
+        assert np.all(P.max_lag(24000) >= 0)
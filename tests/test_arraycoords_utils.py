@@ -2,6 +2,12 @@ from micarraylib.arraycoords.array_shapes_utils import _deg2rad
 from micarraylib.arraycoords.array_shapes_utils import _polar2cart
 from micarraylib.arraycoords.array_shapes_utils import _cart2polar
 from micarraylib.arraycoords.array_shapes_utils import _centercoords
+from micarraylib.arraycoords.array_shapes_utils import _deg2rad_array
+from micarraylib.arraycoords.array_shapes_utils import _polar2cart_array
+from micarraylib.arraycoords.array_shapes_utils import _cart2polar_array
+from micarraylib.arraycoords.array_shapes_utils import _centercoords_array
+from micarraylib.arraycoords.array_shapes_utils import _distance_matrix_array
+from micarraylib.arraycoords import array_shapes_raw
 from micarraylib import arraycoords
 import math
 import numpy as np
@@ -124,3 +130,63 @@ def test_centercoords():
     assert np.allclose(
         np.mean(np.array([v for v in coords_dict_centered.values()]), axis=0), [0, 0, 0]
     )
+
+
+def test_cart2polar_zero_x():
+    coords_dict_cart = {"a": [0, 1, 0], "b": [0, -1, 0], "c": [-1, -1, 0]}
+    coords_dict_polar = _cart2polar(coords_dict_cart)
+
+    assert np.allclose(coords_dict_polar["a"], [np.pi / 2, np.pi / 2, 1])
+    assert np.allclose(coords_dict_polar["b"], [np.pi / 2, -np.pi / 2, 1])
+    # azimuth stays in [-pi/2, 3pi/2)
+    assert np.allclose(coords_dict_polar["c"], [np.pi / 2, 5 * np.pi / 4, np.sqrt(2)])
+
+
+def test_array_conversions():
+    coords_dict_deg = array_shapes_raw.eigenmike_raw
+    coords_deg = np.array(list(coords_dict_deg.values()))
+
+    assert np.allclose(
+        _deg2rad_array(coords_deg), list(_deg2rad(coords_dict_deg).values())
+    )
+    coords_cart = _polar2cart_array(coords_deg, "degrees")
+    assert np.allclose(
+        coords_cart, list(_polar2cart(coords_dict_deg, "degrees").values())
+    )
+    assert np.allclose(
+        _centercoords_array(coords_cart),
+        list(_centercoords(_polar2cart(coords_dict_deg, "degrees")).values()),
+    )
+    assert np.allclose(
+        _polar2cart_array(_cart2polar_array(coords_cart), "radians"), coords_cart
+    )
+
+    # stacks of arrays are converted in one call
+    rng = np.random.default_rng(0)
+    stack = rng.normal(size=(5, 4, 32, 3))
+    centered = _centercoords_array(stack)
+    assert centered.shape == stack.shape
+    assert np.allclose(np.mean(centered, axis=-2), 0)
+    polar = _cart2polar_array(stack)
+    assert polar.shape == stack.shape
+    assert np.allclose(
+        polar[1, 2], list(_cart2polar(dict(enumerate(stack[1, 2]))).values())
+    )
+    assert np.allclose(_polar2cart_array(polar, "radians"), stack)
+
+    # the input is not modified
+    coords_copy = coords_deg.copy()
+    _deg2rad_array(coords_deg)
+    assert np.array_equal(coords_deg, coords_copy)
+
+    with pytest.raises(ValueError):
+        _polar2cart_array(coords_deg)
+
+
+def test_distance_matrix_array():
+    rng = np.random.default_rng(0)
+    stack = rng.normal(size=(5, 8, 3))
+    D = _distance_matrix_array(stack)
+    assert D.shape == (5, 8, 8)
+    assert np.isclose(D[2, 1, 6], np.linalg.norm(stack[2, 1] - stack[2, 6]))
+    assert np.allclose(D, np.swapaxes(D, -1, -2))
@@ -0,0 +1,117 @@
+from micarraylib.beamforming import Beamformer
+from micarraylib.steering import SteeringCache
+from micarraylib.utils import MappedAudio
+from micarraylib import arraycoords
+import numpy as np
+import os
+import pytest
+from helpers import plane_wave
+
+
+def test_Beamformer_reconstruction():
+
+    # with one capsule at the center the beamformer
+    # is the identity (perfect reconstruction)
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(1, 5000)).astype(np.float32)
+    for hop in [128, 64]:
+        B = Beamformer(np.zeros((1, 3)), [[0, 0], [1, 2]], 16000, 256, hop)
+        y = B.beamform(x)
+        assert y.shape == (2, 5000)
+        assert y.dtype == np.float32
+        assert np.allclose(y, x, atol=1e-5)
+        # the blocks do not change the output
+        assert np.allclose(B.beamform(x, block_frames=3), y, atol=1e-6)
+
+
+def test_Beamformer_das_mvdr():
+
+    fs = 24000
+    rng = np.random.default_rng(1)
+    arr = arraycoords.get_array("Eigenmike")
+    coords = arr.standard_coords_array("cartesian")
+    target = [np.pi / 2, 0]
+    interference = [np.pi / 2, np.pi / 2]
+    s = rng.normal(size=24000)
+    n = rng.normal(size=24000)
+    x_s = plane_wave(coords, target, s, fs)
+    x_n = plane_wave(coords, interference, n, fs)
+    middle = slice(2000, 22000)
+
+    # both beamformers are distortionless in the look direction
+    for method in ["das", "mvdr"]:
+        B = Beamformer(arr, [target], fs, 512, method=method)
+        cov = B.covariance(x_s + x_n)
+        assert cov.shape == (257, 32, 32)
+        W = B.weights(cov)
+        assert W.shape == (257, 32, 1)
+        gain = np.sum(np.conj(W[:, :, 0]) * B.steering[0].T, axis=1)
+        assert np.allclose(gain, 1, atol=1e-4)
+        y = B.beamform(x_s, cov)
+        error = np.mean((y[0, middle] - s[middle]) ** 2) / np.mean(s[middle] ** 2)
+        assert error < 1e-2
+
+    # mvdr suppresses the interference better than delay-and-sum
+    residual = {}
+    for method in ["das", "mvdr"]:
+        B = Beamformer(arr, [target], fs, 512, method=method)
+        cov = B.covariance(x_s + x_n)
+        y = B.beamform(x_n, cov)
+        residual[method] = np.mean(y[0, middle] ** 2)
+    assert residual["mvdr"] < 0.2 * residual["das"]
+
+    # mvdr estimates the covariance if it is not given
+    B = Beamformer(arr, [target], fs, 512, method="mvdr")
+    assert np.allclose(
+        B.beamform(x_s + x_n), B.beamform(x_s + x_n, B.covariance(x_s + x_n))
+    )
+
+    with pytest.raises(ValueError):
+        B.weights()
+    with pytest.raises(ValueError):
+        B.weights(np.zeros((10, 32, 32)))
+
+
+def test_Beamformer_arrays():
+
+    rng = np.random.default_rng(2)
+    C = SteeringCache()
+    for name in arraycoords.list_micarrays():
+        arr = arraycoords.get_array(name)
+        x = rng.normal(size=(len(arr.capsule_names), 3000)).astype(np.float32)
+        for method in ["das", "mvdr"]:
+            B = Beamformer(name, ("fibonacci", 20), 16000, 256, method=method)
+            y = B.beamform(x)
+            assert y.shape == (20, 3000)
+            assert np.all(np.isfinite(y))
+        B = Beamformer(name, ("fibonacci", 20), 16000, 256, steering_cache=C)
+        assert B.directions.shape == (20, 2)
+        assert np.allclose(
+            B.beamform(x),
+            Beamformer(name, ("fibonacci", 20), 16000, 256).beamform(x),
+        )
+
+    with pytest.raises(ValueError):
+        Beamformer("Ambeo", ("fibonacci", 20), 16000, method="foo")
+    with pytest.raises(ValueError):
+        Beamformer("Ambeo", ("fibonacci", 20), 16000, steering_cache=C, c=340)
+    with pytest.raises(ValueError):
+        Beamformer("Ambeo", ("fibonacci", 20), 16000, 256, 100)
+    with pytest.raises(ValueError):
+        Beamformer("Ambeo", ("fibonacci", 20), 16000).beamform(np.zeros((3, 100)))
+
+
+def test_Beamformer_MappedAudio():
+
+    # memory-mapped recordings are read one block of frames at a time
+    wavs_dir = (
+        "tests/resources/datasets/marco/3D-MARCo Impulse Responses/01_Speaker_+90deg_3m"
+    )
+    wavs = sorted(w for w in os.listdir(wavs_dir) if "_OCT3D_" in w)
+    x = MappedAudio([os.path.join(wavs_dir, w) for w in wavs])
+    assert x.shape == (9, 28800)
+    for method in ["das", "mvdr"]:
+        B = Beamformer("OCT3D", ("fibonacci", 10), x.fs, 512, method=method)
+        y = B.beamform(x, block_frames=16)
+        assert y.shape == (10, 28800)
+        assert np.allclose(y, B.beamform(np.asarray(x)), atol=1e-5)
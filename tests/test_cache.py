@@ -0,0 +1,132 @@
+from micarraylib.cache import (
+    DiskCache,
+    MemoryCache,
+    cache_key,
+    cache_home,
+    file_checksum,
+    read_sidecar,
+    write_sidecar,
+)
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import os
+import time
+
+
+def test_DiskCache(tmp_path):
+
+    cache = DiskCache(str(tmp_path))
+    key = cache.key(a=1, b=[1.0, 2.0])
+    assert key == cache.key(b=[1.0, 2.0], a=1)
+    assert key != cache.key(a=2, b=[1.0, 2.0])
+    assert cache.get(key) is None
+    assert cache.size() == 0
+
+    A = np.random.randn(4, 10).astype(np.float32)
+    cache.put(key, A)
+    B = cache.get(key)
+    assert B.dtype == np.float32
+    assert (A == B).all()
+    assert cache.size() > A.nbytes
+    # no temporary files are left behind
+    assert all([f.endswith(".npy") for _, _, files in os.walk(tmp_path) for f in files])
+
+    cache.clear()
+    assert cache.get(key) is None
+    assert cache.size() == 0
+
+
+def test_DiskCache_budget(tmp_path):
+
+    A = np.zeros((100, 100))
+    cache = DiskCache(str(tmp_path), max_bytes=int(2.5 * A.nbytes))
+    keys = [cache.key(i=i) for i in range(3)]
+    cache.put(keys[0], A)
+    time.sleep(0.01)
+    cache.put(keys[1], A)
+    time.sleep(0.01)
+    # using the first array makes the second the least recently used
+    assert cache.get(keys[0]) is not None
+    time.sleep(0.01)
+    cache.put(keys[2], A)
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+    assert cache.size() <= cache.max_bytes
+
+
+def test_DiskCache_concurrent(tmp_path):
+
+    cache = DiskCache(str(tmp_path), max_bytes=10**6)
+    A = np.arange(1000.0)
+    key = cache.key(a=1)
+
+    def put_get(i):
+        cache.put(key, A)
+        B = cache.get(key)
+        return B is None or (B == A).all()
+
+    with ThreadPoolExecutor(8) as pool:
+        assert all(pool.map(put_get, range(32)))
+    assert (cache.get(key) == A).all()
+
+
+def test_MemoryCache():
+
+    A = np.zeros((10, 10))
+    cache = MemoryCache(int(2.5 * A.nbytes))
+    assert cache.get("a") is None
+    cache.put("a", A)
+    assert not A.flags.writeable
+    assert cache.get("a") is A
+    cache.put("b", np.zeros((10, 10)))
+    assert cache.get("a") is A
+    cache.put("c", np.zeros((10, 10)))
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert len(cache) == 2
+    assert cache.nbytes == 2 * A.nbytes
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 2, 1)
+
+    # arrays larger than the budget are not cached
+    cache.put("d", np.zeros((100, 100)))
+    assert cache.get("d") is None
+    assert len(cache) == 2
+
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+    # concurrent puts keep the cache within its budget
+    def put(i):
+        cache.put(str(i % 7), np.full((10, 10), i))
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(put, range(64)))
+    assert cache.nbytes <= cache.max_bytes
+    assert cache.nbytes == sum([a.nbytes for a in cache._arrays.values()])
+
+
+def test_cache_key():
+
+    assert cache_key(a=1, b="c") == cache_key(b="c", a=1)
+    assert cache_key(a=1) != cache_key(a=1.5)
+    assert len(cache_key(a=None)) == 64
+
+
+def test_sidecar(tmp_path, monkeypatch):
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert cache_home() == os.path.join(tmp_path, "micarraylib")
+
+    path = os.path.join(cache_home(), "foo.json")
+    assert read_sidecar(path, "a") is None
+    write_sidecar(path, "a", {"b": [1, 2]})
+    assert read_sidecar(path, "a") == {"b": [1, 2]}
+    assert read_sidecar(path, "b") is None
+    with open(path, "w") as f:
+        f.write("{")
+    assert read_sidecar(path, "a") is None
+
+    assert file_checksum(path) == file_checksum(path)
+    write_sidecar(path, "a", {"b": [1, 2]})
+    assert file_checksum(path) != file_checksum(os.devnull)
@@ -1,11 +1,15 @@
 import soundata
 from micarraylib.core import Dataset, _initialize, Aggregate
+from micarraylib.utils import ClipIndex, A2BEncoder
+from micarraylib.cache import DiskCache
+from micarraylib.features import stft, gcc_phat, logmel, extract_features
 import micarraylib.datasets
 import micarraylib.arraycoords
 import matplotlib.pyplot as plt
 import pytest
 import mock
 import os
+import pickle
 import numpy as np
 import librosa
 
@@ -28,6 +32,7 @@ def test_Aggregate():
     assert C.datasets["eigenscape_raw"].name == "eigenscape_raw"
     assert C.datasets["tau2019sse"].name == "tau2019sse"
     assert all([c.fs == 8000 for c in C.datasets.values()])
+    assert all([c.resample_quality == "kaiser_best" for c in C.datasets.values()])
 
     data_dir = "tests/resources/datasets/marco"
     A = C.datasets["marco"].get_audio_numpy("impulse_response+90d", "OCT3D")
@@ -53,6 +58,11 @@ def test_Aggregate():
     B = librosa.resample(B, 48000, 8000)
     assert np.allclose(A, B)
 
+    C = Aggregate([a, b, c], 8000, resample_quality="fast")
+    assert all([c.resample_quality == "fast" for c in C.datasets.values()])
+    A = C.datasets["marco"].get_audio_numpy("impulse_response+90d", "OCT3D")
+    assert A.shape == B.shape
+
 
 def test_Dataset():
 
@@ -72,8 +82,131 @@ def test_Dataset():
     assert a.array_capsules == {"a": ["b"]}
     assert a.capsule_coords == {"a": {"b": [0, 0, 0]}}
     assert a.data_home == "/"
+    assert isinstance(a.clip_index, ClipIndex)
+    assert a.clip_index.dataset is a.dataset
+    # the generic Dataset has no clip_id indexes
+    assert not hasattr(a, "clips_set")
+    assert getattr(a, "clip_lookup", None) == None
+    with pytest.raises(AttributeError):
+        a.has_clip("foo")
     with pytest.raises(ValueError):
         Dataset("name", 1, {"a": "A"}, {"a": {"b": [0, 0, 0]}}, download=False)
+    with pytest.raises(ValueError):
+        Dataset(
+            "eigenscape",
+            1,
+            {"a": "A"},
+            {"a": {"b": [0, 0, 0]}},
+            download=False,
+            data_home="/",
+            resample_quality="foo",
+        )
+    with pytest.raises(ValueError):
+        Dataset(
+            "eigenscape",
+            1,
+            {"a": "A"},
+            {"a": {"b": [0, 0, 0]}},
+            download=False,
+            data_home="/",
+            conversion_order="foo",
+        )
+
+
+def test_Dataset_lazy():
+
+    with mock.patch("micarraylib.core._initialize") as initialize:
+        a = micarraylib.datasets.marco(download=False, data_home="~/", lazy=True)
+        assert a.lazy
+        assert "OCT3D" in a.array_names
+        a.get_capsule_coords_numpy("OCT3D")
+        assert not initialize.called
+
+    a = micarraylib.datasets.marco(
+        download=False, data_home="tests/resources/datasets/marco", lazy=True
+    )
+    assert a._dataset is None
+    assert "clips_list" not in a.__dict__
+    assert "impulse_response+90d" in a.clips_list
+    assert isinstance(a.dataset, soundata.datasets.marco.Dataset)
+    assert a.micarray_capsule_clip_ids is a.micarray_capsule_clip_ids
+    A = a.get_audio_numpy("impulse_response+90d", "OCT3D")
+    b = micarraylib.datasets.marco(
+        download=False, data_home="tests/resources/datasets/marco"
+    )
+    assert not b.lazy
+    assert b.clips_list == a.clips_list
+    assert (A == b.get_audio_numpy("impulse_response+90d", "OCT3D")).all()
+
+    with pytest.raises(AttributeError):
+        a.foo
+
+
+def test_Dataset_clip_ids_sidecar(tmp_path, monkeypatch):
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    a = micarraylib.datasets.marco(download=False, data_home="~/")
+    sidecar = os.path.join(tmp_path, "micarraylib", "marco_clip_ids.json")
+    assert os.path.exists(sidecar)
+
+    # later datasets load the sidecar instead of sorting the clip_ids
+    with mock.patch("micarraylib.datasets.marco_loader.re") as re:
+        b = micarraylib.datasets.marco(download=False, data_home="~/")
+        assert not re.sub.called
+    assert b.micarray_capsule_clip_ids == a.micarray_capsule_clip_ids
+    assert b.clips_list == a.clips_list
+
+    # a stale sidecar is computed again
+    with open(sidecar, "w") as f:
+        f.write('{"checksum": "foo", "content": [{}, []]}')
+    b = micarraylib.datasets.marco(download=False, data_home="~/")
+    assert b.micarray_capsule_clip_ids == a.micarray_capsule_clip_ids
+    with open(sidecar) as f:
+        assert "foo" not in f.read()
+
+    # the sidecar can be kept elsewhere, or not kept
+    b = micarraylib.datasets.marco(
+        download=False, data_home="~/", cache_dir=str(tmp_path / "foo")
+    )
+    assert os.path.exists(os.path.join(tmp_path, "foo", "marco_clip_ids.json"))
+    os.remove(sidecar)
+    b = micarraylib.datasets.marco(download=False, data_home="~/", cache_dir=False)
+    assert b.clips_list == a.clips_list
+    assert not os.path.exists(sidecar)
+
+
+def test_Dataset_lookup():
+
+    a = micarraylib.datasets.marco(download=False, data_home="~/")
+    assert a.has_clip("impulse_response+90d")
+    assert not a.has_clip("foo")
+    assert a.clips_set == set(a.clips_list)
+    A = a.lookup("impulse_response+90d")
+    assert set(A.keys()) == set(a.array_names)
+    assert A["OCT3D"] == {
+        "A": a.micarray_capsule_clip_ids["OCT3D"]["impulse_response+90d"]
+    }
+    assert a.lookup("impulse_response+90d", "OCT3D") == A["OCT3D"]
+    assert a.lookup("impulse_response+90d", "OCT3D", "A") == A["OCT3D"]["A"]
+    assert a.event_lookup == {}
+
+    b = micarraylib.datasets.tau2021sse_nigens(download=False, data_home="~/")
+    clip_id = "dev/dev-train/fold1_room1_mix001"
+    assert b.lookup(clip_id) == {
+        "Eigenmike": {
+            "A": ["".join(["mic_", clip_id])],
+            "B": ["".join(["foa_", clip_id])],
+        }
+    }
+    assert b.event_lookup[clip_id] == "".join(["foa_", clip_id])
+    assert len(b.event_lookup) == len(b.clips_list)
+
+    with pytest.raises(ValueError):
+        a.lookup("foo")
+    with pytest.raises(ValueError):
+        a.lookup("impulse_response+90d", "foo")
+    with pytest.raises(ValueError):
+        a.lookup("impulse_response+90d", "OCT3D", "B")
 
 
 def test_Dataset_get_capsule_coords():
@@ -91,6 +224,326 @@ def test_Dataset_get_capsule_coords():
         a.get_capsule_coords_numpy("foo")
 
 
+def test_Dataset_get_audio_numpy_batch():
+
+    a = micarraylib.datasets.marco(
+        download=False, data_home="tests/resources/datasets/marco"
+    )
+    A = a.get_audio_numpy("impulse_response+90d", "OCT3D", fmt="B")
+    B = a.get_audio_numpy_batch(
+        ["impulse_response+90d", "impulse_response+90d"], "OCT3D", fmt="B"
+    )
+    assert B.shape == (2,) + A.shape
+    assert np.allclose(B[0], A) and np.allclose(B[1], A)
+
+    A = a.get_audio_numpy("impulse_response+90d", "Eigenmike", start=0.01)
+    B = a.get_audio_numpy_batch(["impulse_response+90d"], "Eigenmike", start=0.01)
+    assert (B[0] == A).all()
+
+    # resampled after the batch is encoded
+    A = a.get_audio_numpy("impulse_response+90d", "Eigenmike", fmt="B", N=1, fs=24000)
+    B = a.get_audio_numpy_batch(
+        ["impulse_response+90d"], "Eigenmike", fmt="B", N=1, fs=24000
+    )
+    assert B.shape == (1, 4, 2400)
+    assert np.allclose(B[0], A, atol=1e-5)
+    assert a.conversion_stats == {"resample_first": 0, "encode_first": 2}
+
+    # one B format channel (N=0) is resampled too
+    A = a.get_audio_numpy("impulse_response+90d", "Eigenmike", fmt="B", N=0, fs=24000)
+    B = a.get_audio_numpy_batch(
+        ["impulse_response+90d"], "Eigenmike", fmt="B", N=0, fs=24000
+    )
+    assert A.shape == (1, 2400)
+    assert B.shape == (1, 1, 2400)
+    assert np.allclose(B[0], A, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        a.get_audio_numpy_batch([], "OCT3D")
+    with pytest.raises(ValueError):
+        a.get_audio_numpy_batch(["foo"], "OCT3D")
+    with pytest.raises(ValueError):
+        a.get_audio_numpy_batch(["impulse_response+90d"], "OCT3D", fmt="B", N=3)
+
+
+def test_Dataset_iter_audio_blocks(recwarn):
+
+    a = micarraylib.datasets.marco(
+        download=False, data_home="tests/resources/datasets/marco"
+    )
+    clip_id = "impulse_response+90d"
+    with pytest.warns(UserWarning, match="kaiser_best"):
+        B = next(a.iter_audio_blocks(clip_id, "OCT3D", block_size=1000, fs=24000))
+    recwarn.clear()
+    H = next(
+        a.iter_audio_blocks(clip_id, "OCT3D", block_size=1000, fs=24000, quality="high")
+    )
+    assert not [w for w in recwarn if "kaiser_best" in str(w.message)]
+    assert (B == H).all()
+    A = a.get_audio_numpy(clip_id, "OCT3D", fs=24000)
+    assert B.shape == (A.shape[0], 1000)
+
+
+def test_Dataset_disk_cache(tmp_path):
+
+    a = micarraylib.datasets.marco(
+        download=False, data_home="tests/resources/datasets/marco"
+    )
+    assert a.disk_cache is None
+    a.clear_cache()
+
+    a = micarraylib.datasets.marco(
+        download=False,
+        data_home="tests/resources/datasets/marco",
+        disk_cache=True,
+        disk_cache_size=10**6,
+    )
+    assert a.disk_cache.path == os.path.join(
+        "tests/resources/datasets/marco", "micarraylib_cache"
+    )
+    assert a.disk_cache.max_bytes == 10**6
+
+    a.disk_cache = DiskCache(str(tmp_path))
+    A = a.get_audio_numpy("impulse_response+90d", "OCT3D", fmt="B")
+    assert a.disk_cache.size() > 0
+    with mock.patch("micarraylib.core._get_audio_numpy") as get_audio:
+        B = a.get_audio_numpy("impulse_response+90d", "OCT3D", fmt="B")
+        out = np.empty_like(A)
+        C = a.get_audio_numpy("impulse_response+90d", "OCT3D", fmt="B", out=out)
+        assert not get_audio.called
+    assert (A == B).all()
+    assert C is out and (A == out).all()
+
+    # a different request is not served from the cache
+    B = a.get_audio_numpy("impulse_response+90d", "OCT3D", fmt="B", fs=24000)
+    assert B.shape == (9, 7200)
+
+    a.clear_cache()
+    assert a.disk_cache.size() == 0
+
+
+def test_Dataset_get_a2b_encoder():
+
+    a = micarraylib.datasets.marco(download=False, data_home="~/")
+    E = a.get_a2b_encoder("Eigenmike")
+    assert isinstance(E, A2BEncoder)
+    assert E.N == 4
+    assert a.get_a2b_encoder("Eigenmike", 4) is E
+    assert a.get_a2b_encoder("Eigenmike", 1).matrix.shape == (4, 32)
+    assert len(a.a2b_encoders) == 2
+
+    with pytest.raises(ValueError):
+        a.get_a2b_encoder("foo")
+
+
+def test_Dataset_get_capsule_pairs():
+
+    a = micarraylib.datasets.marco(download=False, data_home="~/")
+    for m in a.array_names:
+        P = a.get_capsule_pairs(m)
+        Q = micarraylib.arraycoords.get_array(m).capsule_pairs()
+        assert a.get_capsule_pairs(m) is P
+        assert P.capsule_names == Q.capsule_names
+        assert np.allclose(P.distances, Q.distances)
+        assert np.array_equal(P.max_lag(48000), Q.max_lag(48000))
+
+    # datasets with a subset of the capsules
+    b = micarraylib.datasets.tau2019sse(download=False, data_home="~/")
+    P = b.get_capsule_pairs("Eigenmike")
+    assert P.pair_names == [
+        ("6", "10"),
+        ("6", "22"),
+        ("6", "26"),
+        ("10", "22"),
+        ("10", "26"),
+        ("22", "26"),
+    ]
+
+    with pytest.raises(ValueError):
+        a.get_capsule_pairs("foo")
+
+
+def test_Dataset_get_beamformer():
+
+    a = micarraylib.datasets.marco(
+        download=False, data_home="tests/resources/datasets/marco"
+    )
+    A = a.get_audio_numpy("impulse_response+90d", "Eigenmike")
+    B = a.get_beamformer("Eigenmike", ("fibonacci", 10))
+    assert B.fs == a.fs
+    assert B.steering.shape == (10, 32, 257)
+    assert a.get_beamformer("Eigenmike", ("fibonacci", 10)).steering is B.steering
+    Y = B.beamform(A)
+    assert Y.shape == (10, A.shape[1])
+
+    b = micarraylib.datasets.tau2019sse(download=False, data_home="~/")
+    B = b.get_beamformer("Eigenmike", ("fibonacci", 10), fs=24000, method="mvdr")
+    assert B.fs == 24000
+    assert B.steering.shape == (10, 4, 257)
+
+    with pytest.raises(ValueError):
+        a.get_beamformer("foo", ("fibonacci", 10))
+
+
+def test_Dataset_get_gcc_phat():
+
+    a = micarraylib.datasets.tau2019sse(
+        download=False, data_home="tests/resources/datasets/tau2019sse"
+    )
+    P = a.get_capsule_pairs("Eigenmike")
+    G = a.get_gcc_phat("dev/split1_ir0_ov1_1", "Eigenmike", fs=24000, hop=480)
+    A = a.get_audio_numpy("dev/split1_ir0_ov1_1", "Eigenmike", fs=24000)
+    max_lag = P.max_lag(24000).max()
+    assert G.shape == (6, 1 + A.shape[1] // 480, 2 * max_lag + 1)
+    assert G.dtype == np.float32
+    assert np.allclose(
+        G,
+        gcc_phat(stft(A, 1024, 480), P.pairs, max_lag),
+    )
+    G = a.get_gcc_phat(
+        "dev/split1_ir0_ov1_1", "Eigenmike", fs=24000, interp=2, stop=0.5
+    )
+    assert G.shape == (6, 1 + 12000 // 512, 2 * P.max_lag(48000).max() + 1)
+
+    with pytest.raises(ValueError):
+        a.get_gcc_phat("dev/split1_ir0_ov1_1", "foo")
+
+    # the FFT holds the lags of large arrays, and a too small
+    # one is rejected before any audio is decoded
+    b = micarraylib.datasets.marco(
+        download=False, data_home="tests/resources/datasets/marco"
+    )
+    x = np.random.default_rng(0).normal(size=(12, 4800)).astype(np.float32)
+    with mock.patch.object(b, "_get_audio_numpy", return_value=x) as get_audio:
+        G = b.get_gcc_phat("impulse_response+90d", "Hamasaki")
+        max_lag = b.get_capsule_pairs("Hamasaki").max_lag(48000).max()
+        assert max_lag > 512
+        assert G.shape == (66, 1 + 4800 // 1024, 2 * max_lag + 1)
+        with pytest.raises(ValueError):
+            b.get_gcc_phat("impulse_response+90d", "Hamasaki", n_fft=1024)
+        assert get_audio.call_count == 1
+
+
+def test_Dataset_get_srp_phat():
+
+    a = micarraylib.datasets.tau2019sse(
+        download=False, data_home="tests/resources/datasets/tau2019sse"
+    )
+    A = a.get_audio_numpy("dev/split1_ir0_ov1_1", "Eigenmike", fs=24000)
+    S = a.get_srp_phat("Eigenmike", ("fibonacci", 100), fs=24000)
+    assert S.fs == 24000
+    assert S.pairs.shape == (6, 2)
+    M = S.maps(A)
+    assert M.shape == (1 + A.shape[1] // 512, 100)
+    assert np.all(np.isfinite(M))
+    assert a.get_srp_phat("Eigenmike", ("fibonacci", 100)).fs == a.fs
+
+    # the FFT holds the lags of large arrays
+    b = micarraylib.datasets.marco(
+        download=False, data_home="tests/resources/datasets/marco"
+    )
+    assert b.get_srp_phat("Ambeo", ("fibonacci", 10)).n_fft == 1024
+    S = b.get_srp_phat("Hamasaki", ("fibonacci", 10))
+    assert S.n_fft == 2048
+    assert 2 * S.max_lag + 1 <= S.n_fft
+    assert b.get_srp_phat("Hamasaki", ("fibonacci", 10), interp=2).n_fft == 2048
+    with pytest.raises(ValueError):
+        b.get_srp_phat("Hamasaki", ("fibonacci", 10), n_fft=1024)
+
+    with pytest.raises(ValueError):
+        a.get_srp_phat("foo", ("fibonacci", 10))
+
+
+def test_Dataset_get_seld_features():
+
+    a = micarraylib.datasets.tau2019sse(
+        download=False, data_home="tests/resources/datasets/tau2019sse"
+    )
+    F = a.get_seld_features("dev/split1_ir0_ov1_1", "Eigenmike", hop=480)
+    B = a.get_audio_numpy("dev/split1_ir0_ov1_1", "Eigenmike", fmt="B")
+    assert sorted(F) == ["intensity", "logmel"]
+    assert F["logmel"].shape == (4, 1 + B.shape[1] // 480, 64)
+    assert np.allclose(F["logmel"], logmel(stft(B, 1024, 480), a.fs))
+    F = a.get_seld_features(
+        "dev/split1_ir0_ov1_1", "Eigenmike", include_salsa=True, stop=0.5
+    )
+    assert F["salsa"].shape == (7, 1 + 12000 // 512, 1 + 9000 * 1024 // 24000)
+
+
+def test_Dataset_get_seld_features_stored_B(recwarn):
+
+    # the FOA audio of starss2022 is used as it is, without an order
+    a = micarraylib.datasets.starss2022(
+        download=False, data_home="tests/resources/datasets/starss2022"
+    )
+    F = a.get_seld_features(
+        "dev/dev-train-sony/fold3_room21_mix001", "Eigenmike", stop=1
+    )
+    B = a.get_audio_numpy("dev/dev-train-sony/fold3_room21_mix001", fmt="B", stop=1)
+    assert np.allclose(F["logmel"], logmel(stft(B, 1024), a.fs))
+    assert not [w for w in recwarn if "N parameter" in str(w.message)]
+
+
+def test_Dataset_pickle():
+
+    a = micarraylib.datasets.tau2019sse(
+        download=False, data_home="tests/resources/datasets/tau2019sse"
+    )
+    a.get_capsule_pairs("Eigenmike").max_lag(24000)
+    a.get_srp_phat("Eigenmike", ("fibonacci", 10))
+    b = pickle.loads(pickle.dumps(a))
+    assert b._dataset is None
+    assert len(b.steering_cache.memory_cache) == 0
+    assert np.allclose(
+        b.get_audio_numpy("dev/split1_ir0_ov1_1", "Eigenmike"),
+        a.get_audio_numpy("dev/split1_ir0_ov1_1", "Eigenmike"),
+    )
+    assert b.get_capsule_pairs("Eigenmike").max_lag(24000) is not None
+
+
+def test_Dataset_lazy_data_home(monkeypatch, tmp_path):
+
+    # the default data_home of lazy datasets is resolved
+    # without initializing (or downloading) the soundata dataset
+    monkeypatch.setenv("HOME", str(tmp_path))
+    with mock.patch("micarraylib.core._initialize") as initialize:
+        a = micarraylib.datasets.marco(lazy=True, disk_cache=True)
+        assert a.disk_cache.path == os.path.join(
+            str(tmp_path), "sound_datasets", "marco", "micarraylib_cache"
+        )
+        b = pickle.loads(pickle.dumps(a))
+        assert not initialize.called
+    assert a._dataset is None
+    assert b._initialize_args[:3] == (
+        "marco",
+        os.path.join(str(tmp_path), "sound_datasets", "marco"),
+        False,
+    )
+    assert b.dataset.data_home == b._initialize_args[1]
+
+
+def test_extract_features():
+
+    a = micarraylib.datasets.tau2019sse(
+        download=False, data_home="tests/resources/datasets/tau2019sse"
+    )
+    clip_ids = ["dev/split1_ir0_ov1_1"] * 2
+    # at the loader's sampling rate, so the workers do not resample
+    kwargs = dict(fs=48000, n_mels=32, stop=1)
+    F = a.get_seld_features(clip_ids[0], "Eigenmike", **kwargs)
+    for processes in [1, 2]:
+        out = list(
+            extract_features(a, "Eigenmike", clip_ids, processes=processes, **kwargs)
+        )
+        assert [c for c, _ in out] == clip_ids
+        assert np.allclose(out[1][1]["intensity"], F["intensity"])
+    out = extract_features(a, "Eigenmike", clip_ids, "gcc_phat", processes=1)
+    assert next(out)[1].shape[0] == 6
+
+    with pytest.raises(ValueError):
+        list(extract_features(a, "Eigenmike", clip_ids, "foo"))
+
+
 def test_Dataset_plot_micarray():
 
     a = micarraylib.datasets.marco(download=False, data_home="~/")
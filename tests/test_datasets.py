@@ -1,4 +1,7 @@
 import micarraylib.datasets
+import subprocess
+import sys
+import pytest
 
 
 def test_starss2022_helper():
@@ -47,3 +50,31 @@ def test_eigenscape_raw_helper():
 
     a = micarraylib.datasets.eigenscape_raw(download=False, data_home="~/")
     assert isinstance(a, micarraylib.datasets.eigenscape_loader.eigenscape_raw)
+
+
+def test_import_time():
+
+    # importing the package must not import the heavy dependencies,
+    # which are only needed once audio is decoded or plotted
+    code = """
+import sys, time
+start = time.perf_counter()
+import micarraylib.datasets, micarraylib.core, micarraylib.utils
+print(time.perf_counter() - start)
+heavy = ["librosa", "spaudiopy", "matplotlib", "scipy.signal", "soundata"]
+heavy += ["".join(["micarraylib.datasets.", l]) for l in micarraylib.datasets.LOADERS]
+print(",".join([m for m in heavy if m in sys.modules]))
+"""
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.split("\n")
+    assert float(output[0]) < 2.0
+    assert output[1] == ""
+
+
+def test_lazy_loaders():
+
+    assert "marco_loader" in micarraylib.datasets.LOADERS
+    assert micarraylib.datasets.marco_loader.marco.__name__ == "marco"
+    with pytest.raises(AttributeError):
+        micarraylib.datasets.foo
@@ -71,6 +71,11 @@ def test_eigenscape_raw_get_audio_numpy():
 
     assert (A == Al).all()
 
+    out = np.empty_like(Al)
+    assert a.get_audio_numpy("Beach-01-Raw", out=out) is out
+    assert (out == Al).all()
+    assert (a.get_audio_numpy("Beach-01-Raw", mmap=True)[:, :] == Al).all()
+
     with pytest.raises(ValueError):
         a.get_audio_numpy("a", fmt="B")
     with pytest.raises(ValueError):
@@ -0,0 +1,138 @@
+from micarraylib.features import (
+    stft,
+    stft_blocks,
+    gcc_phat,
+    mel_filterbank,
+    logmel,
+    intensity_vectors,
+    salsa,
+    seld_features,
+)
+from micarraylib.steering import sh_matrix
+import numpy as np
+import librosa
+import pytest
+
+
+def test_stft():
+
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(3, 5000)).astype(np.float32)
+    X = stft(x, 512, 128)
+    assert X.shape == (3, 1 + 5000 // 128, 257)
+    assert X.dtype == np.complex64
+    for c in range(3):
+        L = librosa.stft(x[c], 512, 128, center=True, pad_mode="constant")
+        assert np.allclose(X[c], L.T, atol=1e-3)
+    assert stft(x, 512).shape == (3, 1 + 5000 // 256, 257)
+
+    with pytest.raises(ValueError):
+        stft(x[0], 512)
+
+
+def test_stft_blocks():
+
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(3, 5000)).astype(np.float32)
+    X = stft(x, 512, 128)
+    blocks = list(stft_blocks(x, 512, 128, block_frames=7))
+    assert [first for first, _ in blocks] == list(range(0, X.shape[1], 7))
+    assert np.allclose(np.concatenate([b for _, b in blocks], axis=1), X)
+    assert len(list(stft_blocks(x, 512, block_frames=100))) == 1
+
+    with pytest.raises(ValueError):
+        next(stft_blocks(x[0], 512))
+
+
+def test_gcc_phat():
+
+    rng = np.random.default_rng(0)
+    s = rng.normal(size=8000).astype(np.float32)
+    # the first channel lags 3 samples behind the second one
+    x = np.stack([np.roll(s, 3), s, np.roll(s, -2)])
+    X = stft(x, 512, 256)
+    pairs = np.array([[0, 1], [0, 2], [2, 1]])
+    G = gcc_phat(X, pairs, 10)
+    assert G.shape == (3, X.shape[1], 21)
+    assert G.dtype == np.float32
+    lags = np.arange(-10, 11)
+    frames = slice(2, -2)
+    assert np.all(lags[np.argmax(G[0, frames], axis=1)] == 3)
+    assert np.all(lags[np.argmax(G[1, frames], axis=1)] == 5)
+    assert np.all(lags[np.argmax(G[2, frames], axis=1)] == -2)
+
+    # interpolated lags
+    G = gcc_phat(X, pairs, 40, interp=4)
+    assert G.shape == (3, X.shape[1], 81)
+    assert np.all(np.arange(-40, 41)[np.argmax(G[0, frames], axis=1)] == 12)
+
+    with pytest.raises(ValueError):
+        gcc_phat(X, pairs, 256)
+
+
+def test_mel_filterbank():
+
+    M = mel_filterbank(24000, 1024, 64)
+    assert M.shape == (64, 513)
+    assert M.dtype == np.float32
+    assert not M.flags.writeable
+    assert np.allclose(M, librosa.filters.mel(24000, 1024, 64), atol=1e-6)
+    assert mel_filterbank(24000, 1024, 64) is M
+    assert mel_filterbank(48000, 1024, 64) is not M
+
+
+def _plane_wave(colatitude, azimuth, samples=12000):
+    # first order B-format (ACN, N3D) of noise from one direction
+    rng = np.random.default_rng(0)
+    s = rng.normal(size=samples)
+    Y = sh_matrix(np.array([[colatitude, azimuth]]), 1)[0]
+    return (Y[:, np.newaxis] * s).astype(np.float32)
+
+
+def test_logmel_intensity_vectors():
+
+    x = _plane_wave(np.pi / 2, np.pi / 2)
+    X = stft(x, 1024, 480)
+    L = logmel(X, 24000, 40)
+    assert L.shape == (4, X.shape[1], 40)
+    assert L.dtype == np.float32
+    power = np.abs(X) ** 2 @ mel_filterbank(24000, 1024, 40).T
+    assert np.allclose(L, 10 * np.log10(np.maximum(power, 1e-10)), atol=1e-3)
+
+    I = intensity_vectors(X, 24000, 40)
+    assert I.shape == (3, X.shape[1], 40)
+    assert I.dtype == np.float32
+    # the mean intensity vector points to the source (the y axis)
+    mean = I.sum(axis=(1, 2))
+    assert np.allclose(mean / np.linalg.norm(mean), [0, 1, 0], atol=1e-3)
+
+    with pytest.raises(ValueError):
+        intensity_vectors(X[:3], 24000)
+
+
+def test_salsa():
+
+    x = _plane_wave(0, 0)
+    X = stft(x, 1024, 480)
+    S = salsa(X, 24000)
+    assert S.shape == (7, X.shape[1], 1 + 9000 * 1024 // 24000)
+    assert S.dtype == np.float32
+    # the source is at the z axis
+    assert np.all(S[6, 2:-2] > 0)
+    assert np.allclose(S[4:6, 2:-2], 0, atol=1e-4)
+    assert salsa(X, 16000, fmax=9000).shape[2] == 513
+
+
+def test_seld_features():
+
+    x = _plane_wave(np.pi / 4, np.pi)
+    F = seld_features(x, 24000, 1024, 480, n_mels=32, include_salsa=True)
+    X = stft(x, 1024, 480)
+    assert sorted(F) == ["intensity", "logmel", "salsa"]
+    assert np.allclose(F["logmel"], logmel(X, 24000, 32))
+    assert np.allclose(F["intensity"], intensity_vectors(X, 24000, 32))
+    assert np.allclose(F["salsa"], salsa(X, 24000))
+    assert sorted(seld_features(x, 24000)) == ["intensity", "logmel"]
+
+    with pytest.raises(ValueError):
+        seld_features(x[:2], 24000)
@@ -26,6 +26,12 @@ def test_marco_get_audio_numpy():
     a = marco_loader.marco(download=False, data_home="tests/resources/datasets/marco")
     A = a.get_audio_numpy("impulse_response+90d", "OCT3D")
 
+    b = marco_loader.marco(
+        download=False, data_home="tests/resources/datasets/marco", workers=4
+    )
+    assert b.workers == 4
+    assert (b.get_audio_numpy("impulse_response+90d", "OCT3D") == A).all()
+
     with pytest.raises(ValueError):
         a.get_audio_numpy("a", "Eigenfoo")
     with pytest.raises(ValueError):
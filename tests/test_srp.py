@@ -0,0 +1,98 @@
+from micarraylib.srp import SRPPHAT
+from micarraylib.steering import SteeringCache, direction_grid
+from micarraylib.utils import MappedAudio
+from micarraylib import arraycoords
+import numpy as np
+import os
+import pytest
+from helpers import plane_wave
+
+
+def _angle(a, b):
+    """
+    the angle between two directions (colatitude, azimuth)
+    """
+    u = [np.sin(a[0]) * np.cos(a[1]), np.sin(a[0]) * np.sin(a[1]), np.cos(a[0])]
+    v = [np.sin(b[0]) * np.cos(b[1]), np.sin(b[0]) * np.sin(b[1]), np.cos(b[0])]
+    return np.arccos(np.clip(np.dot(u, v), -1, 1))
+
+
+def test_SRPPHAT():
+
+    fs = 24000
+    rng = np.random.default_rng(0)
+    s = rng.normal(size=fs)
+    source = [1.2, 2.5]
+
+    # the 4-capsule Eigenmike subset of the DCASE datasets
+    eigenmike = arraycoords.get_array("Eigenmike")
+    subset = [eigenmike.capsule_names.index(c) for c in ["6", "10", "22", "26"]]
+    coords = eigenmike.standard_coords_array("cartesian")[subset]
+    S = SRPPHAT(coords, ("fibonacci", 500), fs, 1024, interp=4)
+    assert S.pairs.shape == (6, 2)
+    assert S.lag_index.shape == (500, 6)
+    assert np.all(S.lag_index >= 0) and np.all(S.lag_index <= 2 * S.max_lag)
+    x = plane_wave(coords, source, s, fs)
+    M = S.maps(x)
+    assert M.shape == (1 + fs // 512, 500)
+    assert M.dtype == np.float32
+    D = S.doa(x)
+    assert D.shape == (M.shape[0], 2)
+    assert np.median([_angle(d, source) for d in D]) < 0.3
+
+    # a large non-spherical array, in small blocks of frames
+    S = SRPPHAT("OCT3D", ("fibonacci", 500), fs, 1024)
+    coords = arraycoords.get_array("OCT3D").standard_coords_array("cartesian")
+    x = plane_wave(coords, source, s, fs)
+    M = S.maps(x, block_size=10000)
+    assert np.allclose(M, S.maps(x), atol=1e-6)
+    D = S.directions[np.argmax(M, axis=1)]
+    assert np.median([_angle(d, source) for d in D]) < 0.2
+
+    # the TDOAs can come from a cache
+    C = SteeringCache()
+    S2 = SRPPHAT("OCT3D", ("fibonacci", 500), fs, 1024, steering_cache=C)
+    assert np.array_equal(S2.lag_index, S.lag_index)
+    assert np.allclose(S2.maps(x), M)
+
+    with pytest.raises(ValueError):
+        S.maps(x[:3])
+    with pytest.raises(ValueError):
+        SRPPHAT(np.zeros((1, 3)), ("fibonacci", 10), fs)
+    with pytest.raises(ValueError):
+        SRPPHAT("OCT3D", ("fibonacci", 10), fs, steering_cache=C, c=340)
+    C = SteeringCache(c=340)
+    SRPPHAT("OCT3D", ("fibonacci", 10), fs, steering_cache=C, c=340)
+    assert np.allclose(
+        C.tdoas("OCT3D", ("fibonacci", 10)),
+        SteeringCache().tdoas("OCT3D", ("fibonacci", 10)) * 343 / 340,
+    )
+
+
+def test_SRPPHAT_large_aperture():
+
+    # the lags of the Hamasaki square do not fit in 1024 samples at 48 kHz
+    fs = 48000
+    with pytest.raises(ValueError):
+        SRPPHAT("Hamasaki", ("fibonacci", 50), fs, 1024)
+    S = SRPPHAT("Hamasaki", ("fibonacci", 50), fs, 2048)
+    assert 2 * S.max_lag + 1 > 1024
+    # interpolated lags need the same FFT size
+    with pytest.raises(ValueError):
+        SRPPHAT("Hamasaki", ("fibonacci", 50), fs, 1024, interp=4)
+    x = np.random.default_rng(0).normal(size=(12, fs // 10)).astype(np.float32)
+    assert S.maps(x).shape == (1 + fs // 10 // 1024, 50)
+
+
+def test_SRPPHAT_MappedAudio():
+
+    # memory-mapped recordings are read one block of frames at a time
+    wavs_dir = (
+        "tests/resources/datasets/marco/3D-MARCo Impulse Responses/01_Speaker_+90deg_3m"
+    )
+    wavs = sorted(w for w in os.listdir(wavs_dir) if "_OCT3D_" in w)
+    x = MappedAudio([os.path.join(wavs_dir, w) for w in wavs])
+    S = SRPPHAT("OCT3D", ("fibonacci", 50), x.fs, 1024)
+    M = S.maps(x, block_size=100000)
+    assert M.shape == (1 + x.shape[1] // 512, 50)
+    assert np.allclose(M, S.maps(np.asarray(x)), atol=1e-6)
@@ -52,6 +52,25 @@ def test_starss2022_get_audio_numpy():
     assert (B == Bl).all()
     assert (A == Al).all()
 
+    # repeated requests are served from the memory cache
+    a = starss2022_loader.starss2022(
+        download=False,
+        data_home="tests/resources/datasets/starss2022",
+        memory_cache_size=10**7,
+    )
+    A = a.get_audio_numpy("dev/dev-train-sony/fold3_room21_mix001")
+    assert a.get_audio_numpy("dev/dev-train-sony/fold3_room21_mix001") is A
+    assert not A.flags.writeable
+    assert (A == Al).all()
+    out = np.empty_like(Al)
+    assert a.get_audio_numpy("dev/dev-train-sony/fold3_room21_mix001", out=out) is out
+    assert out.flags.writeable and (out == Al).all()
+    B = a.get_audio_numpy("dev/dev-train-sony/fold3_room21_mix001", start=0.5)
+    assert (B == Al[:, 12000:]).all()
+    assert (a.memory_cache.hits, a.memory_cache.misses) == (2, 2)
+    a.clear_cache()
+    assert len(a.memory_cache) == 0
+
     with pytest.raises(ValueError):
         a.get_audio_numpy("a", "b")
     with pytest.raises(ValueError):
@@ -64,6 +83,9 @@ def test_starss2022_get_audio_events():
         download=False, data_home="tests/resources/datasets/starss2022"
     )
     A = a.get_audio_events("dev/dev-train-sony/fold3_room21_mix001")
+    # only the annotated clip is built, and later requests reuse it
+    assert len(a.clip_index) == 1
+    assert a.get_audio_events("dev/dev-train-sony/fold3_room21_mix001") is A
 
     with pytest.raises(ValueError):
         a.get_audio_events("a")
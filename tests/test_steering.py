@@ -0,0 +1,142 @@
+from micarraylib.steering import (
+    SteeringCache,
+    direction_grid,
+    steering_vectors,
+    sh_matrix,
+    tdoas,
+)
+from micarraylib import arraycoords
+from micarraylib.arraycoords.array_shapes_utils import _polar2cart_array
+import numpy as np
+import pytest
+
+
+def test_direction_grid():
+
+    D = direction_grid("fibonacci", 100)
+    assert D.shape == (100, 2)
+    assert np.all((D[:, 0] > 0) & (D[:, 0] < np.pi))
+    assert np.all((D[:, 1] >= 0) & (D[:, 1] < 2 * np.pi))
+    # nearly uniform: the mean of the unit vectors is close to zero
+    U = _polar2cart_array(np.column_stack([D, np.ones(100)]), "radians")
+    assert np.allclose(np.mean(U, axis=0), 0, atol=0.02)
+
+    D = direction_grid("equiangular", 4)
+    assert D.shape == (32, 2)
+    assert len(np.unique(D[:, 0])) == 4
+    assert len(np.unique(D[:, 1])) == 8
+
+    with pytest.raises(ValueError):
+        direction_grid("foo", 10)
+    with pytest.raises(ValueError):
+        direction_grid("fibonacci", 0)
+
+
+def test_steering_vectors():
+
+    # a capsule 0.343 m in front of the center receives
+    # a wave from the front 1 ms earlier
+    coords = np.array([[0.343, 0, 0], [0, 0, 0]])
+    directions = np.array([[np.pi / 2, 0], [np.pi / 2, np.pi / 2]])
+    A = steering_vectors(coords, directions, 1000, 4)
+    assert A.shape == (2, 2, 3)
+    assert A.dtype == np.complex64
+    assert np.allclose(A[0, 0], [1, 1j, -1], atol=1e-6)
+    assert np.allclose(A[0, 1], 1)
+    # from the side there is no delay
+    assert np.allclose(A[1], 1, atol=1e-6)
+
+    # the steering vectors match the spectrum of the signal at the
+    # capsules (a capsule 0.686 m in front is 2 samples ahead)
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=64)
+    coords = np.array([[0.686, 0, 0], [0, -0.343, 0]])
+    A = steering_vectors(coords, directions, 1000, 64)
+    X = np.fft.rfft(x)
+    assert np.allclose(np.fft.rfft(np.roll(x, -2)), A[0, 0] * X, atol=1e-4)
+    assert np.allclose(np.fft.rfft(np.roll(x, 1)), A[1, 1] * X, atol=1e-4)
+
+    arr = arraycoords.get_array("Ambeo")
+    coords = arr.standard_coords_array("cartesian")
+    A = steering_vectors(coords, direction_grid("fibonacci", 200), 48000, 512)
+    assert A.shape == (200, 4, 257)
+    assert np.allclose(np.abs(A), 1, atol=1e-5)
+
+
+def test_tdoas():
+
+    # a wave from the back reaches the capsule at the center
+    # 1 ms before the capsule in front, and a wave from the
+    # left reaches the capsule on the left 1 ms before the others
+    coords = np.array([[0, 0, 0], [0.343, 0, 0], [0, 0.343, 0]])
+    T = tdoas(coords, [[np.pi / 2, np.pi], [np.pi / 2, np.pi / 2]])
+    assert T.shape == (2, 3)
+    assert np.allclose(T[0], [-0.001, 0, 0.001])
+    assert np.allclose(T[1], [0, 0.001, 0.001])
+
+    C = SteeringCache()
+    T = C.tdoas("NAO", ("fibonacci", 50))
+    assert T.shape == (50, 66)
+    assert C.tdoas("NAO", ("fibonacci", 50)) is T
+    P = arraycoords.get_array("NAO").capsule_pairs()
+    assert np.all(np.abs(T) <= P.max_tdoa + 1e-12)
+
+
+def test_sh_matrix():
+
+    D = direction_grid("fibonacci", 50)
+    Y = sh_matrix(D, 2)
+    assert Y.shape == (50, 9)
+    # the zeroth order is constant
+    assert np.allclose(Y[:, 0], Y[0, 0])
+
+
+def test_SteeringCache(tmp_path):
+
+    C = SteeringCache()
+    A = C.steering_vectors("Eigenmike", ("fibonacci", 100), 24000, 256)
+    assert A.shape == (100, 32, 129)
+    assert not A.flags.writeable
+    assert C.steering_vectors("Eigenmike", ("fibonacci", 100), 24000, 256) is A
+    arr = arraycoords.get_array("Eigenmike")
+    assert C.steering_vectors(arr, ("fibonacci", 100), 24000, 256) is A
+    assert np.array_equal(
+        A,
+        steering_vectors(
+            arr.standard_coords_array("cartesian"),
+            direction_grid("fibonacci", 100),
+            24000,
+            256,
+        ),
+    )
+    # a different key is a different matrix
+    B = C.steering_vectors("Eigenmike", ("fibonacci", 100), 48000, 256)
+    assert B is not A
+    assert not np.array_equal(A, B)
+
+    # explicit directions and coordinates
+    D = direction_grid("equiangular", 3)
+    coords = arraycoords.get_array("OCT3D").standard_coords_array("cartesian")
+    A = C.steering_vectors(coords, D, 24000, 64)
+    assert A.shape == (18, 9, 33)
+    assert C.steering_vectors(np.array(coords), np.array(D), 24000, 64) is A
+
+    Y = C.sh_matrix(("fibonacci", 100), 3)
+    assert Y.shape == (100, 16)
+    assert C.sh_matrix(("fibonacci", 100), 3) is Y
+
+    # matrices stored on disk are memory-mapped by other caches
+    C1 = SteeringCache(str(tmp_path))
+    A1 = C1.steering_vectors("Ambeo", ("fibonacci", 64), 24000, 128)
+    C2 = SteeringCache(str(tmp_path))
+    A2 = C2.steering_vectors("Ambeo", ("fibonacci", 64), 24000, 128)
+    assert isinstance(A2, np.memmap)
+    assert not A2.flags.writeable
+    assert np.array_equal(A1, A2)
+    C2.clear()
+    assert C2.disk_cache.size() == 0
+
+    with pytest.raises(ValueError):
+        C.steering_vectors(np.zeros((4, 2)), ("fibonacci", 10), 24000, 64)
+    with pytest.raises(ValueError):
+        C.steering_vectors("foo", ("fibonacci", 10), 24000, 64)
@@ -52,6 +52,18 @@ def test_tau2021sse_nigens_get_audio_numpy():
     assert (B == Bl).all()
     assert (A == Al).all()
 
+    A = a.get_audio_numpy("dev/dev-train/fold1_room1_mix001", start=0.25, stop=0.5)
+    assert (A == Al[:, 6000:12000]).all()
+
+    blocks = list(
+        a.iter_audio_blocks(
+            "dev/dev-train/fold1_room1_mix001", "Eigenmike", "B", block_size=10000
+        )
+    )
+    assert len(blocks) == 3
+    assert (np.concatenate(blocks, axis=1)[:, :24000] == Bl).all()
+    assert (blocks[-1][:, 4000:] == 0).all()
+
     with pytest.raises(ValueError):
         a.get_audio_numpy("a", "b")
     with pytest.raises(ValueError):
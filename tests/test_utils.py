@@ -1,4 +1,15 @@
-from micarraylib.utils import a2b, _get_audio_numpy
+from micarraylib.utils import (
+    a2b,
+    a2b_batch,
+    A2BEncoder,
+    _get_a2b_encoder,
+    _get_audio_numpy,
+    _iter_audio_blocks,
+    _resample_filter,
+    resample,
+    ClipIndex,
+    MappedAudio,
+)
 from micarraylib.datasets import marco
 from spaudiopy import sph
 import numpy as np
@@ -6,6 +17,8 @@ import pytest
 import os
 import librosa
 import warnings
+import scipy.signal
+from concurrent.futures import ThreadPoolExecutor
 
 OCT3D_test_wavs = [
     "+90deg_010_OCT3D_1_FL.wav",
@@ -22,6 +35,33 @@ data_dir = "tests/resources/datasets/marco"
 wavs_dir = os.path.join(data_dir, "3D-MARCo Impulse Responses/01_Speaker_+90deg_3m")
 
 
+def test_ClipIndex():
+
+    a = marco(download=False, data_home=data_dir)
+    index = ClipIndex(a.dataset)
+    clip_id = a.micarray_capsule_clip_ids["OCT3D"]["impulse_response+90d"][0]
+
+    assert len(index) == 0
+    assert clip_id in index
+    assert "foo" not in index
+    clip = index[clip_id]
+    assert clip.clip_id == clip_id
+    assert index[clip_id] is clip
+    assert len(index) == 1
+
+    clips = index.load_clips([clip_id])
+    assert list(clips.keys()) == [clip_id]
+    assert clips[clip_id] is clip
+
+    # concurrent lookups of the same clip_id share one Clip object
+    with ThreadPoolExecutor(8) as pool:
+        clips = list(pool.map(lambda c: index[c], [clip_id] * 32))
+    assert all([c is clip for c in clips])
+
+    with pytest.raises(ValueError):
+        index["foo"]
+
+
 def test_a2b():
     SH = sph.sh_matrix(
         5, [np.pi / 4, 7 * np.pi / 4], [np.pi / 3, np.pi - np.pi / 3], "real"
@@ -37,6 +77,87 @@ def test_a2b():
     assert np.allclose(a, b)
 
 
+def test_A2BEncoder():
+    coords = {"a": [np.pi / 3, np.pi / 4], "b": [np.pi - np.pi / 3, 7 * np.pi / 4]}
+    audio = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+    E = A2BEncoder(5, coords)
+    assert E.matrix.shape == (36, 2)
+    assert not E.matrix.flags.writeable
+    B = E.encode(audio)
+    assert B.dtype == np.float64
+    assert np.allclose(B, a2b(5, audio, coords))
+    B = E.encode(audio.astype(np.float32))
+    assert B.dtype == np.float32
+    assert np.allclose(B, a2b(5, audio, coords), atol=1e-6)
+    out = np.empty((36, 3))
+    assert E.encode(audio, out=out) is out
+    assert np.allclose(out, a2b(5, audio, coords))
+    # non contiguous audio
+    assert np.allclose(E.encode(audio.T.copy().T), out)
+
+    encoders = {}
+    E = _get_a2b_encoder(encoders, 1, coords)
+    assert _get_a2b_encoder(encoders, 1, coords) is E
+    assert _get_a2b_encoder(encoders, 1, dict(coords)) is E
+    assert _get_a2b_encoder(encoders, 2, coords) is not E
+    assert len(encoders) == 2
+    assert _get_a2b_encoder(None, 1, coords) is not E
+
+
+def test_a2b_batch():
+    coords = {"a": [np.pi / 3, np.pi / 4], "b": [np.pi - np.pi / 3, 7 * np.pi / 4]}
+    audio = np.random.randn(3, 2, 5)
+    B = a2b_batch(1, audio, coords)
+    assert B.shape == (3, 4, 5)
+    for i in range(3):
+        assert np.allclose(B[i], a2b(1, audio[i], coords))
+
+    B = a2b_batch(1, [audio[0], audio[1, :, :2]], coords)
+    assert len(B) == 2
+    assert np.allclose(B[0], a2b(1, audio[0], coords))
+    assert np.allclose(B[1], a2b(1, audio[1, :, :2], coords))
+
+    E = A2BEncoder(1, coords)
+    out = np.empty((3, 4, 5))
+    assert E.encode_batch(audio, out=out) is out
+    with pytest.raises(ValueError):
+        E.encode_batch([audio[0]], out=out)
+
+
+def test_resample():
+    audio = np.random.randn(3, 4410).astype(np.float32)
+    assert resample(audio, 44100, 44100) is audio
+    A = resample(audio, 44100, 24000)
+    assert A.shape == (3, 2400)
+    assert np.allclose(A, librosa.resample(audio, 44100, 24000))
+    # one channel (librosa only takes it as a 1-D array)
+    A = resample(audio[:1], 44100, 24000)
+    assert A.shape == (1, 2400)
+    assert np.allclose(A[0], librosa.resample(audio[0], 44100, 24000))
+    A = resample(audio, 44100, 24000, "fast")
+    assert A.dtype == np.float32
+    assert np.allclose(
+        A, scipy.signal.resample_poly(audio, 80, 147, axis=-1), atol=1e-5
+    )
+    for quality in ["medium", "high"]:
+        A = resample(audio, 44100, 24000, quality)
+        assert A.shape == (3, 2400)
+        assert np.allclose(A[1], resample(audio[1], 44100, 24000, quality))
+
+    # the filters are designed once
+    _resample_filter.cache_clear()
+    resample(audio, 48000, 24000, "high")
+    resample(audio, 48000, 24000, "high")
+    info = _resample_filter.cache_info()
+    assert info.misses == 1 and info.hits == 1
+    up, down, h = _resample_filter(48000, 24000, "high")
+    assert (up, down) == (1, 2)
+    assert not h.flags.writeable
+
+    with pytest.raises(ValueError):
+        resample(audio, 48000, 24000, "foo")
+
+
 def test_get_audio_numpy_valueerrors():
 
     a = marco(download=False, data_home="tests/resources/datasets/marco")
@@ -94,6 +215,249 @@ def test_get_audio_numpy_resample():
     assert np.allclose(A, B, atol=1e-4)
 
 
+def test_get_audio_numpy_workers():
+    a = marco(download=False, data_home=data_dir)
+    clip_names = a.micarray_capsule_clip_ids["OCT3D"]["impulse_response+90d"]
+    A = _get_audio_numpy(clip_names, a.dataset, "A", "A", fs=48000)
+    B = _get_audio_numpy(clip_names, a.dataset, "A", "A", fs=48000, workers=4)
+    assert A.shape == (9, 14400)
+    assert (A == B).all()
+
+
+def test_get_audio_numpy_out():
+    a = marco(download=False, data_home=data_dir)
+    clip_names = a.micarray_capsule_clip_ids["OCT3D"]["impulse_response+90d"]
+    A = _get_audio_numpy(clip_names, a.dataset, "A", "A", fs=48000)
+
+    out = np.zeros((9, 14400), dtype=np.float32)
+    B = _get_audio_numpy(clip_names, a.dataset, "A", "A", fs=48000, out=out)
+    assert B is out
+    assert (B == A).all()
+
+    # resampling and encoding also write into out
+    A = _get_audio_numpy(clip_names, a.dataset, "A", "B", a.capsule_coords["OCT3D"])
+    out = np.zeros((9, 14400))
+    B = _get_audio_numpy(
+        clip_names, a.dataset, "A", "B", a.capsule_coords["OCT3D"], out=out
+    )
+    assert B is out
+    assert np.allclose(B, A)
+
+    with pytest.raises(ValueError):
+        _get_audio_numpy(
+            clip_names, a.dataset, "A", "A", fs=48000, out=np.zeros((9, 10))
+        )
+    with pytest.raises(ValueError):
+        _get_audio_numpy(
+            clip_names, a.dataset, "A", "A", fs=48000, out=np.zeros((9, 14400), int)
+        )
+
+
+def test_MappedAudio():
+    wavs = [os.path.join(wavs_dir, w) for w in OCT3D_test_wavs]
+    A = MappedAudio(wavs)
+    B = np.array(
+        [librosa.load(w, sr=None, mono=False)[0] for w in wavs], dtype=np.float32
+    )
+
+    assert A.shape == (9, 28800)
+    assert len(A) == 9
+    assert A.fs == 96000
+    assert A.dtype == np.float32
+    assert (np.asarray(A) == B).all()
+    assert (A[2:5, 100:200] == B[2:5, 100:200]).all()
+    assert (A[3] == B[3]).all()
+    assert (A[:, 7] == B[:, 7]).all()
+
+    with pytest.raises(ValueError):
+        MappedAudio(
+            [wavs[0], os.path.join(wavs_dir, "+90deg_065_Eigenmike_Raw_32ch.wav")]
+        )
+    with pytest.raises(ValueError):
+        MappedAudio(
+            [os.path.join(data_dir, "..", "eigenscape", "Metadata-EigenScape.csv")]
+        )
+
+
+def test_get_audio_numpy_mmap():
+    a = marco(download=False, data_home=data_dir)
+    clip_names = a.micarray_capsule_clip_ids["OCT3D"]["impulse_response+90d"]
+    A = _get_audio_numpy(clip_names, a.dataset, "A", "A", mmap=True)
+    assert isinstance(A, MappedAudio)
+    assert A.shape == (9, 28800)
+
+    with pytest.raises(ValueError):
+        _get_audio_numpy(clip_names, a.dataset, "A", "A", fs=48000, mmap=True)
+    with pytest.raises(ValueError):
+        _get_audio_numpy(
+            clip_names, a.dataset, "A", "B", a.capsule_coords["OCT3D"], mmap=True
+        )
+
+
+def test_get_audio_numpy_start_stop():
+    a = marco(download=False, data_home=data_dir)
+    clip_names = a.micarray_capsule_clip_ids["Eigenmike"]["impulse_response+90d"]
+    A = _get_audio_numpy(clip_names, a.dataset, "A", "A", fs=48000)
+    B = _get_audio_numpy(
+        clip_names, a.dataset, "A", "A", fs=48000, start=0.01, stop=0.05
+    )
+    assert B.shape == (32, 1920)
+    assert (B == A[:, 480:2400]).all()
+    B = _get_audio_numpy(clip_names, a.dataset, "A", "A", fs=48000, start=0.05)
+    assert (B == A[:, 2400:]).all()
+    B = _get_audio_numpy(clip_names, a.dataset, "A", "A", fs=48000, stop=10)
+    assert (B == A).all()
+
+    # the slice is resampled and encoded
+    B = _get_audio_numpy(
+        clip_names,
+        a.dataset,
+        "A",
+        "B",
+        a.capsule_coords["Eigenmike"],
+        N=1,
+        fs=24000,
+        start=0.01,
+        stop=0.05,
+    )
+    assert B.shape == (4, 960)
+
+    # mono files that are resampled when decoded
+    clip_names = a.micarray_capsule_clip_ids["OCT3D"]["impulse_response+90d"]
+    B = _get_audio_numpy(clip_names, a.dataset, "A", "A", start=0.1, stop=0.2)
+    assert B.shape == (9, 4800)
+
+    A = _get_audio_numpy(clip_names, a.dataset, "A", "A", mmap=True)
+    B = _get_audio_numpy(
+        clip_names, a.dataset, "A", "A", mmap=True, start=0.1, stop=0.2
+    )
+    assert B.shape == (9, 9600)
+    assert (B[:, :] == A[:, 9600:19200]).all()
+
+    with pytest.raises(ValueError):
+        _get_audio_numpy(clip_names, a.dataset, "A", "A", start=0.2, stop=0.1)
+    with pytest.raises(ValueError):
+        _get_audio_numpy(clip_names, a.dataset, "A", "A", start=10)
+    with pytest.raises(ValueError):
+        _get_audio_numpy(clip_names, a.dataset, "A", "A", start=-1)
+
+
+def test_iter_audio_blocks():
+    a = marco(download=False, data_home=data_dir)
+    clip_names = a.micarray_capsule_clip_ids["Eigenmike"]["impulse_response+90d"]
+    A = _get_audio_numpy(clip_names, a.dataset, "A", "A", fs=48000)
+    padded = np.concatenate((A, np.zeros((32, 1000), np.float32)), axis=1)
+
+    blocks = list(
+        _iter_audio_blocks(
+            clip_names, a.dataset, "A", "A", block_size=1000, chunk_size=700
+        )
+    )
+    assert len(blocks) == 5
+    assert all([b.shape == (32, 1000) for b in blocks])
+    assert (np.concatenate(blocks, axis=1) == padded[:, :5000]).all()
+
+    # overlapping and skipping blocks
+    for hop in [500, 1500]:
+        blocks = list(
+            _iter_audio_blocks(
+                clip_names, a.dataset, "A", "A", block_size=1000, hop=hop
+            )
+        )
+        assert len(blocks) == len(range(0, 4800, hop))
+        for i, b in enumerate(blocks):
+            assert (b == padded[:, i * hop : i * hop + 1000]).all()
+
+    # resampling and encoding as the audio is streamed
+    blocks = list(
+        _iter_audio_blocks(
+            clip_names,
+            a.dataset,
+            "A",
+            "B",
+            a.capsule_coords["Eigenmike"],
+            N=1,
+            fs=24000,
+            block_size=1000,
+            chunk_size=700,
+        )
+    )
+    assert len(blocks) == 3
+    blocks_medium = _iter_audio_blocks(
+        clip_names, a.dataset, "A", "A", fs=24000, block_size=2400, quality="medium"
+    )
+    assert np.allclose(
+        next(blocks_medium), resample(A, 48000, 24000, "medium"), atol=1e-6
+    )
+    # kaiser_best cannot be streamed
+    with pytest.warns(UserWarning, match="kaiser_best"):
+        blocks_best = _iter_audio_blocks(
+            clip_names, a.dataset, "A", "A", fs=24000, quality="kaiser_best"
+        )
+    blocks_high = _iter_audio_blocks(
+        clip_names, a.dataset, "A", "A", fs=24000, quality="high"
+    )
+    assert (next(blocks_best) == next(blocks_high)).all()
+    B = a2b(
+        1, scipy.signal.resample_poly(A, 1, 2, axis=1), a.capsule_coords["Eigenmike"]
+    )
+    assert np.allclose(np.concatenate(blocks, axis=1)[:, :2400], B, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        _iter_audio_blocks(clip_names, a.dataset, "A", "A", block_size=0)
+    with pytest.raises(ValueError):
+        _iter_audio_blocks(clip_names, a.dataset, "A", "A", hop=-1)
+    with pytest.raises(ValueError):
+        _iter_audio_blocks(clip_names, a.dataset, "B", "A")
+    with pytest.raises(ValueError):
+        _iter_audio_blocks(clip_names, a.dataset, "A", "B", N=6)
+
+
+def test_get_audio_numpy_order(caplog):
+    a = marco(download=False, data_home=data_dir)
+    clip_names = a.micarray_capsule_clip_ids["Eigenmike"]["impulse_response+90d"]
+    coords = a.capsule_coords["Eigenmike"]
+    with caplog.at_level("DEBUG", logger="micarraylib.utils"):
+        A = _get_audio_numpy(clip_names, a.dataset, "A", "B", coords, N=1, fs=24000)
+    assert "32 channels to 4 channels: encode_first" in caplog.text
+    B = _get_audio_numpy(
+        clip_names, a.dataset, "A", "B", coords, N=1, fs=24000, order="resample_first"
+    )
+    assert A.shape == B.shape == (4, 2400)
+    assert np.allclose(A, B, atol=1e-5)
+    stats = {}
+    _get_audio_numpy(
+        clip_names, a.dataset, "A", "B", coords, N=0, fs=24000, stats=stats
+    )
+    assert stats == {"encode_first": 1}
+
+    blocks = [
+        np.concatenate(
+            list(
+                _iter_audio_blocks(
+                    clip_names,
+                    a.dataset,
+                    "A",
+                    "B",
+                    coords,
+                    N=1,
+                    fs=24000,
+                    block_size=2400,
+                    order=order,
+                )
+            ),
+            axis=1,
+        )
+        for order in ["resample_first", "encode_first"]
+    ]
+    assert np.allclose(blocks[0], blocks[1], atol=1e-5)
+
+    with pytest.raises(ValueError):
+        _get_audio_numpy(
+            clip_names, a.dataset, "A", "B", coords, N=1, fs=24000, order="foo"
+        )
+
+
 def test_get_audio_numpy_a2b():
 
     # OCT3D test